@@ -0,0 +1,178 @@
+import os
+import re
+import json
+import subprocess
+from facts_cache import CACHE_DIR, get_boot_id
+from systemd_units import query_states
+
+# Boot timings cannot change until the next boot, so they are kept per boot id
+BOOT_CACHE_FILE = os.path.join(CACHE_DIR, 'boot_analysis.json')
+
+COMMANDS = {
+    'time': ["systemd-analyze", "time"],
+    'blame': ["systemd-analyze", "blame", "--no-pager"],
+    'critical_chain': ["systemd-analyze", "critical-chain", "--no-pager"],
+}
+
+TIME_UNITS = {'h': 3600, 'min': 60, 's': 1, 'ms': 0.001, 'us': 0.000001, 'µs': 0.000001}
+TIME_PART = re.compile(r'(\d+(?:\.\d+)?)\s*(h|min|ms|us|µs|s)\b')
+UNIT_NAME = re.compile(r'([\w@.\\:-]+\.(?:service|target|socket|mount|device|path|timer|slice|scope|swap))')
+CHAIN_LINE = re.compile(UNIT_NAME.pattern + r'\s+@(.+?)(?:\s+\+(.+))?$')
+
+# Services the page never offers to disable: without them the system or the
+# session would not come up, or it would quietly lose its security, login,
+# storage or time keeping
+ESSENTIAL_PREFIXES = (
+    # Boot and core plumbing
+    "systemd-", "dbus", "polkit", "user@", "user-runtime-dir@", "getty@", "serial-getty@",
+    "dracut-", "initrd-", "plymouth-start", "kmod-", "lvm2-", "dm-event", "mdmonitor",
+    "multipathd", "udisks2", "rsyslog", "syslog-ng",
+    # Login and the graphical session
+    "sddm", "gdm", "lightdm", "display-manager", "greetd", "accounts-daemon", "elogind",
+    "seatd", "upower", "rtkit-daemon",
+    # Security
+    "firewalld", "nftables", "iptables", "ip6tables", "ufw", "auditd", "apparmor",
+    "selinux-", "sshd", "sssd", "nscd",
+    # Networking and time
+    "NetworkManager.service", "wpa_supplicant", "iwd", "chronyd", "ntpd",
+)
+
+def parse_time_span(text):
+    # "1min 2.345s" -> 62.345, None if there is no time in it
+    parts = TIME_PART.findall(text or "")
+    if not parts:
+        return None
+    return sum(float(value) * TIME_UNITS[unit] for value, unit in parts)
+
+def parse_time(output):
+    # "Startup finished in 2.1s (kernel) + 3.0s (initrd) + 9.8s (userspace) = 14.9s"
+    phases = {}
+    total = None
+    for line in output.splitlines():
+        if "Startup finished in" not in line:
+            continue
+        spans, _, total_text = line.split("Startup finished in", 1)[1].partition(" = ")
+        for span in spans.split(" + "):
+            match = re.match(r'\s*(.+?)\s*\((\w+)\)', span)
+            if match:
+                phases[match.group(2)] = parse_time_span(match.group(1))
+        total = parse_time_span(total_text)
+    return {'phases': phases, 'total': total}
+
+def parse_blame(output):
+    # [[unit, seconds]] slowest first, as systemd-analyze prints them
+    blame = []
+    for line in output.splitlines():
+        fields = line.strip().rsplit(None, 1)
+        if len(fields) == 2 and UNIT_NAME.fullmatch(fields[1]):
+            seconds = parse_time_span(fields[0])
+            if seconds is not None:
+                blame.append([fields[1], seconds])
+    return blame
+
+def parse_critical_chain(output):
+    # [[unit, activated at, took]] from the tree, took is None for units that
+    # did not need any time of their own
+    chain = []
+    for line in output.splitlines():
+        match = CHAIN_LINE.search(line)
+        if match:
+            chain.append([match.group(1), parse_time_span(match.group(2)),
+                          parse_time_span(match.group(3)) if match.group(3) else None])
+    return chain
+
+def run_analysis():
+    # All three commands run at the same time, raises RuntimeError if the boot
+    # has not finished yet or systemd-analyze is missing
+    env = dict(os.environ, LC_ALL="C", SYSTEMD_COLORS="0")
+    try:
+        processes = {key: subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                           text=True, env=env)
+                     for key, argv in COMMANDS.items()}
+    except OSError as e:
+        raise RuntimeError(f"Failed to run systemd-analyze: {e}")
+    outputs = {}
+    errors = []
+    for key, process in processes.items():
+        try:
+            stdout, stderr = process.communicate(timeout=60)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            errors.append(f"systemd-analyze {key} timed out")
+            continue
+        if process.returncode != 0:
+            errors.append(stderr.strip() or f"systemd-analyze {key} failed")
+        outputs[key] = stdout
+    if errors:
+        raise RuntimeError("\n".join(errors))
+    return {
+        'time': parse_time(outputs['time']),
+        'blame': parse_blame(outputs['blame']),
+        'critical_chain': parse_critical_chain(outputs['critical_chain']),
+    }
+
+def load_boot_data():
+    boot_id = get_boot_id()
+    try:
+        with open(BOOT_CACHE_FILE, 'r') as f:
+            cached = json.load(f)
+        if boot_id and cached.get('boot_id') == boot_id:
+            return cached['data']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    data = run_analysis()
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = BOOT_CACHE_FILE + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'boot_id': boot_id, 'data': data}, f)
+        os.replace(tmp_path, BOOT_CACHE_FILE)
+    except OSError as e:
+        print(f"Error writing boot analysis cache: {e}")
+    return data
+
+def is_essential(unit):
+    return unit.startswith(ESSENTIAL_PREFIXES) or "@" in unit
+
+class BootAnalysis:
+    """Timings of the current boot, keyed by unit name.
+
+    activation_time() is how long a unit took to start according to blame,
+    critical units are the ones systemd-analyze critical-chain lists. enabled
+    holds the is-enabled state of the blamed services, which is read fresh on
+    every load since it changes when units are disabled.
+    """
+
+    def __init__(self, data, enabled=None):
+        self.phases = data['time']['phases']
+        self.total = data['time']['total']
+        self.blame = sorted(((unit, seconds) for unit, seconds in data['blame']),
+                            key=lambda entry: -entry[1])
+        self.times = dict(self.blame)
+        self.critical = {unit for unit, at, took in data['critical_chain']}
+        self.enabled = enabled or {}
+
+    def activation_time(self, unit):
+        return self.times.get(unit)
+
+    def on_critical_chain(self, unit):
+        return unit in self.critical
+
+    def disable_candidates(self, count=5, minimum=1.0):
+        # The slowest enabled services that are not essential for booting
+        candidates = []
+        for unit, seconds in self.blame:
+            if len(candidates) >= count or seconds < minimum:
+                break
+            if (unit.endswith(".service") and not is_essential(unit)
+                    and self.enabled.get(unit) == "enabled"):
+                candidates.append(unit)
+        return candidates
+
+def load_boot_analysis():
+    # Blocks, run it in a worker thread
+    data = load_boot_data()
+    services = [unit for unit, seconds in data['blame'] if unit.endswith(".service")]
+    return BootAnalysis(data, query_states("is-enabled", services))
@@ -0,0 +1,297 @@
+import os
+import signal
+import tempfile
+from collections import deque
+from gi.repository import Gio, GLib
+from repo_metadata import stale_repositories, refresh_script, handle_marker
+
+# Shell function used by install scripts to turn dnf output into
+# PROGRESS:<percent>:<message> and INFO:<message> lines
+DNF_OUTPUT_HANDLER = """# Function to handle dnf output
+handle_output() {
+    while IFS= read -r line; do
+        if [[ $line == *"Downloading"* ]]; then
+            echo "PROGRESS:30:$line"
+        elif [[ $line == *"Installing"* ]] || [[ $line == *"Upgrading"* ]]; then
+            echo "PROGRESS:60:$line"
+        elif [[ $line == *"Verifying"* ]]; then
+            echo "PROGRESS:80:$line"
+        elif [[ $line == *"Complete!"* ]]; then
+            echo "PROGRESS:100:Installation complete!"
+        else
+            echo "INFO:$line"
+        fi
+    done
+}
+"""
+
+# Commands started through pkexec run as root and cannot be signalled by the
+# app. Privileged scripts start with this watchdog instead: the app closes
+# their stdin to cancel them and the watchdog stops the command as root.
+CANCEL_WATCHDOG = """exec 3<&0 0</dev/null
+(
+    while read -r _ <&3; do :; done
+    # The whole process tree, collected before anything is signalled. The
+    # EXIT trap below must not stop the watchdog halfway through.
+    trap '' TERM
+    pids=$$ tree=
+    while [ -n "$pids" ]; do
+        tree="$tree ${pids//,/ }"
+        pids=$(pgrep -d , -P "$pids")
+    done
+    kill -TERM $tree
+) >/dev/null 2>&1 &
+cancel_watchdog=$!
+exec 3<&-
+trap 'kill -TERM $cancel_watchdog 2>/dev/null' EXIT
+"""
+
+# Seconds a cancelled unprivileged command gets to exit before it is killed
+KILL_DELAY = 5
+
+def build_dnf_script(commands, refresh=True, prepare="", refresh_repos=()):
+    # pipefail makes a failing dnf fail the script even though its output
+    # is piped through handle_output
+    script = "#!/bin/bash\nset -e\nset -o pipefail\n\n" + DNF_OUTPUT_HANDLER + "\n"
+    # prepare runs before the refresh, e.g. to import keys and add repo files
+    # whose ids are then passed as refresh_repos
+    if prepare:
+        script += prepare + "\n"
+    # Only repos whose metadata expired or whose .repo file changed are refreshed
+    stale = stale_repositories() if refresh else []
+    stale = sorted(set(stale) | set(refresh_repos))
+    if stale:
+        script += ('# Update package cache\n'
+                   'echo "PROGRESS:10:Refreshing package cache..."\n'
+                   + refresh_script(stale, output_handler="handle_output") + '\n')
+    script += 'echo "PROGRESS:20:Starting installation..."\n'
+    for command in commands:
+        script += f"{command} 2>&1 | handle_output\n"
+    return script
+
+def build_install_script(packages, refresh=True):
+    return build_dnf_script([f"dnf install -y {' '.join(packages)}"], refresh)
+
+class CommandRunner:
+    """Run a command with Gio.Subprocess and stream its output on the main loop.
+
+    on_line(line, is_error) receives every output line, on_progress(fraction, message)
+    receives PROGRESS:/INFO: lines (fraction is None for INFO) and on_finished(runner)
+    is called exactly once, after the command has exited and its output has been
+    read, or when it fails to start. Lines for which line_filter(line) returns True
+    are consumed by it and not reported. With cancel_stdin the command gets a stdin
+    pipe and cancel() closes it instead of signalling, see CANCEL_WATCHDOG.
+    """
+
+    def __init__(self, argv, on_line=None, on_progress=None, on_finished=None,
+                 timeout=None, merge_stderr=True, keep_lines=200, cancel_stdin=False,
+                 line_filter=None):
+        self.argv = argv
+        self.on_line = on_line
+        self.line_filter = line_filter
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.timeout = timeout
+        self.merge_stderr = merge_stderr
+        self.cancel_stdin = cancel_stdin
+
+        self.process = None
+        self.returncode = None
+        self.error = None
+        self.cancelled = False
+        self.timed_out = False
+        self.finished = False
+        # Only the tail of the output is kept, for error messages
+        self.output_lines = deque(maxlen=keep_lines)
+        self.error_lines = deque(maxlen=keep_lines)
+
+        self._pending = 0
+        self._timeout_id = None
+        self._kill_id = None
+
+    @property
+    def success(self):
+        return self.finished and self.returncode == 0 and not (self.cancelled or self.timed_out)
+
+    @property
+    def error_message(self):
+        if self.error:
+            return self.error
+        if self.timed_out:
+            return f"Command '{self.argv[0]}' timed out after {self.timeout} seconds"
+        if self.cancelled:
+            return f"Command '{self.argv[0]}' was cancelled"
+        return f"Command '{self.argv[0]}' returned non-zero exit status {self.returncode}."
+
+    def start(self):
+        flags = Gio.SubprocessFlags.STDOUT_PIPE
+        flags |= Gio.SubprocessFlags.STDERR_MERGE if self.merge_stderr else Gio.SubprocessFlags.STDERR_PIPE
+        if self.cancel_stdin:
+            flags |= Gio.SubprocessFlags.STDIN_PIPE
+        try:
+            self.process = Gio.Subprocess.new(self.argv, flags)
+        except GLib.Error as e:
+            self.error = f"Failed to run {self.argv[0]}: {e.message}"
+            # Report asynchronously so callers always get the callback after start()
+            GLib.idle_add(self._finish)
+            return self
+
+        self._pending = 1
+        self._read_lines(self.process.get_stdout_pipe(), False)
+        if not self.merge_stderr:
+            self._read_lines(self.process.get_stderr_pipe(), True)
+        self.process.wait_check_async(None, self._on_exited)
+
+        if self.timeout:
+            self._timeout_id = GLib.timeout_add_seconds(self.timeout, self._on_timeout)
+        return self
+
+    def cancel(self):
+        if self.finished or self.cancelled or self.timed_out:
+            return
+        self.cancelled = True
+        self._stop()
+
+    def _stop(self):
+        # The output is read until the command has really exited, on_finished
+        # is only called from there
+        if not self.process:
+            return
+        if self.cancel_stdin:
+            self._close_stdin()
+            # Still reaches pkexec while it waits for authorization, once the
+            # command runs as root the signal is refused
+            self.process.send_signal(signal.SIGTERM)
+        else:
+            self.process.send_signal(signal.SIGTERM)
+            self._kill_id = GLib.timeout_add_seconds(KILL_DELAY, self._on_kill_delay)
+
+    def _close_stdin(self):
+        stdin = self.process.get_stdin_pipe()
+        if stdin and not stdin.is_closed():
+            try:
+                stdin.close(None)
+            except GLib.Error as e:
+                print(f"Error closing stdin of {self.argv[0]}: {e.message}")
+
+    def _on_kill_delay(self):
+        self._kill_id = None
+        self.process.force_exit()
+        return False
+
+    def _on_timeout(self):
+        self._timeout_id = None
+        if not self.finished and not self.cancelled:
+            self.timed_out = True
+            self._stop()
+        return False
+
+    def _read_lines(self, pipe, is_error):
+        self._pending += 1
+        stream = Gio.DataInputStream.new(pipe)
+        stream.read_line_async(GLib.PRIORITY_DEFAULT, None, self._on_line_read, is_error)
+
+    def _on_line_read(self, stream, result, is_error):
+        # Lines are decoded here so invalid UTF-8 cannot end the output early
+        try:
+            data, _length = stream.read_line_finish(result)
+        except GLib.Error as e:
+            if not e.matches(Gio.io_error_quark(), Gio.IOErrorEnum.CANCELLED):
+                print(f"Error reading output of {self.argv[0]}: {e.message}")
+            data = None
+
+        if data is None:
+            self._done()
+            return
+
+        self._handle_line(bytes(data).decode('utf-8', 'replace').rstrip('\r'), is_error)
+        stream.read_line_async(GLib.PRIORITY_DEFAULT, None, self._on_line_read, is_error)
+
+    def _handle_line(self, line, is_error):
+        if self.finished:
+            return
+        if self.line_filter and self.line_filter(line):
+            return
+        (self.error_lines if is_error else self.output_lines).append(line)
+        if self.on_line:
+            self.on_line(line, is_error)
+        if self.on_progress:
+            if line.startswith("PROGRESS:"):
+                try:
+                    _, percent, message = line.split(":", 2)
+                    self.on_progress(float(percent) / 100, message)
+                except ValueError:
+                    self.on_progress(None, line)
+            elif line.startswith("INFO:"):
+                self.on_progress(None, line.split(":", 1)[1])
+
+    def _on_exited(self, process, result):
+        try:
+            process.wait_check_finish(result)
+        except GLib.Error:
+            # A non-zero exit status, read below
+            pass
+        if process.get_if_exited():
+            self.returncode = process.get_exit_status()
+        elif process.get_if_signaled():
+            self.returncode = -process.get_term_sig()
+        self._done()
+
+    def _done(self):
+        self._pending -= 1
+        if self._pending == 0:
+            self._finish()
+
+    def _finish(self):
+        if self.finished:
+            return False
+        self.finished = True
+        for source_id in (self._timeout_id, self._kill_id):
+            if source_id:
+                GLib.source_remove(source_id)
+        self._timeout_id = self._kill_id = None
+        if self.process and self.cancel_stdin:
+            # Lets the watchdog of a finished script exit
+            self._close_stdin()
+        if self.on_finished:
+            self.on_finished(self)
+        return False
+
+def run_command(argv, **kwargs):
+    return CommandRunner(argv, **kwargs).start()
+
+def with_cancel_watchdog(script_content):
+    # The watchdog goes right after the interpreter line
+    first, newline, rest = script_content.partition("\n")
+    if first.startswith("#!"):
+        return first + newline + CANCEL_WATCHDOG + rest
+    return CANCEL_WATCHDOG + script_content
+
+def run_privileged_script(script_content, on_finished=None, **kwargs):
+    # Write the script to a temporary file and run it as root through pkexec,
+    # the file is removed again once the command finishes
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.sh', delete=False) as script_file:
+        script_file.write(with_cancel_watchdog(script_content))
+        script_path = script_file.name
+    os.chmod(script_path, 0o755)
+
+    def finished(runner):
+        try:
+            os.unlink(script_path)
+        except OSError:
+            pass
+        if on_finished:
+            on_finished(runner)
+
+    return run_command(["pkexec", script_path], on_finished=finished, cancel_stdin=True, **kwargs)
+
+def run_dnf_script(script_content, **kwargs):
+    # Scripts from build_dnf_script() report refreshed repositories, those
+    # lines update the shared metadata freshness state
+    return run_privileged_script(script_content, line_filter=handle_marker, **kwargs)
+
+def run_privileged_command(argv, **kwargs):
+    # Runs argv as root through pkexec in a shell with the cancel watchdog
+    script = CANCEL_WATCHDOG + '"$@"\n'
+    return run_command(["pkexec", "/bin/bash", "-c", script, "bash"] + argv,
+                       cancel_stdin=True, **kwargs)
@@ -0,0 +1,117 @@
+import subprocess
+import threading
+from collections import deque
+
+# Seconds a check may take, the refreshing check downloads repo metadata
+CACHED_CHECK_TIMEOUT = 60
+REFRESH_CHECK_TIMEOUT = 600
+
+class UpdateCheckError(Exception):
+    pass
+
+def parse_upgrade_line(line):
+    # dnf5 check-upgrade lists one "name.arch  version  repo" line per upgrade
+    parts = line.split()
+    if len(parts) != 3 or '.' not in parts[0]:
+        return None
+    name, arch = parts[0].rsplit('.', 1)
+    return {
+        "name": name,
+        "arch": arch,
+        "version": parts[1],
+        "repo": parts[2],
+        "action": "upgrade"
+    }
+
+def iter_upgrades(cache_only=False):
+    # Yields each upgrade as soon as dnf prints it. Runs as the current user,
+    # no authorization is needed just to look.
+    cmd = ["dnf5", "check-upgrade", "--quiet"]
+    if cache_only:
+        cmd.append("--cacheonly")
+    timeout = CACHED_CHECK_TIMEOUT if cache_only else REFRESH_CHECK_TIMEOUT
+    try:
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+    except OSError as e:
+        raise UpdateCheckError(str(e))
+
+    # stderr is drained while stdout is parsed, a dnf printing many warnings
+    # would otherwise block on a full pipe
+    errors = deque(maxlen=50)
+    reader = threading.Thread(target=lambda: errors.extend(process.stderr))
+    reader.daemon = True
+    reader.start()
+
+    timed_out = threading.Event()
+
+    def on_timeout():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, on_timeout)
+    timer.start()
+    try:
+        for line in process.stdout:
+            line = line.strip()
+            if line.startswith("Obsoleting"):
+                break
+            record = parse_upgrade_line(line)
+            if record:
+                yield record
+        process.stdout.read()
+        process.wait()
+    finally:
+        timer.cancel()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        reader.join()
+
+    if timed_out.is_set():
+        raise UpdateCheckError(f"dnf5 check-upgrade timed out after {timeout} seconds")
+    # check-upgrade exits with 100 when upgrades are available
+    if process.returncode not in (0, 100):
+        raise UpdateCheckError("".join(errors).strip() or
+                               f"dnf5 check-upgrade returned exit status {process.returncode}")
+
+def check_upgrades(cache_only=False):
+    return list(iter_upgrades(cache_only))
+
+def check_updates_incremental(on_package, on_cached, on_refreshed, on_error, refresh=True):
+    # Report what the existing metadata already knows, then reconcile it with
+    # a check that refreshes expired metadata. Without refresh the cached
+    # answer is final unless it failed. Meant to run in a worker thread.
+    #   on_package(record)  for every upgrade as it is parsed, while streaming
+    #   on_cached(updates)  when the cached check finished, None if it failed
+    #   on_refreshed(updates, changed)  once the refreshed result is known
+    #   on_error(message, cached)  if the refreshing check failed
+    cached = []
+    try:
+        for record in iter_upgrades(cache_only=True):
+            cached.append(record)
+            on_package(record)
+    except UpdateCheckError as e:
+        # No usable cache yet, the refreshing check streams its results instead
+        print(f"Cached update check failed: {e}")
+        cached = None
+    on_cached(cached)
+    if not refresh and cached is not None:
+        on_refreshed(cached, False)
+        return
+
+    updates = []
+    try:
+        for record in iter_upgrades():
+            updates.append(record)
+            if cached is None:
+                on_package(record)
+    except UpdateCheckError as e:
+        on_error(str(e), cached)
+        return
+    on_refreshed(updates, cached is not None and updates != cached)
@@ -2,14 +2,46 @@ import gi
 import subprocess
 import threading
 import os
-import tempfile
+import re
 from pathlib import Path
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
 from gi.repository import Gtk, Adw, GLib, Gio
+from package_index import is_installed, get_package_index
+from command_runner import run_dnf_script, build_dnf_script
+from progress_channel import ProgressChannel
+from gpg_keys import resolve_keys
 
 ICONS_DIR = "/usr/share/tears-of-mandrake/images"
 
+def repository_ids(repo_content):
+    return re.findall(r'^\[([^\]]+)\]', repo_content, re.MULTILINE)
+
+def signing_key_urls(app):
+    # The explicit key_url and every gpgkey of the repo file, in order
+    urls = [app.key_url] if app.key_url else []
+    for value in re.findall(r'^gpgkey\s*=\s*(.+)$', app.repo_content, re.MULTILINE):
+        urls.extend(url for url in value.split() if url not in urls)
+    return urls
+
+def prepare_keys(apps):
+    # A gpg_keys.KeyPlan, see gpg_keys.resolve_keys
+    return resolve_keys([url for app in apps for url in signing_key_urls(app)])
+
+def build_provision_script(apps, key_plan):
+    # Keys, repo files, one refresh of the new repos and one install transaction
+    prepare = ""
+    key_script = key_plan.script()
+    if key_script:
+        prepare += 'echo "PROGRESS:5:Importing signing keys..."\n' + key_script
+    prepare += 'echo "PROGRESS:8:Adding repositories..."\n'
+    repo_ids = []
+    for app in apps:
+        prepare += f"cat > {app.repo_path} << 'EOF'\n{app.repo_content}\nEOF\n"
+        repo_ids.extend(repository_ids(app.repo_content))
+    packages = " ".join(app.package for app in apps)
+    return build_dnf_script([f"dnf install -y {packages}"], prepare=prepare, refresh_repos=repo_ids)
+
 class ExternalApplication:
     def __init__(self, name, package, binary_path, description, icon_name, repo_content, repo_path, key_url=None):
         self.name = name
@@ -24,6 +56,9 @@ class ExternalApplication:
 class DownloadManagerPage(Gtk.Box):
     def __init__(self):
         super().__init__(orientation=Gtk.Orientation.VERTICAL)
+
+        # Applications ticked for a batched install, keyed by package
+        self.selection = {}
         
         # Create scrolled window
         scrolled = Gtk.ScrolledWindow()
@@ -129,6 +164,23 @@ gpgkey=https://packages.microsoft.com/keys/microsoft.asc""",
         
         # Add applications to the window
         self.add_applications(content_box)
+
+        # Bar for installing the ticked applications together
+        self.selection_bar = Gtk.ActionBar()
+        self.selection_label = Gtk.Label()
+        self.selection_bar.pack_start(self.selection_label)
+
+        clear_button = Gtk.Button(label="Clear")
+        clear_button.connect("clicked", self.on_selection_clear_clicked)
+        self.selection_bar.pack_end(clear_button)
+
+        install_selected_button = Gtk.Button(label="Install Selected")
+        install_selected_button.add_css_class("suggested-action")
+        install_selected_button.connect("clicked", self.on_install_selected_clicked)
+        self.selection_bar.pack_end(install_selected_button)
+
+        self.selection_bar.set_revealed(False)
+        self.append(self.selection_bar)
     
     def add_applications(self, content_box):
         # Add description label
@@ -178,19 +230,30 @@ gpgkey=https://packages.microsoft.com/keys/microsoft.asc""",
             button_box.append(progress_label)
             
             # Check if app is installed
-            is_installed = os.path.exists(app.binary_path) if app.binary_path else False
+            installed = is_installed(app.package)
             
             # Add action button
-            if is_installed:
+            row.select_check = None
+            if installed:
                 button = Gtk.Button(label="Launch")
                 button.add_css_class("success")
                 button.connect("clicked", self.on_launch_clicked, app)
             else:
                 button = Gtk.Button(label="Install")
                 button.add_css_class("suggested-action")
-                button.connect("clicked", self.on_install_clicked, app, progress_label)
+                button.connect("clicked", self.on_install_clicked, app, row)
+
+                # Tick to install several applications in one go
+                select_check = Gtk.CheckButton()
+                select_check.set_tooltip_text("Add to install selection")
+                select_check.set_valign(Gtk.Align.CENTER)
+                select_check.connect("toggled", self.on_select_toggled, app, row)
+                button_box.append(select_check)
+                row.select_check = select_check
             
             button_box.append(button)
+            row.button = button
+            row.progress_label = progress_label
             row.add_suffix(button_box)
             group.add(row)
         
@@ -202,14 +265,52 @@ gpgkey=https://packages.microsoft.com/keys/microsoft.asc""",
         except Exception as e:
             self.show_error_dialog(f"Error launching {app.name}", str(e))
     
-    def on_install_clicked(self, button, app, progress_label):
-        button.set_sensitive(False)
-        button.set_label("Installing...")
-        
+    def on_select_toggled(self, check, app, row):
+        if check.get_active():
+            self.selection[app.package] = (app, row)
+        else:
+            self.selection.pop(app.package, None)
+        self.update_selection_bar()
+
+    def update_selection_bar(self):
+        count = len(self.selection)
+        self.selection_label.set_label(f"{count} application{'s' if count != 1 else ''} selected")
+        self.selection_bar.set_revealed(count > 0)
+
+    def on_selection_clear_clicked(self, button):
+        for app, row in list(self.selection.values()):
+            row.select_check.set_active(False)
+
+    def on_install_selected_clicked(self, button):
+        entries = list(self.selection.values())
+        if entries:
+            self.install_applications(entries)
+
+    def on_install_clicked(self, button, app, row):
+        self.install_applications([(app, row)])
+
+    def install_applications(self, entries):
+        # Every key, repo file and package goes through one pkexec script with a
+        # single metadata refresh and a single dnf transaction
+        apps = [app for app, row in entries]
+        for app, row in entries:
+            self.selection.pop(app.package, None)
+            row.button.set_sensitive(False)
+            row.button.set_label("Installing...")
+            if row.select_check:
+                row.select_check.set_active(False)
+                row.select_check.set_sensitive(False)
+        self.update_selection_bar()
+
+        if len(apps) == 1:
+            title = f"Installing {apps[0].name}"
+        else:
+            title = f"Installing {len(apps)} Applications"
+
         # Create progress dialog
         dialog = Adw.MessageDialog.new(
             self.get_root(),
-            f"Installing {app.name}",
+            title,
             "Please wait while the application is being installed..."
         )
         dialog.add_response("cancel", "Cancel")
@@ -236,89 +337,93 @@ gpgkey=https://packages.microsoft.com/keys/microsoft.asc""",
         dialog.set_extra_child(progress_box)
         dialog.present()
         
-        def update_progress(fraction, text):
+        def update_progress(fraction, text, lines):
             progress_bar.set_fraction(fraction)
-            status_label.set_markup(f"<span size='small'>{text}</span>")
-        
-        def install_thread():
+            status_label.set_markup(f"<span size='small'>{GLib.markup_escape_text(text or '')}</span>")
+
+        channel = ProgressChannel(dialog, update_progress)
+        channel.update(0.02, "Checking signing keys...")
+        state = {"runner": None, "cancelled": False}
+
+        def on_progress(fraction, message):
+            channel.update(fraction, message)
+
+        def finished(runner):
+            channel.close()
+            dialog.close()
+            if runner.success:
+                get_package_index().invalidate()
+            # dnf installs all packages or none of them
+            for app, row in entries:
+                self.on_install_complete(row, app, runner.success)
+            if not runner.success and not runner.cancelled:
+                names = ", ".join(app.name for app in apps)
+                self.show_error_dialog(f"Error installing {names}", runner.error_message)
+
+        def start(key_plan):
+            if state["cancelled"]:
+                # Cancelled while keys were checked, nothing has been run yet
+                channel.close()
+                for app, row in entries:
+                    self.on_install_complete(row, app, False)
+                return False
+            state["runner"] = run_dnf_script(
+                build_provision_script(apps, key_plan),
+                on_progress=on_progress,
+                on_finished=finished
+            )
+            return False
+
+        def on_response(dialog, response):
+            if response != "cancel":
+                return
+            state["cancelled"] = True
+            if state["runner"]:
+                state["runner"].cancel()
+
+        dialog.connect("response", on_response)
+
+        def keys_failed(message):
+            # Nothing has been run yet, the rows can be installed again
+            channel.close()
+            dialog.close()
+            for app, row in entries:
+                self.on_install_complete(row, app, False)
+            if not state["cancelled"]:
+                self.show_error_dialog("Error checking signing keys", message)
+            return False
+
+        def check_keys():
+            # The keyring lookup and any key download run off the main loop
             try:
-                steps = []
-                if app.key_url:
-                    steps.append(("Importing signing key...", 0.2))
-                steps.extend([
-                    ("Adding repository...", 0.4),
-                    ("Refreshing package cache...", 0.6),
-                    ("Installing package...", 0.8),
-                    ("Finalizing installation...", 1.0)
-                ])
-                
-                current_step = 0
-                
-                # Create a temporary script with all commands
-                script_content = "#!/bin/bash\n\n"
-                
-                # Add key import if needed
-                if app.key_url:
-                    GLib.idle_add(update_progress, steps[current_step][1], steps[current_step][0])
-                    script_content += f"rpm --import {app.key_url}\n"
-                    current_step += 1
-                
-                # Add repo file creation
-                GLib.idle_add(update_progress, steps[current_step][1], steps[current_step][0])
-                script_content += f"cat > {app.repo_path} << 'EOF'\n{app.repo_content}\nEOF\n"
-                current_step += 1
-                
-                # Add dnf cache refresh
-                GLib.idle_add(update_progress, steps[current_step][1], steps[current_step][0])
-                script_content += "dnf makecache\n"
-                current_step += 1
-                
-                # Add package installation
-                GLib.idle_add(update_progress, steps[current_step][1], steps[current_step][0])
-                script_content += f"dnf install -y {app.package}\n"
-                current_step += 1
-                
-                # Create temporary script file
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.sh', delete=False) as script_file:
-                    script_file.write(script_content)
-                    script_path = script_file.name
-                
-                # Make script executable
-                os.chmod(script_path, 0o755)
-                
-                # Execute script with pkexec
-                subprocess.run(["pkexec", script_path], check=True)
-                
-                # Remove temporary script
-                os.unlink(script_path)
-                
-                # Final step
-                GLib.idle_add(update_progress, steps[current_step][1], steps[current_step][0])
-                
-                GLib.idle_add(dialog.close)
-                GLib.idle_add(self.on_install_complete, button, app, True, progress_label)
+                key_plan = prepare_keys(apps)
             except Exception as e:
-                GLib.idle_add(dialog.close)
-                GLib.idle_add(self.on_install_complete, button, app, False, progress_label, str(e))
-        
-        thread = threading.Thread(target=install_thread)
+                print(f"Error preparing signing keys: {e!r}")
+                GLib.idle_add(keys_failed, str(e) or e.__class__.__name__)
+                return
+            GLib.idle_add(start, key_plan)
+
+        thread = threading.Thread(target=check_keys)
         thread.daemon = True
         thread.start()
     
-    def on_install_complete(self, button, app, success, progress_label, error_message=None):
+    def on_install_complete(self, row, app, success):
+        button = row.button
+        row.progress_label.set_visible(False)
+        button.set_sensitive(True)
         if success:
-            progress_label.set_visible(False)
+            if row.select_check:
+                row.select_check.get_parent().remove(row.select_check)
+                row.select_check = None
             button.set_label("Launch")
-            button.set_sensitive(True)
             button.remove_css_class("suggested-action")
             button.add_css_class("success")
             button.disconnect_by_func(self.on_install_clicked)
             button.connect("clicked", self.on_launch_clicked, app)
         else:
-            progress_label.set_visible(False)
             button.set_label("Install")
-            button.set_sensitive(True)
-            self.show_error_dialog(f"Error installing {app.name}", error_message)
+            if row.select_check:
+                row.select_check.set_sensitive(True)
     
     def show_error_dialog(self, title, message):
         dialog = Adw.MessageDialog.new(
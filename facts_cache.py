@@ -0,0 +1,66 @@
+import os
+import json
+
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+                         'tears-of-mandrake')
+FACTS_FILE = os.path.join(CACHE_DIR, 'facts.json')
+
+# The rpm database changes whenever a package is installed, removed or updated
+RPMDB_PATHS = ['/var/lib/rpm/rpmdb.sqlite', '/var/lib/rpm/Packages', '/var/lib/rpm']
+
+def get_boot_id():
+    try:
+        with open('/proc/sys/kernel/random/boot_id', 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def get_package_stamp():
+    # Modification time of the rpm database stands in for the installed
+    # package versions, reading it does not spawn any process
+    for path in RPMDB_PATHS:
+        try:
+            return int(os.stat(path).st_mtime)
+        except OSError:
+            continue
+    return None
+
+def get_cache_key():
+    return {'boot_id': get_boot_id(), 'packages': get_package_stamp()}
+
+def _read_cache():
+    try:
+        with open(FACTS_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_cache(data):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = FACTS_FILE + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, FACTS_FILE)
+    except OSError as e:
+        print(f"Error writing facts cache: {e}")
+
+def load_facts(section):
+    key = get_cache_key()
+    if key['boot_id'] is None:
+        return {}
+    data = _read_cache()
+    if data.get('key') != key:
+        return {}
+    return data.get('sections', {}).get(section, {})
+
+def update_facts(section, facts):
+    key = get_cache_key()
+    if key['boot_id'] is None:
+        return
+    data = _read_cache()
+    if data.get('key') != key:
+        # Facts from a previous boot or package set are discarded
+        data = {'key': key, 'sections': {}}
+    data.setdefault('sections', {}).setdefault(section, {}).update(facts)
+    _write_cache(data)
@@ -0,0 +1,270 @@
+import os
+import json
+import time
+import shlex
+import stat
+import base64
+import hashlib
+import subprocess
+import http.client
+import urllib.request
+
+# OpenPGP packet tag of a primary public key
+PUBLIC_KEY_TAG = 6
+
+# Downloaded keys are kept as <FINGERPRINT>.asc, the index maps each key URL
+# to the fingerprints it served. rpm imports these files as root, so the cache
+# is owned by root and only written by the privileged install script.
+KEY_CACHE_DIR = '/var/cache/tears-of-mandrake/gpg-keys'
+KEY_INDEX_FILE = os.path.join(KEY_CACHE_DIR, 'index.json')
+
+# Cached keys older than this are fetched again when the network allows it,
+# vendors rotate their signing keys from time to time
+KEY_MAX_AGE = 30 * 24 * 60 * 60
+
+def dearmor(data):
+    # Returns the binary packets of every armored block, or data unchanged if
+    # it is not armored
+    text = data.decode('ascii', 'replace') if isinstance(data, bytes) else data
+    if "-----BEGIN PGP" not in text:
+        return data if isinstance(data, bytes) else text.encode('latin-1')
+    packets = b""
+    body = None
+    in_headers = False
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("-----BEGIN PGP"):
+            body, in_headers = [], True
+        elif line.startswith("-----END PGP"):
+            if body is not None:
+                packets += base64.b64decode("".join(body))
+            body = None
+        elif body is None or line.startswith("="):
+            continue  # Outside a block, or the CRC24 checksum
+        elif in_headers and (not line or ":" in line):
+            # Armor headers end at the first empty line
+            in_headers = bool(line)
+        else:
+            in_headers = False
+            body.append(line)
+    return packets
+
+def iter_packets(data):
+    # Yields (tag, body, raw packet including its header)
+    position = 0
+    while position < len(data):
+        start = position
+        header = data[position]
+        position += 1
+        if not header & 0x80:
+            raise ValueError("Not an OpenPGP packet")
+        if header & 0x40:
+            tag = header & 0x3f
+            first = data[position]
+            position += 1
+            if first < 192:
+                length = first
+            elif first < 224:
+                length = ((first - 192) << 8) + data[position] + 192
+                position += 1
+            elif first == 255:
+                length = int.from_bytes(data[position:position + 4], 'big')
+                position += 4
+            else:
+                raise ValueError("Partial body lengths are not used in keys")
+        else:
+            tag = (header >> 2) & 0x0f
+            length_type = header & 0x03
+            if length_type == 3:
+                length = len(data) - position
+            else:
+                size = 1 << length_type
+                length = int.from_bytes(data[position:position + size], 'big')
+                position += size
+        yield tag, data[position:position + length], data[start:position + length]
+        position += length
+
+def fingerprint(packet):
+    # Fingerprint of a public key packet body, as upper case hex
+    version = packet[0] if packet else None
+    if version == 4:
+        return hashlib.sha1(b"\x99" + len(packet).to_bytes(2, 'big') + packet).hexdigest().upper()
+    if version == 5:
+        return hashlib.sha256(b"\x9a" + len(packet).to_bytes(4, 'big') + packet).hexdigest().upper()
+    if version == 6:
+        return hashlib.sha256(b"\x9b" + len(packet).to_bytes(4, 'big') + packet).hexdigest().upper()
+    return None
+
+def key_fingerprints(data):
+    # Fingerprints of the primary keys in an armored or binary key file
+    try:
+        return [fp for tag, body, raw in iter_packets(dearmor(data))
+                if tag == PUBLIC_KEY_TAG and (fp := fingerprint(body))]
+    except (ValueError, IndexError) as e:
+        print(f"Error parsing key: {e}")
+        return []
+
+def imported_key_ids():
+    # rpm stores every imported key as a gpg-pubkey package whose version is the
+    # key id, the last 8 hex digits of the fingerprint (the whole fingerprint
+    # on newer rpm)
+    try:
+        result = subprocess.run(
+            ["rpm", "-q", "gpg-pubkey", "--qf", "%{VERSION}\n"],
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"Error reading rpm keyring: {e}")
+        return set()
+    # Exit status 1 only means no key is imported yet
+    return {line.strip().lower() for line in result.stdout.splitlines()
+            if line.strip() and all(c in "0123456789abcdefABCDEF" for c in line.strip())}
+
+def is_imported(fingerprints, key_ids):
+    # True if every key of a file is already in the keyring
+    return bool(fingerprints) and all(
+        any(fp.lower().endswith(key_id) for key_id in key_ids) for fp in fingerprints)
+
+def split_keys(data):
+    # [(fingerprint, packets)] with each primary key and the user ids,
+    # signatures and subkeys that follow it
+    keys = []
+    for tag, body, raw in iter_packets(dearmor(data)):
+        if tag == PUBLIC_KEY_TAG:
+            keys.append([fingerprint(body), raw])
+        elif keys:
+            keys[-1][1] += raw
+    return [(fp, packets) for fp, packets in keys if fp]
+
+def crc24(data):
+    crc = 0xB704CE
+    for byte in data:
+        crc ^= byte << 16
+        for _ in range(8):
+            crc <<= 1
+            if crc & 0x1000000:
+                crc ^= 0x1864CFB
+    return crc & 0xFFFFFF
+
+def armor(packets):
+    encoded = base64.b64encode(packets).decode('ascii')
+    lines = [encoded[i:i + 64] for i in range(0, len(encoded), 64)]
+    checksum = base64.b64encode(crc24(packets).to_bytes(3, 'big')).decode('ascii')
+    return ("-----BEGIN PGP PUBLIC KEY BLOCK-----\n\n" + "\n".join(lines)
+            + f"\n={checksum}\n-----END PGP PUBLIC KEY BLOCK-----\n")
+
+def fetch_key(url, timeout=30):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read()
+
+# Key cache
+
+def cached_key_path(fp):
+    return os.path.join(KEY_CACHE_DIR, f"{fp}.asc")
+
+def _trusted(path):
+    # Only root may have written a cache entry, anything else is ignored
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    return (not stat.S_ISLNK(info.st_mode) and info.st_uid == 0
+            and not info.st_mode & (stat.S_IWGRP | stat.S_IWOTH))
+
+def _load_index():
+    if not (_trusted(KEY_CACHE_DIR) and _trusted(KEY_INDEX_FILE)):
+        return {}
+    try:
+        with open(KEY_INDEX_FILE, 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return index if isinstance(index, dict) else {}
+
+def cached_fingerprints(url, index=None):
+    # Fingerprints a URL served last time, if all of its keys are still cached
+    entry = (_load_index() if index is None else index).get(url)
+    if not isinstance(entry, dict):
+        return None
+    fingerprints = entry.get('fingerprints') or []
+    if fingerprints and all(_trusted(cached_key_path(fp)) for fp in fingerprints):
+        return fingerprints
+    return None
+
+def split_key_file(data):
+    # {fingerprint: armored key} for every key of a downloaded file
+    try:
+        return {fp: armor(packets) for fp, packets in split_keys(data)}
+    except (ValueError, IndexError) as e:
+        print(f"Error parsing key: {e}")
+        return {}
+
+class KeyPlan:
+    """What the install script does to get the signing keys into the keyring.
+
+    imports are the arguments for `rpm --import`, new_keys maps fingerprints to
+    downloaded keys that the script first stores in the cache and index is the
+    cache index to write along with them, None if it is unchanged.
+    """
+
+    def __init__(self):
+        self.imports = []
+        self.new_keys = {}
+        self.index = None
+
+    def script(self):
+        # Shell lines, run as root: store the new keys, then import
+        lines = []
+        if self.new_keys or self.index is not None:
+            lines.append(f"install -d -m 755 {shlex.quote(KEY_CACHE_DIR)}")
+        for fp, key in self.new_keys.items():
+            path = shlex.quote(cached_key_path(fp))
+            lines.append(f"cat > {path} << 'KEY_EOF'\n{key.rstrip()}\nKEY_EOF")
+            lines.append(f"chmod 644 {path}")
+        if self.index is not None:
+            path = shlex.quote(KEY_INDEX_FILE)
+            lines.append(f"cat > {path} << 'KEY_EOF'\n{json.dumps(self.index)}\nKEY_EOF")
+            lines.append(f"chmod 644 {path}")
+        if self.imports:
+            lines.append("rpm --import " + " ".join(shlex.quote(key) for key in self.imports))
+        return "\n".join(lines) + "\n" if lines else ""
+
+def resolve_keys(urls, offline=False, now=None):
+    """Decide how the signing keys behind urls get into the rpm keyring.
+
+    Keys come from the root-owned cache, or are downloaded here and stored by
+    the install script, or the URL itself is handed to rpm when a key is neither
+    cached nor downloadable. Keys whose fingerprints are already in the keyring
+    are left out. The cache is consulted before the network, so repeat installs
+    need no download and work offline.
+    """
+    now = now or time.time()
+    key_ids = imported_key_ids()
+    index = _load_index()
+    plan = KeyPlan()
+
+    for url in dict.fromkeys(urls):
+        fingerprints = cached_fingerprints(url, index)
+        fresh = fingerprints and now - index[url].get('fetched', 0) < KEY_MAX_AGE
+        if fingerprints and is_imported(fingerprints, key_ids):
+            continue
+        if not fresh and not offline:
+            try:
+                keys = split_key_file(fetch_key(url))
+            except (OSError, ValueError, http.client.HTTPException) as e:
+                print(f"Error fetching key {url}: {e}")
+                keys = {}
+            if keys:
+                plan.new_keys.update(keys)
+                fingerprints = list(keys)
+                index[url] = {'fingerprints': fingerprints, 'fetched': now}
+                plan.index = index
+        if not fingerprints:
+            # Let rpm try the download itself
+            plan.imports.append(url)
+        else:
+            plan.imports.extend(cached_key_path(fp) for fp in fingerprints
+                                if not is_imported([fp], key_ids))
+    return plan
@@ -1,16 +1,19 @@
 #!/usr/bin/env python3
 import gi
 import subprocess
-import threading
-import tempfile
-import os
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
 from gi.repository import Gtk, Adw, GLib
+from progress_channel import ProgressChannel
+from command_runner import run_dnf_script, build_install_script, build_dnf_script
+from package_index import is_installed
 from pathlib import Path
 from typing import Optional
 import re
 
+# Package that ships the system-config-printer tool, checked and installed
+PRINTER_CONFIG_PACKAGE = "system-config-printer-gui"
+
 class HardwarePage(Gtk.Box):
     def __init__(self, parent):
         super().__init__(orientation=Gtk.Orientation.VERTICAL)
@@ -188,89 +191,30 @@ class HardwarePage(Gtk.Box):
         )
         progress_dialog.present()
 
-        def install_thread():
-            try:
-                # Create temporary script file
-                script_content = """#!/bin/bash
-set -e
-
-# Function to handle dnf output
-handle_output() {
-    while IFS= read -r line; do
-        if [[ $line == *"Downloading"* ]]; then
-            echo "PROGRESS:30:$line"
-        elif [[ $line == *"Installing"* ]] || [[ $line == *"Upgrading"* ]]; then
-            echo "PROGRESS:60:$line"
-        elif [[ $line == *"Verifying"* ]]; then
-            echo "PROGRESS:80:$line"
-        elif [[ $line == *"Complete!"* ]]; then
-            echo "PROGRESS:100:Installation complete!"
-        else
-            echo "INFO:$line"
-        fi
-    done
-}
-
-# Update package cache
-echo "PROGRESS:10:Refreshing package cache..."
-dnf makecache 2>&1 | handle_output
-
-# Install package
-echo "PROGRESS:20:Starting installation..."
-dnf install -y system-config-printer-gui 2>&1 | handle_output
-"""
-                
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.sh', delete=False) as script_file:
-                    script_file.write(script_content)
-                    script_path = script_file.name
-                
-                # Make script executable
-                os.chmod(script_path, 0o755)
-                
-                # Execute script with pkexec and capture output
-                process = subprocess.Popen(
-                    ["pkexec", script_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True,
-                    bufsize=1
-                )
+        def show_progress(fraction, message, lines):
+            if message is None:
+                return
+            if fraction is not None:
+                message = f"{message}\n{int(fraction * 100)}%"
+            progress_dialog.set_body(message)
 
-                # Process output in real-time
-                while True:
-                    line = process.stdout.readline()
-                    if not line and process.poll() is not None:
-                        break
-                        
-                    if line.startswith("PROGRESS:"):
-                        _, percent, message = line.strip().split(":", 2)
-                        GLib.idle_add(progress_dialog.set_body, message)
-                        GLib.idle_add(progress_dialog.set_subtitle, f"{percent}%")
-                    elif line.startswith("INFO:"):
-                        _, message = line.strip().split(":", 1)
-                        GLib.idle_add(progress_dialog.set_body, message)
-                
-                # Check if process was successful
-                if process.returncode != 0:
-                    raise subprocess.CalledProcessError(process.returncode, "pkexec")
-                
-                # Remove temporary script
-                os.unlink(script_path)
-                
+        # Progress is applied at most once per frame
+        channel = ProgressChannel(progress_dialog, show_progress)
+
+        def on_finished(runner):
+            channel.close()
+            progress_dialog.close()
+            if runner.success:
                 # Launch printer configuration tool
-                GLib.idle_add(lambda: subprocess.Popen(['system-config-printer']))
-                GLib.idle_add(progress_dialog.close)
-                
-            except Exception as e:
-                GLib.idle_add(progress_dialog.close)
-                GLib.idle_add(lambda: self.show_result_dialog(
+                subprocess.Popen(['system-config-printer'])
+            else:
+                self.show_result_dialog(
                     False,
-                    f"Failed to install printer configuration tool: {str(e)}"
-                ))
-        
-        thread = threading.Thread(target=install_thread)
-        thread.daemon = True
-        thread.start()
+                    f"Failed to install printer configuration tool: {runner.error_message}"
+                )
+
+        run_dnf_script(build_install_script([PRINTER_CONFIG_PACKAGE]),
+                       on_progress=channel.update, on_finished=on_finished)
 
     def update_progress_dialog(self, dialog, message):
         dialog.set_body(message)
@@ -396,10 +340,9 @@ class PrintersPage(Gtk.Box):
             self.check_and_install_package("task-printing", "printer")
 
     def run_printer_config(self):
-        try:
-            subprocess.run(['which', 'system-config-printer'], check=True)
+        if is_installed(PRINTER_CONFIG_PACKAGE):
             subprocess.Popen(['system-config-printer'])
-        except subprocess.CalledProcessError:
+        else:
             dialog = Adw.MessageDialog.new(
                 self.get_root(),
                 "Install Printer Configuration Tool",
@@ -448,88 +391,24 @@ class PrintersPage(Gtk.Box):
                     progress_bar.set_fraction(fraction)
                 status_label.set_markup(f"<span size='small'>{text}</span>")
 
-            def install_thread():
-                try:
-                    # Create temporary script file
-                    script_content = """#!/bin/bash
-set -e
-
-# Function to handle dnf output
-handle_output() {
-    while IFS= read -r line; do
-        if [[ $line == *"Downloading"* ]]; then
-            echo "PROGRESS:30:$line"
-        elif [[ $line == *"Installing"* ]] || [[ $line == *"Upgrading"* ]]; then
-            echo "PROGRESS:60:$line"
-        elif [[ $line == *"Verifying"* ]]; then
-            echo "PROGRESS:80:$line"
-        elif [[ $line == *"Complete!"* ]]; then
-            echo "PROGRESS:100:Installation complete!"
-        else
-            echo "INFO:$line"
-        fi
-    done
-}
-
-# Update package cache
-echo "PROGRESS:10:Refreshing package cache..."
-dnf makecache 2>&1 | handle_output
-
-# Install package
-echo "PROGRESS:20:Starting installation..."
-dnf install -y system-config-printer-gui 2>&1 | handle_output
-"""
-                    
-                    with tempfile.NamedTemporaryFile(mode='w', suffix='.sh', delete=False) as script_file:
-                        script_file.write(script_content)
-                        script_path = script_file.name
-                    
-                    # Make script executable
-                    os.chmod(script_path, 0o755)
-                    
-                    # Execute script with pkexec and capture output
-                    process = subprocess.Popen(
-                        ["pkexec", script_path],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.STDOUT,
-                        universal_newlines=True,
-                        bufsize=1
-                    )
+            # Progress is applied at most once per frame
+            channel = ProgressChannel(progress_dialog, lambda fraction, text, lines: update_progress(fraction, text))
 
-                    # Process output in real-time
-                    while True:
-                        line = process.stdout.readline()
-                        if not line and process.poll() is not None:
-                            break
-                            
-                        if line.startswith("PROGRESS:"):
-                            _, percent, message = line.strip().split(":", 2)
-                            GLib.idle_add(update_progress, float(percent)/100, message)
-                        elif line.startswith("INFO:"):
-                            _, message = line.strip().split(":", 1)
-                            GLib.idle_add(update_progress, None, message)
-                    
-                    # Check if process was successful
-                    if process.returncode != 0:
-                        raise subprocess.CalledProcessError(process.returncode, "pkexec")
-                    
-                    # Remove temporary script
-                    os.unlink(script_path)
-                    
+            def on_finished(runner):
+                channel.close()
+                progress_dialog.close()
+                if runner.success:
                     # Launch printer configuration tool
-                    GLib.idle_add(lambda: subprocess.Popen(['system-config-printer']))
-                    GLib.idle_add(progress_dialog.close)
-                    
-                except Exception as e:
-                    GLib.idle_add(progress_dialog.close)
-                    GLib.idle_add(lambda: self.show_error_dialog(
+                    subprocess.Popen(['system-config-printer'])
+                else:
+                    self.show_error_dialog(
                         "Installation Error",
-                        f"Failed to install printer configuration tool.\nError: {str(e)}"
-                    ))
-            
-            thread = threading.Thread(target=install_thread)
-            thread.daemon = True
-            thread.start()
+                        f"Failed to install printer configuration tool.\nError: {runner.error_message}"
+                    )
+
+            runner = run_dnf_script(build_install_script([PRINTER_CONFIG_PACKAGE]),
+                                    on_progress=channel.update, on_finished=on_finished)
+            progress_dialog.connect("response", lambda d, r: runner.cancel() if r == "cancel" else None)
 
     def handle_hplip(self):
         hplip_path = Path("/usr/bin/hp-toolbox")
@@ -542,8 +421,7 @@ dnf install -y system-config-printer-gui 2>&1 | handle_output
             self.check_and_install_package("hplip-gui", "HPLIP")
 
     def check_and_install_package(self, package_name: str, display_name: str):
-        try:
-            subprocess.run(["rpm", "-q", package_name], check=True)
+        if is_installed(package_name):
             if package_name == "hplip-gui":
                 subprocess.Popen(["/usr/bin/hp-toolbox"])
             else:
@@ -554,7 +432,7 @@ dnf install -y system-config-printer-gui 2>&1 | handle_output
                 )
                 dialog.add_response("ok", "OK")
                 dialog.present()
-        except subprocess.CalledProcessError:
+        else:
             dialog = Adw.MessageDialog.new(
                 self.get_root(),
                 f"Install {display_name}",
@@ -603,91 +481,27 @@ dnf install -y system-config-printer-gui 2>&1 | handle_output
                     progress_bar.set_fraction(fraction)
                 status_label.set_markup(f"<span size='small'>{text}</span>")
 
-            def install_thread():
-                try:
-                    # Create temporary script file
-                    script_content = f"""#!/bin/bash
-set -e
-
-# Function to handle dnf output
-handle_output() {{
-    while IFS= read -r line; do
-        if [[ $line == *"Downloading"* ]]; then
-            echo "PROGRESS:30:$line"
-        elif [[ $line == *"Installing"* ]] || [[ $line == *"Upgrading"* ]]; then
-            echo "PROGRESS:60:$line"
-        elif [[ $line == *"Verifying"* ]]; then
-            echo "PROGRESS:80:$line"
-        elif [[ $line == *"Complete!"* ]]; then
-            echo "PROGRESS:100:Installation complete!"
-        else
-            echo "INFO:$line"
-        fi
-    done
-}}
-
-# Update package cache
-echo "PROGRESS:10:Refreshing package cache..."
-dnf makecache 2>&1 | handle_output
-
-# Install package
-echo "PROGRESS:20:Starting installation..."
-dnf install -y {package_name} 2>&1 | handle_output
-"""
-                    
-                    with tempfile.NamedTemporaryFile(mode='w', suffix='.sh', delete=False) as script_file:
-                        script_file.write(script_content)
-                        script_path = script_file.name
-                    
-                    # Make script executable
-                    os.chmod(script_path, 0o755)
-                    
-                    # Execute script with pkexec and capture output
-                    process = subprocess.Popen(
-                        ["pkexec", script_path],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.STDOUT,
-                        universal_newlines=True,
-                        bufsize=1
-                    )
+            # Progress is applied at most once per frame
+            channel = ProgressChannel(progress_dialog, lambda fraction, text, lines: update_progress(fraction, text))
 
-                    # Process output in real-time
-                    while True:
-                        line = process.stdout.readline()
-                        if not line and process.poll() is not None:
-                            break
-                            
-                        if line.startswith("PROGRESS:"):
-                            _, percent, message = line.strip().split(":", 2)
-                            GLib.idle_add(update_progress, float(percent)/100, message)
-                        elif line.startswith("INFO:"):
-                            _, message = line.strip().split(":", 1)
-                            GLib.idle_add(update_progress, None, message)
-                    
-                    # Check if process was successful
-                    if process.returncode != 0:
-                        raise subprocess.CalledProcessError(process.returncode, "pkexec")
-                    
-                    # Remove temporary script
-                    os.unlink(script_path)
-                    
+            def on_finished(runner):
+                channel.close()
+                progress_dialog.close()
+                if runner.success:
                     # Launch HPLIP if it was installed
                     if package_name == "hplip-gui":
-                        GLib.idle_add(lambda: subprocess.Popen(["/usr/bin/hp-toolbox"]))
+                        subprocess.Popen(["/usr/bin/hp-toolbox"])
                     else:
-                        GLib.idle_add(lambda: self.show_success_dialog(f"{display_name} drivers have been successfully installed!"))
-                    GLib.idle_add(progress_dialog.close)
-                    
-                except Exception as e:
-                    GLib.idle_add(progress_dialog.close)
-                    GLib.idle_add(lambda: self.show_error_dialog(
+                        self.show_success_dialog(f"{display_name} drivers have been successfully installed!")
+                else:
+                    self.show_error_dialog(
                         "Installation Error",
-                        f"Failed to install {display_name}.\nError: {str(e)}"
-                    ))
-            
-            thread = threading.Thread(target=install_thread)
-            thread.daemon = True
-            thread.start()
+                        f"Failed to install {display_name}.\nError: {runner.error_message}"
+                    )
+
+            runner = run_dnf_script(build_install_script([package_name]),
+                                    on_progress=channel.update, on_finished=on_finished)
+            progress_dialog.connect("response", lambda d, r: runner.cancel() if r == "cancel" else None)
 
     def show_error_dialog(self, title, message):
         dialog = Adw.MessageDialog.new(
@@ -1339,91 +1153,30 @@ class DiskPage(Gtk.Box):
         )
         progress_dialog.present()
 
-        def install_thread():
-            try:
-                # Create temporary script file
-                script_content = f"""#!/bin/bash
-set -e
-
-# Function to handle dnf output
-handle_output() {{
-    while IFS= read -r line; do
-        if [[ $line == *"Downloading"* ]]; then
-            echo "PROGRESS:30:$line"
-        elif [[ $line == *"Installing"* ]] || [[ $line == *"Upgrading"* ]]; then
-            echo "PROGRESS:60:$line"
-        elif [[ $line == *"Verifying"* ]]; then
-            echo "PROGRESS:80:$line"
-        elif [[ $line == *"Complete!"* ]]; then
-            echo "PROGRESS:100:Installation complete!"
-        else
-            echo "INFO:$line"
-        fi
-    done
-}}
-
-# Update package cache
-echo "PROGRESS:10:Refreshing package cache..."
-dnf makecache 2>&1 | handle_output
-
-# Install package
-echo "PROGRESS:20:Starting installation..."
-dnf install -y {package_name} 2>&1 | handle_output
-"""
-                
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.sh', delete=False) as script_file:
-                    script_file.write(script_content)
-                    script_path = script_file.name
-                
-                # Make script executable
-                os.chmod(script_path, 0o755)
-                
-                # Execute script with pkexec and capture output
-                process = subprocess.Popen(
-                    ["pkexec", script_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True,
-                    bufsize=1
-                )
+        def show_progress(fraction, message, lines):
+            if message is None:
+                return
+            if fraction is not None:
+                message = f"{message}\n{int(fraction * 100)}%"
+            progress_dialog.set_body(message)
 
-                # Process output in real-time
-                while True:
-                    line = process.stdout.readline()
-                    if not line and process.poll() is not None:
-                        break
-                        
-                    if line.startswith("PROGRESS:"):
-                        _, percent, message = line.strip().split(":", 2)
-                        GLib.idle_add(progress_dialog.set_body, message)
-                        GLib.idle_add(progress_dialog.set_subtitle, f"{percent}%")
-                    elif line.startswith("INFO:"):
-                        _, message = line.strip().split(":", 1)
-                        GLib.idle_add(progress_dialog.set_body, message)
-                
-                # Check if process was successful
-                if process.returncode != 0:
-                    raise subprocess.CalledProcessError(process.returncode, "pkexec")
-                
-                # Remove temporary script
-                os.unlink(script_path)
-                
+        # Progress is applied at most once per frame
+        channel = ProgressChannel(progress_dialog, show_progress)
+
+        def on_finished(runner):
+            channel.close()
+            progress_dialog.close()
+            if runner.success:
                 # Launch GNOME Disks after successful installation
                 if package_name == "gnome-disk-utility":
-                    GLib.idle_add(lambda: subprocess.Popen(['gnome-disks']))
+                    subprocess.Popen(['gnome-disks'])
                 else:
-                    GLib.idle_add(lambda: self.show_success_dialog(f"{package_name} has been successfully installed!"))
-                GLib.idle_add(progress_dialog.close)
-                
-            except Exception as e:
-                GLib.idle_add(progress_dialog.close)
-                GLib.idle_add(lambda: self.show_error_dialog(
-                    f"Failed to install {package_name}: {str(e)}"
-                ))
-        
-        thread = threading.Thread(target=install_thread)
-        thread.daemon = True
-        thread.start()
+                    self.show_success_dialog(f"{package_name} has been successfully installed!")
+            else:
+                self.show_error_dialog(f"Failed to install {package_name}: {runner.error_message}")
+
+        run_dnf_script(build_install_script([package_name]),
+                       on_progress=channel.update, on_finished=on_finished)
 
     def show_success_and_launch(self, package_name):
         dialog = Adw.MessageDialog.new(
@@ -1563,19 +1316,8 @@ class SoundPage(Gtk.Box):
 
     def show_backend_selection(self):
         # First check which backend is currently installed
-        def check_package_installed(package_name):
-            try:
-                result = subprocess.run(
-                    ["rpm", "-q", package_name],
-                    capture_output=True,
-                    text=True
-                )
-                return result.returncode == 0
-            except Exception:
-                return False
-
-        is_pipewire = check_package_installed("pipewire-pulse")
-        is_pulseaudio = check_package_installed("pulseaudio-server")
+        is_pipewire = is_installed("pipewire-pulse")
+        is_pulseaudio = is_installed("pulseaudio-server")
 
         dialog = Adw.MessageDialog.new(
             self.get_root(),
@@ -1666,81 +1408,30 @@ class SoundPage(Gtk.Box):
         )
         progress_dialog.present()
 
-        def install_thread():
-            try:
-                # Create temporary script file
-                script_content = """#!/bin/bash
-set -e
-
-# Function to handle dnf output
-handle_output() {
-    while IFS= read -r line; do
-        if [[ $line == *"Downloading"* ]]; then
-            echo "PROGRESS:30:$line"
-        elif [[ $line == *"Installing"* ]] || [[ $line == *"Upgrading"* ]]; then
-            echo "PROGRESS:60:$line"
-        elif [[ $line == *"Verifying"* ]]; then
-            echo "PROGRESS:80:$line"
-        elif [[ $line == *"Complete!"* ]]; then
-            echo "PROGRESS:100:Installation complete!"
-        else
-            echo "INFO:$line"
-        fi
-    done
-}
-
-"""
-                for cmd in commands:
-                    script_content += f"echo \"{password}\" | sudo -S {cmd} 2>&1 | handle_output\n"
-                
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.sh', delete=False) as script_file:
-                    script_file.write(script_content)
-                    script_path = script_file.name
-                
-                # Make script executable
-                os.chmod(script_path, 0o755)
-                
-                # Execute script with pkexec and capture output
-                process = subprocess.Popen(
-                    ["pkexec", script_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True,
-                    bufsize=1
-                )
-
-                # Process output in real-time
-                while True:
-                    line = process.stdout.readline()
-                    if not line and process.poll() is not None:
-                        break
-                        
-                    if line.startswith("PROGRESS:"):
-                        _, percent, message = line.strip().split(":", 2)
-                        GLib.idle_add(progress_dialog.set_body, message)
-                        GLib.idle_add(progress_dialog.set_subtitle, f"{percent}%")
-                    elif line.startswith("INFO:"):
-                        _, message = line.strip().split(":", 1)
-                        GLib.idle_add(progress_dialog.set_body, message)
-                
-                # Check if process was successful
-                if process.returncode != 0:
-                    raise subprocess.CalledProcessError(process.returncode, "pkexec")
-                
-                # Remove temporary script
-                os.unlink(script_path)
-                
-                GLib.idle_add(self.show_result_dialog, True, 
+        def show_progress(fraction, message, lines):
+            if message is None:
+                return
+            if fraction is not None:
+                message = f"{message}\n{int(fraction * 100)}%"
+            progress_dialog.set_body(message)
+
+        # Progress is applied at most once per frame
+        channel = ProgressChannel(progress_dialog, show_progress)
+
+        def on_finished(runner):
+            channel.close()
+            progress_dialog.close()
+            if runner.success:
+                self.show_result_dialog(True,
                     f"Successfully switched to {backend_name}! Please restart your system for changes to take effect.")
-                GLib.idle_add(progress_dialog.close)
-                
-            except Exception as e:
-                GLib.idle_add(self.show_result_dialog, False, f"Error during backend switch: {str(e)}")
-                GLib.idle_add(progress_dialog.close)
+            else:
+                self.show_result_dialog(False, f"Error during backend switch: {runner.error_message}")
 
-        thread = threading.Thread(target=install_thread)
-        thread.daemon = True
-        thread.start()
+        script_content = build_dnf_script(
+            [f"echo \"{password}\" | sudo -S {cmd}" for cmd in commands],
+            refresh=False
+        )
+        run_dnf_script(script_content, on_progress=channel.update, on_finished=on_finished)
 
     def update_progress_dialog(self, dialog, message):
         dialog.set_body(message)
@@ -1813,87 +1504,26 @@ handle_output() {
         )
         progress_dialog.present()
 
-        def install_thread():
-            try:
-                # Create temporary script file
-                script_content = """#!/bin/bash
-set -e
-
-# Function to handle dnf output
-handle_output() {
-    while IFS= read -r line; do
-        if [[ $line == *"Downloading"* ]]; then
-            echo "PROGRESS:30:$line"
-        elif [[ $line == *"Installing"* ]] || [[ $line == *"Upgrading"* ]]; then
-            echo "PROGRESS:60:$line"
-        elif [[ $line == *"Verifying"* ]]; then
-            echo "PROGRESS:80:$line"
-        elif [[ $line == *"Complete!"* ]]; then
-            echo "PROGRESS:100:Installation complete!"
-        else
-            echo "INFO:$line"
-        fi
-    done
-}
-
-# Update package cache
-echo "PROGRESS:10:Refreshing package cache..."
-dnf makecache 2>&1 | handle_output
-
-# Install package
-echo "PROGRESS:20:Starting installation..."
-dnf install -y pavucontrol 2>&1 | handle_output
-"""
-                
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.sh', delete=False) as script_file:
-                    script_file.write(script_content)
-                    script_path = script_file.name
-                
-                # Make script executable
-                os.chmod(script_path, 0o755)
-                
-                # Execute script with pkexec and capture output
-                process = subprocess.Popen(
-                    ["pkexec", script_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True,
-                    bufsize=1
-                )
+        def show_progress(fraction, message, lines):
+            if message is None:
+                return
+            if fraction is not None:
+                message = f"{message}\n{int(fraction * 100)}%"
+            progress_dialog.set_body(message)
+
+        # Progress is applied at most once per frame
+        channel = ProgressChannel(progress_dialog, show_progress)
+
+        def on_finished(runner):
+            channel.close()
+            progress_dialog.close()
+            if runner.success:
+                self.show_success_and_launch_pavucontrol()
+            else:
+                self.show_error_dialog(f"Failed to install pavucontrol: {runner.error_message}")
 
-                # Process output in real-time
-                while True:
-                    line = process.stdout.readline()
-                    if not line and process.poll() is not None:
-                        break
-                        
-                    if line.startswith("PROGRESS:"):
-                        _, percent, message = line.strip().split(":", 2)
-                        GLib.idle_add(progress_dialog.set_body, message)
-                        GLib.idle_add(progress_dialog.set_subtitle, f"{percent}%")
-                    elif line.startswith("INFO:"):
-                        _, message = line.strip().split(":", 1)
-                        GLib.idle_add(progress_dialog.set_body, message)
-                
-                # Check if process was successful
-                if process.returncode != 0:
-                    raise subprocess.CalledProcessError(process.returncode, "pkexec")
-                
-                # Remove temporary script
-                os.unlink(script_path)
-                
-                GLib.idle_add(self.show_success_and_launch_pavucontrol)
-                GLib.idle_add(progress_dialog.close)
-                
-            except Exception as e:
-                GLib.idle_add(progress_dialog.close)
-                GLib.idle_add(lambda: self.show_error_dialog(
-                    f"Failed to install pavucontrol: {str(e)}"
-                ))
-        
-        thread = threading.Thread(target=install_thread)
-        thread.daemon = True
-        thread.start()
+        run_dnf_script(build_install_script(["pavucontrol"]),
+                       on_progress=channel.update, on_finished=on_finished)
 
     def show_success_and_launch_pavucontrol(self):
         dialog = Adw.MessageDialog.new(
@@ -1915,19 +1545,8 @@ dnf install -y pavucontrol 2>&1 | handle_output
         dialog.present()
 
     def show_alsa_selection(self):
-        def check_package_installed(package_name):
-            try:
-                result = subprocess.run(
-                    ["rpm", "-q", package_name],
-                    capture_output=True,
-                    text=True
-                )
-                return result.returncode == 0
-            except Exception:
-                return False
-
-        is_pipewire_alsa = check_package_installed("pipewire-alsa")
-        is_pulseaudio_alsa = check_package_installed("lib64alsa-plugins-pulseaudio")
+        is_pipewire_alsa = is_installed("pipewire-alsa")
+        is_pulseaudio_alsa = is_installed("lib64alsa-plugins-pulseaudio")
 
         dialog = Adw.MessageDialog.new(
             self.get_root(),
@@ -1980,20 +1599,9 @@ dnf install -y pavucontrol 2>&1 | handle_output
                 self.switch_to_pulseaudio_alsa()
 
     def show_jack_selection(self):
-        def check_package_installed(package_name):
-            try:
-                result = subprocess.run(
-                    ["rpm", "-q", package_name],
-                    capture_output=True,
-                    text=True
-                )
-                return result.returncode == 0
-            except Exception:
-                return False
-
-        is_jack = check_package_installed("jackit")
-        is_pipewire_jack = check_package_installed("pipewire-libjack")
-        is_pulseaudio_jack = check_package_installed("pulseaudio-module-jack")
+        is_jack = is_installed("jackit")
+        is_pipewire_jack = is_installed("pipewire-libjack")
+        is_pulseaudio_jack = is_installed("pulseaudio-module-jack")
 
         dialog = Adw.MessageDialog.new(
             self.get_root(),
@@ -2106,10 +1714,9 @@ class MainWindow(Gtk.ApplicationWindow):
             self.stack.set_visible_child_name("sound")
 
     def on_printer_clicked(self, button):
-        try:
-            subprocess.run(['which', 'system-config-printer'], check=True)
+        if is_installed(PRINTER_CONFIG_PACKAGE):
             subprocess.Popen(['system-config-printer'])
-        except subprocess.CalledProcessError:
+        else:
             dialog = Adw.MessageDialog.new(
                 self.get_root(),
                 "Install Printer Configuration Tool",
@@ -2158,88 +1765,24 @@ class MainWindow(Gtk.ApplicationWindow):
                     progress_bar.set_fraction(fraction)
                 status_label.set_markup(f"<span size='small'>{text}</span>")
 
-            def install_thread():
-                try:
-                    # Create temporary script file
-                    script_content = """#!/bin/bash
-set -e
-
-# Function to handle dnf output
-handle_output() {
-    while IFS= read -r line; do
-        if [[ $line == *"Downloading"* ]]; then
-            echo "PROGRESS:30:$line"
-        elif [[ $line == *"Installing"* ]] || [[ $line == *"Upgrading"* ]]; then
-            echo "PROGRESS:60:$line"
-        elif [[ $line == *"Verifying"* ]]; then
-            echo "PROGRESS:80:$line"
-        elif [[ $line == *"Complete!"* ]]; then
-            echo "PROGRESS:100:Installation complete!"
-        else
-            echo "INFO:$line"
-        fi
-    done
-}
-
-# Update package cache
-echo "PROGRESS:10:Refreshing package cache..."
-dnf makecache 2>&1 | handle_output
-
-# Install package
-echo "PROGRESS:20:Starting installation..."
-dnf install -y system-config-printer-gui 2>&1 | handle_output
-"""
-                    
-                    with tempfile.NamedTemporaryFile(mode='w', suffix='.sh', delete=False) as script_file:
-                        script_file.write(script_content)
-                        script_path = script_file.name
-                    
-                    # Make script executable
-                    os.chmod(script_path, 0o755)
-                    
-                    # Execute script with pkexec and capture output
-                    process = subprocess.Popen(
-                        ["pkexec", script_path],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.STDOUT,
-                        universal_newlines=True,
-                        bufsize=1
-                    )
+            # Progress is applied at most once per frame
+            channel = ProgressChannel(progress_dialog, lambda fraction, text, lines: update_progress(fraction, text))
 
-                    # Process output in real-time
-                    while True:
-                        line = process.stdout.readline()
-                        if not line and process.poll() is not None:
-                            break
-                            
-                        if line.startswith("PROGRESS:"):
-                            _, percent, message = line.strip().split(":", 2)
-                            GLib.idle_add(update_progress, float(percent)/100, message)
-                        elif line.startswith("INFO:"):
-                            _, message = line.strip().split(":", 1)
-                            GLib.idle_add(update_progress, None, message)
-                    
-                    # Check if process was successful
-                    if process.returncode != 0:
-                        raise subprocess.CalledProcessError(process.returncode, "pkexec")
-                    
-                    # Remove temporary script
-                    os.unlink(script_path)
-                    
+            def on_finished(runner):
+                channel.close()
+                progress_dialog.close()
+                if runner.success:
                     # Launch printer configuration tool
-                    GLib.idle_add(lambda: subprocess.Popen(['system-config-printer']))
-                    GLib.idle_add(progress_dialog.close)
-                    
-                except Exception as e:
-                    GLib.idle_add(progress_dialog.close)
-                    GLib.idle_add(lambda: self.show_error_dialog(
+                    subprocess.Popen(['system-config-printer'])
+                else:
+                    self.show_error_dialog(
                         "Installation Error",
-                        f"Failed to install printer configuration tool.\nError: {str(e)}"
-                    ))
-            
-            thread = threading.Thread(target=install_thread)
-            thread.daemon = True
-            thread.start()
+                        f"Failed to install printer configuration tool.\nError: {runner.error_message}"
+                    )
+
+            runner = run_dnf_script(build_install_script([PRINTER_CONFIG_PACKAGE]),
+                                    on_progress=channel.update, on_finished=on_finished)
+            progress_dialog.connect("response", lambda d, r: runner.cancel() if r == "cancel" else None)
 
     def show_error_dialog(self, title, message):
         dialog = Adw.MessageDialog.new(
@@ -8,8 +8,13 @@ from datetime import datetime
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
 from gi.repository import Gtk, Adw, GLib
+from system_info import run_probes, PROBE_TIMEOUT
+from facts_cache import load_facts, update_facts
 
 class HardwareInfoPage(Gtk.Box):
+    # Probes whose results change during a boot and are never cached
+    LIVE_PROBES = ('gpu_memory',)
+
     def __init__(self):
         super().__init__(orientation=Gtk.Orientation.VERTICAL)
         
@@ -24,6 +29,12 @@ class HardwareInfoPage(Gtk.Box):
         main_box.set_margin_start(20)
         main_box.set_margin_end(20)
         
+        # Refresh button probes the hardware again, bypassing the cache
+        refresh_button = Gtk.Button(label="Refresh")
+        refresh_button.set_halign(Gtk.Align.END)
+        refresh_button.connect("clicked", self._on_refresh_clicked)
+        main_box.append(refresh_button)
+        
         # Add hardware information sections
         self._add_cpu_info(main_box)
         self._add_memory_info(main_box)
@@ -34,6 +45,15 @@ class HardwareInfoPage(Gtk.Box):
         scrolled.set_child(main_box)
         self.append(scrolled)
         
+        # CPU model, GPU and display layout do not change during a boot,
+        # so values cached earlier are shown without spawning any probe.
+        # Live values such as GPU memory use are probed every time.
+        cached = load_facts('hardware_info')
+        for key, lines in cached.items():
+            if key not in self.LIVE_PROBES:
+                self._set_probed_info(key, lines, store=False)
+        self._probe_hardware([key for key in self._probes() if key not in cached or key in self.LIVE_PROBES])
+        
         # Update info every 5 seconds
         GLib.timeout_add(5000, self._update_info)
 
@@ -51,19 +71,10 @@ class HardwareInfoPage(Gtk.Box):
     def _add_cpu_info(self, parent_box):
         cpu_section = self._create_section("CPU Information")
         
-        # Get CPU info
-        with open('/proc/cpuinfo') as f:
-            cpu_info = f.readlines()
-        
-        model_name = "Unknown"
+        # CPU model is filled in from the cache or by the probe
         cores = psutil.cpu_count(logical=False)
         threads = psutil.cpu_count(logical=True)
         
-        for line in cpu_info:
-            if "model name" in line:
-                model_name = line.split(':')[1].strip()
-                break
-        
         freq = psutil.cpu_freq()
         if freq:
             current_freq = f"{freq.current:.2f} MHz"
@@ -75,8 +86,11 @@ class HardwareInfoPage(Gtk.Box):
         info_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=3)
         info_box.set_margin_start(10)
         
+        self.cpu_model_label = Gtk.Label(label="Model: Loading...")
+        self.cpu_model_label.set_halign(Gtk.Align.START)
+        info_box.append(self.cpu_model_label)
+        
         labels = [
-            f"Model: {model_name}",
             f"Physical cores: {cores}",
             f"Logical cores: {threads}",
             f"Current Frequency: {current_freq}",
@@ -143,29 +157,103 @@ class HardwareInfoPage(Gtk.Box):
     def _add_gpu_info(self, parent_box):
         gpu_section = self._create_section("GPU Information")
         
-        info_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=3)
-        info_box.set_margin_start(10)
+        self.gpu_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=3)
+        self.gpu_box.set_margin_start(10)
+        self.gpu_lines = ["Loading..."]
+        self.gpu_memory_lines = []
+        self._set_lines(self.gpu_box, self.gpu_lines)
         
+        gpu_section.append(self.gpu_box)
+        parent_box.append(gpu_section)
+
+    def _add_display_info(self, parent_box):
+        display_section = self._create_section("Display Information")
+        
+        self.display_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=3)
+        self.display_box.set_margin_start(10)
+        self._set_lines(self.display_box, ["Loading..."])
+        
+        display_section.append(self.display_box)
+        parent_box.append(display_section)
+
+    def _set_lines(self, box, lines):
+        child = box.get_first_child()
+        while child:
+            next_child = child.get_next_sibling()
+            box.remove(child)
+            child = next_child
+        
+        for text in lines:
+            label = Gtk.Label(label=text)
+            label.set_halign(Gtk.Align.START)
+            box.append(label)
+
+    def _probes(self):
+        return {
+            'cpu_model': self._probe_cpu_model,
+            'gpu': self._probe_gpu_info,
+            'gpu_memory': self._probe_gpu_memory,
+            'display': self._probe_display_info,
+        }
+
+    def _probe_hardware(self, keys):
+        probes = {key: probe for key, probe in self._probes().items() if key in keys}
+        run_probes(probes, lambda key, lines: GLib.idle_add(self._set_probed_info, key, lines))
+
+    def _set_probed_info(self, key, lines, store=True):
+        # Probes return None when detection failed, that result is not cached
+        if not isinstance(lines, list):
+            lines = None
+        if key == 'cpu_model':
+            self.cpu_model_label.set_label(f"Model: {lines[0] if lines else 'Unknown'}")
+        elif key == 'gpu':
+            self.gpu_lines = lines or ["Could not detect GPU information"]
+            self._set_lines(self.gpu_box, self.gpu_lines + self.gpu_memory_lines)
+        elif key == 'gpu_memory':
+            self.gpu_memory_lines = lines or []
+            self._set_lines(self.gpu_box, self.gpu_lines + self.gpu_memory_lines)
+            return False
+        elif key == 'display':
+            self._set_lines(self.display_box, lines or ["Could not detect display information"])
+        
+        if store and lines:
+            update_facts('hardware_info', {key: lines})
+        return False
+
+    def _on_refresh_clicked(self, button):
+        self.cpu_model_label.set_label("Model: Loading...")
+        self.gpu_lines = ["Loading..."]
+        self.gpu_memory_lines = []
+        self._set_lines(self.gpu_box, self.gpu_lines)
+        self._set_lines(self.display_box, ["Loading..."])
+        self._probe_hardware(list(self._probes()))
+
+    def _probe_cpu_model(self):
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if "model name" in line:
+                    return [line.split(':')[1].strip()]
+        return None
+
+    def _probe_gpu_info(self):
         # Try to get NVIDIA GPU info
         try:
-            nvidia_info = subprocess.check_output(['nvidia-smi', '--query-gpu=gpu_name,driver_version,memory.total,memory.used',
-                                                 '--format=csv,noheader,nounits'], text=True)
+            # Only static facts, memory use is read by _probe_gpu_memory
+            nvidia_info = subprocess.check_output(['nvidia-smi', '--query-gpu=gpu_name,driver_version,memory.total',
+                                                 '--format=csv,noheader,nounits'], text=True, timeout=PROBE_TIMEOUT)
+            lines = []
             for line in nvidia_info.strip().split('\n'):
-                name, driver, total_mem, used_mem = line.split(', ')
-                labels = [
+                name, driver, total_mem = line.split(', ')
+                lines.extend([
                     f"GPU: {name}",
                     f"Driver Version: {driver}",
-                    f"Total Memory: {total_mem} MB",
-                    f"Used Memory: {used_mem} MB"
-                ]
-                for text in labels:
-                    label = Gtk.Label(label=text)
-                    label.set_halign(Gtk.Align.START)
-                    info_box.append(label)
+                    f"Total Memory: {total_mem} MB"
+                ])
+            return lines
         except:
             # Try to get Mesa/AMD GPU info
             try:
-                glxinfo = subprocess.check_output(['glxinfo'], text=True)
+                glxinfo = subprocess.check_output(['glxinfo'], text=True, timeout=PROBE_TIMEOUT)
                 vendor = None
                 renderer = None
                 version = None
@@ -179,31 +267,31 @@ class HardwareInfoPage(Gtk.Box):
                         version = line.split(':')[1].strip()
                 
                 if vendor and renderer and version:
-                    labels = [
+                    return [
                         f"GPU: {renderer}",
                         f"Vendor: {vendor}",
                         f"OpenGL Version: {version}"
                     ]
-                    for text in labels:
-                        label = Gtk.Label(label=text)
-                        label.set_halign(Gtk.Align.START)
-                        info_box.append(label)
+                return []
             except:
-                label = Gtk.Label(label="Could not detect GPU information")
-                label.set_halign(Gtk.Align.START)
-                info_box.append(label)
-        
-        gpu_section.append(info_box)
-        parent_box.append(gpu_section)
+                return None
 
-    def _add_display_info(self, parent_box):
-        display_section = self._create_section("Display Information")
-        
-        info_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=3)
-        info_box.set_margin_start(10)
-        
+    def _probe_gpu_memory(self):
+        # Only NVIDIA GPUs report their memory use, other GPUs show no line
         try:
-            xrandr = subprocess.check_output(['xrandr'], text=True)
+            nvidia_info = subprocess.check_output(['nvidia-smi', '--query-gpu=memory.used',
+                                                 '--format=csv,noheader,nounits'], text=True, timeout=PROBE_TIMEOUT)
+            used = [used_mem.strip() for used_mem in nvidia_info.strip().split('\n')]
+            if len(used) == 1:
+                return [f"Used Memory: {used[0]} MB"]
+            return [f"GPU {index} Used Memory: {used_mem} MB" for index, used_mem in enumerate(used)]
+        except:
+            return None
+
+    def _probe_display_info(self):
+        try:
+            xrandr = subprocess.check_output(['xrandr'], text=True, timeout=PROBE_TIMEOUT)
+            lines = []
             for line in xrandr.split('\n'):
                 if ' connected ' in line:
                     parts = line.split()
@@ -214,16 +302,10 @@ class HardwareInfoPage(Gtk.Box):
                             resolution = part.split('+')[0]
                             break
                     
-                    label = Gtk.Label(label=f"Monitor {output}: {resolution}")
-                    label.set_halign(Gtk.Align.START)
-                    info_box.append(label)
+                    lines.append(f"Monitor {output}: {resolution}")
+            return lines
         except:
-            label = Gtk.Label(label="Could not detect display information")
-            label.set_halign(Gtk.Align.START)
-            info_box.append(label)
-        
-        display_section.append(info_box)
-        parent_box.append(display_section)
+            return None
 
     def _format_bytes(self, bytes):
         for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
@@ -1,13 +1,15 @@
 import gi
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
-from gi.repository import Gtk, Adw, GLib
+from gi.repository import Gtk, Adw
 import subprocess
-import threading
-import os
+from progress_channel import ProgressChannel
+from command_runner import run_privileged_command
+from package_index import get_package_index
+from output_log import DEFAULT_MAX_LINES, OutputLog, OutputLogView, save_log_dialog
 
 class InstallProgressDialog(Adw.Window):
-    def __init__(self, parent, kernel_name):
+    def __init__(self, parent, kernel_name, max_lines=DEFAULT_MAX_LINES):
         super().__init__(
             transient_for=parent,
             modal=True,
@@ -15,6 +17,7 @@ class InstallProgressDialog(Adw.Window):
             default_width=600,
             default_height=400
         )
+        self.kernel_name = kernel_name
         
         # Main box
         main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
@@ -34,21 +37,17 @@ class InstallProgressDialog(Adw.Window):
         self.progress_bar.set_text("0%")
         main_box.append(self.progress_bar)
         
-        # Scrolled window for output
-        scrolled = Gtk.ScrolledWindow()
-        scrolled.set_vexpand(True)
-        scrolled.set_margin_top(10)
-        
-        # Output text view with monospace font
-        self.output_view = Gtk.TextView()
-        self.output_view.set_editable(False)
-        self.output_view.set_cursor_visible(False)
-        self.output_view.set_wrap_mode(Gtk.WrapMode.WORD_CHAR)
-        self.output_view.get_style_context().add_class('monospace')
-        self.output_buffer = self.output_view.get_buffer()
+        # Output log, only the most recent lines are kept in memory
+        self.log = OutputLog(max_lines)
+        self.output_view = OutputLogView(self.log)
+        self.output_view.set_margin_top(10)
+        main_box.append(self.output_view)
         
-        scrolled.set_child(self.output_view)
-        main_box.append(scrolled)
+        # The full output is spooled to disk and can be saved at any time
+        save_button = Gtk.Button(label="Save Full Log")
+        save_button.set_halign(Gtk.Align.END)
+        save_button.connect("clicked", lambda button: self.save_log(self.get_transient_for()))
+        main_box.append(save_button)
         
         self.set_content(main_box)
     
@@ -59,12 +58,24 @@ class InstallProgressDialog(Adw.Window):
             self.status_label.set_text(status)
     
     def append_output(self, text):
-        end_iter = self.output_buffer.get_end_iter()
-        self.output_buffer.insert(end_iter, text + "\n")
-        # Scroll to bottom
-        mark = self.output_buffer.create_mark(None, end_iter, False)
-        self.output_view.scroll_mark_onscreen(mark)
-        self.output_buffer.delete_mark(mark)
+        self.append_lines([text])
+    
+    def append_lines(self, lines):
+        self.log.append_lines(lines)
+    
+    def save_log(self, parent):
+        save_log_dialog(parent, self.log, f"{self.kernel_name}.log")
+    
+    def add_save_log_response(self, dialog):
+        # The progress dialog is gone by the time the result is shown,
+        # its log stays available until the result dialog is closed
+        dialog.add_response("save", "Save Log")
+        
+        def on_response(dialog, response):
+            if response == "save":
+                self.save_log(dialog.get_transient_for())
+        
+        dialog.connect("response", on_response)
 
 class KernelManagerPage(Gtk.Box):
     def __init__(self, parent):
@@ -173,15 +184,7 @@ class KernelManagerPage(Gtk.Box):
         self.append(scrolled)
 
     def get_installed_kernels(self):
-        try:
-            result = subprocess.run(
-                ["rpm", "-qa", "kernel*"],
-                capture_output=True,
-                text=True
-            )
-            return result.stdout.splitlines()
-        except:
-            return []
+        return get_package_index().names("kernel")
 
     def get_default_kernel(self):
         try:
@@ -257,7 +260,7 @@ class KernelManagerPage(Gtk.Box):
             button_box.set_halign(Gtk.Align.END)
             button_box.set_hexpand(True)
             
-            is_installed = any(kernel['name'] in k for k in self.installed_kernels)
+            is_installed = kernel['name'] in self.installed_kernels
             is_default = self.default_kernel and kernel['name'] in self.default_kernel
             is_protected = kernel['name'] == 'kernel-desktop'  # Protect kernel-desktop
             
@@ -308,13 +311,8 @@ class KernelManagerPage(Gtk.Box):
                 progress_dialog = InstallProgressDialog(self.get_root(), kernel_name)
                 progress_dialog.present()
                 
-                # Start installation in a separate thread
-                thread = threading.Thread(
-                    target=self.install_kernel,
-                    args=(button, kernel_name, progress_dialog)
-                )
-                thread.daemon = True
-                thread.start()
+                # Output is streamed on the main loop, no worker thread needed
+                self.install_kernel(button, kernel_name, progress_dialog)
         
         confirm_dialog.connect("response", on_response)
         confirm_dialog.present()
@@ -335,340 +333,337 @@ class KernelManagerPage(Gtk.Box):
                 progress_dialog = InstallProgressDialog(self.get_root(), kernel_name)
                 progress_dialog.present()
                 
-                # Start removal in a separate thread
-                thread = threading.Thread(
-                    target=self.remove_kernel,
-                    args=(button, kernel_name, progress_dialog)
-                )
-                thread.daemon = True
-                thread.start()
+                # Output is streamed on the main loop, no worker thread needed
+                self.remove_kernel(button, kernel_name, progress_dialog)
         
         dialog.connect("response", on_response)
         dialog.present()
 
     def remove_kernel(self, button, kernel_name, progress_dialog):
-        try:
-            cmd = ["pkexec", "dnf", "remove", "-y", kernel_name]
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
+        cmd = ["dnf", "remove", "-y", kernel_name]
 
-            # Track removal progress
-            current_step = 0
-            total_steps = 4  # Dependencies, Remove, Cleanup, Done
-            
-            while True:
-                line = process.stdout.readline()
-                if not line and process.poll() is not None:
-                    break
-                
-                # Update progress based on key phrases
-                if "Resolving Dependencies" in line:
-                    current_step = 1
-                    GLib.idle_add(progress_dialog.update_progress, 0.25, "Resolving dependencies...")
-                elif "Removing" in line:
-                    current_step = 2
-                    GLib.idle_add(progress_dialog.update_progress, 0.50, "Removing kernel...")
-                elif "Cleanup" in line:
-                    current_step = 3
-                    GLib.idle_add(progress_dialog.update_progress, 0.75, "Cleaning up...")
-                
-                # Update output text
-                GLib.idle_add(progress_dialog.append_output, line.strip())
+        def show_progress(fraction, status, lines):
+            if fraction is not None:
+                progress_dialog.update_progress(fraction, status)
+            if lines:
+                progress_dialog.append_lines(lines)
 
-            stdout, stderr = process.communicate()
+        # Output is applied to the dialog at most once per frame
+        channel = ProgressChannel(progress_dialog, show_progress)
 
-            def update_ui(success):
-                # Close the progress dialog first
-                progress_dialog.destroy()
-                
-                if success:
-                    # Update installed kernels list and refresh the page
-                    self.installed_kernels = self.get_installed_kernels()
-                    
-                    # Remove all children from the parent box
-                    while child := self.get_first_child():
-                        self.remove(child)
-                    
-                    # Recreate the kernel grids
-                    desktop_grid = self.create_kernel_grid([
-                        {
-                            'name': 'kernel-desktop',
-                            'description': 'Desktop kernel compiled with Clang',
-                            'compiler': 'Clang'
-                        },
-                        {
-                            'name': 'kernel-desktop-gcc',
-                            'description': 'Desktop kernel compiled with GCC',
-                            'compiler': 'GCC'
-                        },
-                        {
-                            'name': 'kernel-rc-desktop',
-                            'description': 'Release Candidate desktop kernel compiled with Clang',
-                            'compiler': 'Clang',
-                            'is_testing': True
-                        },
-                        {
-                            'name': 'kernel-rc-desktop-gcc',
-                            'description': 'Release Candidate desktop kernel compiled with GCC',
-                            'compiler': 'GCC',
-                            'is_testing': True
-                        }
-                    ])
-                    
-                    server_grid = self.create_kernel_grid([
-                        {
-                            'name': 'kernel-server',
-                            'description': 'Server kernel compiled with Clang',
-                            'compiler': 'Clang'
-                        },
-                        {
-                            'name': 'kernel-server-gcc',
-                            'description': 'Server kernel compiled with GCC',
-                            'compiler': 'GCC'
-                        },
-                        {
-                            'name': 'kernel-rc-server',
-                            'description': 'Release Candidate server kernel compiled with Clang',
-                            'compiler': 'Clang',
-                            'is_testing': True
-                        },
-                        {
-                            'name': 'kernel-rc-server-gcc',
-                            'description': 'Release Candidate server kernel compiled with GCC',
-                            'compiler': 'GCC',
-                            'is_testing': True
-                        }
-                    ])
-                    
-                    # Add page title and description
-                    title_group = Adw.PreferencesGroup()
-                    title_label = Gtk.Label()
-                    title_label.set_markup("<span size='x-large' weight='bold'>Kernel Manager</span>")
-                    title_label.set_margin_bottom(10)
-                    title_group.add(title_label)
-                    
-                    description_label = Gtk.Label(
-                        label="Manage your system kernels. You can install additional kernels or remove unused ones. "
-                              "The default system kernel cannot be removed for system stability."
-                    )
-                    description_label.set_wrap(True)
-                    description_label.set_margin_bottom(10)
-                    title_group.add(description_label)
-                    
-                    self.append(title_group)
-                    
-                    # Add desktop kernels section
-                    desktop_section = Adw.PreferencesGroup()
-                    desktop_section.set_title("Desktop Kernels")
-                    desktop_section.set_description("Kernels optimized for desktop use")
-                    desktop_section.add(desktop_grid)
-                    self.append(desktop_section)
-                    
-                    # Add server kernels section
-                    server_section = Adw.PreferencesGroup()
-                    server_section.set_title("Server Kernels")
-                    server_section.set_description("Kernels optimized for server use")
-                    server_section.add(server_grid)
-                    self.append(server_section)
-                    
-                    dialog = Adw.MessageDialog.new(
-                        self.get_root(),
-                        "Operation Complete",
-                        f"Successfully completed operation on {kernel_name}."
-                    )
-                else:
-                    button.set_label("Remove")
-                    button.set_sensitive(True)
-                    dialog = Adw.MessageDialog.new(
-                        self.get_root(),
-                        "Operation Failed",
-                        f"Failed to complete operation on {kernel_name}.\nError: {stderr}"
-                    )
-                dialog.add_response("ok", "OK")
-                dialog.present()
-
-            GLib.idle_add(update_ui, process.returncode == 0)
-
-        except Exception as e:
-            def show_error():
-                # Close the progress dialog first
-                progress_dialog.destroy()
-                
+        def on_line(line, is_error):
+            # Only stdout drives the progress, stderr is reported on failure
+            if is_error:
+                return
+            # Update progress based on key phrases
+            if "Resolving Dependencies" in line:
+                channel.update(0.25, "Resolving dependencies...")
+            elif "Removing" in line:
+                channel.update(0.50, "Removing kernel...")
+            elif "Cleanup" in line:
+                channel.update(0.75, "Cleaning up...")
+
+            # Update output text
+            channel.append_line(line.strip())
+
+        def update_ui(success, stderr):
+            # Close the progress dialog first
+            progress_dialog.destroy()
+
+            if success:
+                # Update installed kernels list and refresh the page
+                self.installed_kernels = self.get_installed_kernels()
+
+                # Remove all children from the parent box
+                while child := self.get_first_child():
+                    self.remove(child)
+
+                # Recreate the kernel grids
+                desktop_grid = self.create_kernel_grid([
+                    {
+                        'name': 'kernel-desktop',
+                        'description': 'Desktop kernel compiled with Clang',
+                        'compiler': 'Clang'
+                    },
+                    {
+                        'name': 'kernel-desktop-gcc',
+                        'description': 'Desktop kernel compiled with GCC',
+                        'compiler': 'GCC'
+                    },
+                    {
+                        'name': 'kernel-rc-desktop',
+                        'description': 'Release Candidate desktop kernel compiled with Clang',
+                        'compiler': 'Clang',
+                        'is_testing': True
+                    },
+                    {
+                        'name': 'kernel-rc-desktop-gcc',
+                        'description': 'Release Candidate desktop kernel compiled with GCC',
+                        'compiler': 'GCC',
+                        'is_testing': True
+                    }
+                ])
+
+                server_grid = self.create_kernel_grid([
+                    {
+                        'name': 'kernel-server',
+                        'description': 'Server kernel compiled with Clang',
+                        'compiler': 'Clang'
+                    },
+                    {
+                        'name': 'kernel-server-gcc',
+                        'description': 'Server kernel compiled with GCC',
+                        'compiler': 'GCC'
+                    },
+                    {
+                        'name': 'kernel-rc-server',
+                        'description': 'Release Candidate server kernel compiled with Clang',
+                        'compiler': 'Clang',
+                        'is_testing': True
+                    },
+                    {
+                        'name': 'kernel-rc-server-gcc',
+                        'description': 'Release Candidate server kernel compiled with GCC',
+                        'compiler': 'GCC',
+                        'is_testing': True
+                    }
+                ])
+
+                # Add page title and description
+                title_group = Adw.PreferencesGroup()
+                title_label = Gtk.Label()
+                title_label.set_markup("<span size='x-large' weight='bold'>Kernel Manager</span>")
+                title_label.set_margin_bottom(10)
+                title_group.add(title_label)
+
+                description_label = Gtk.Label(
+                    label="Manage your system kernels. You can install additional kernels or remove unused ones. "
+                          "The default system kernel cannot be removed for system stability."
+                )
+                description_label.set_wrap(True)
+                description_label.set_margin_bottom(10)
+                title_group.add(description_label)
+
+                self.append(title_group)
+
+                # Add desktop kernels section
+                desktop_section = Adw.PreferencesGroup()
+                desktop_section.set_title("Desktop Kernels")
+                desktop_section.set_description("Kernels optimized for desktop use")
+                desktop_section.add(desktop_grid)
+                self.append(desktop_section)
+
+                # Add server kernels section
+                server_section = Adw.PreferencesGroup()
+                server_section.set_title("Server Kernels")
+                server_section.set_description("Kernels optimized for server use")
+                server_section.add(server_grid)
+                self.append(server_section)
+
+                dialog = Adw.MessageDialog.new(
+                    self.get_root(),
+                    "Operation Complete",
+                    f"Successfully completed operation on {kernel_name}."
+                )
+            else:
                 button.set_label("Remove")
                 button.set_sensitive(True)
                 dialog = Adw.MessageDialog.new(
                     self.get_root(),
-                    "Removal Error",
-                    f"An error occurred while removing {kernel_name}:\n{str(e)}"
+                    "Operation Failed",
+                    f"Failed to complete operation on {kernel_name}.\nError: {stderr}"
                 )
-                dialog.add_response("ok", "OK")
-                dialog.present()
+                progress_dialog.add_save_log_response(dialog)
+            dialog.add_response("ok", "OK")
+            dialog.present()
+
+        def show_error(error):
+            # Close the progress dialog first
+            progress_dialog.destroy()
+            
+            button.set_label("Remove")
+            button.set_sensitive(True)
+            dialog = Adw.MessageDialog.new(
+                self.get_root(),
+                "Removal Error",
+                f"An error occurred while removing {kernel_name}:\n{error}"
+            )
+            dialog.add_response("ok", "OK")
+            dialog.present()
 
-            GLib.idle_add(show_error)
+        def on_finished(runner):
+            channel.close()
+            if runner.error:
+                show_error(runner.error)
+            else:
+                # The rpmdb monitor may not have fired yet
+                get_package_index().invalidate()
+                update_ui(runner.success, "\n".join(runner.error_lines))
+
+        run_privileged_command(cmd, on_line=on_line, on_finished=on_finished, merge_stderr=False)
 
     def install_kernel(self, button, kernel_name, progress_dialog):
-        try:
-            cmd = ["pkexec", "dnf", "install", "-y", kernel_name]
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
+        cmd = ["dnf", "install", "-y", kernel_name]
 
-            while True:
-                line = process.stdout.readline()
-                if not line and process.poll() is not None:
-                    break
-                
-                # Update progress based on key phrases
-                if "Downloading" in line:
-                    GLib.idle_add(progress_dialog.update_progress, 0.25, "Downloading packages...")
-                elif "Dependencies resolved" in line:
-                    GLib.idle_add(progress_dialog.update_progress, 0.50, "Dependencies resolved...")
-                elif "Installing" in line:
-                    GLib.idle_add(progress_dialog.update_progress, 0.75, "Installing kernel...")
-                elif "Complete!" in line:
-                    GLib.idle_add(progress_dialog.update_progress, 1.0, "Installation complete!")
-                
-                # Update output text
-                GLib.idle_add(progress_dialog.append_output, line.strip())
+        def show_progress(fraction, status, lines):
+            if fraction is not None:
+                progress_dialog.update_progress(fraction, status)
+            if lines:
+                progress_dialog.append_lines(lines)
 
-            stdout, stderr = process.communicate()
+        # Output is applied to the dialog at most once per frame
+        channel = ProgressChannel(progress_dialog, show_progress)
 
-            def update_ui(success):
-                # Close the progress dialog first
-                progress_dialog.destroy()
-                
-                if success:
-                    # Update installed kernels list and refresh the page
-                    self.installed_kernels = self.get_installed_kernels()
-                    
-                    # Remove all children from the parent box
-                    while child := self.get_first_child():
-                        self.remove(child)
-                    
-                    # Recreate the kernel grids
-                    desktop_grid = self.create_kernel_grid([
-                        {
-                            'name': 'kernel-desktop',
-                            'description': 'Desktop kernel compiled with Clang',
-                            'compiler': 'Clang'
-                        },
-                        {
-                            'name': 'kernel-desktop-gcc',
-                            'description': 'Desktop kernel compiled with GCC',
-                            'compiler': 'GCC'
-                        },
-                        {
-                            'name': 'kernel-rc-desktop',
-                            'description': 'Release Candidate desktop kernel compiled with Clang',
-                            'compiler': 'Clang',
-                            'is_testing': True
-                        },
-                        {
-                            'name': 'kernel-rc-desktop-gcc',
-                            'description': 'Release Candidate desktop kernel compiled with GCC',
-                            'compiler': 'GCC',
-                            'is_testing': True
-                        }
-                    ])
-                    
-                    server_grid = self.create_kernel_grid([
-                        {
-                            'name': 'kernel-server',
-                            'description': 'Server kernel compiled with Clang',
-                            'compiler': 'Clang'
-                        },
-                        {
-                            'name': 'kernel-server-gcc',
-                            'description': 'Server kernel compiled with GCC',
-                            'compiler': 'GCC'
-                        },
-                        {
-                            'name': 'kernel-rc-server',
-                            'description': 'Release Candidate server kernel compiled with Clang',
-                            'compiler': 'Clang',
-                            'is_testing': True
-                        },
-                        {
-                            'name': 'kernel-rc-server-gcc',
-                            'description': 'Release Candidate server kernel compiled with GCC',
-                            'compiler': 'GCC',
-                            'is_testing': True
-                        }
-                    ])
-                    
-                    # Add page title and description
-                    title_group = Adw.PreferencesGroup()
-                    title_label = Gtk.Label()
-                    title_label.set_markup("<span size='x-large' weight='bold'>Kernel Manager</span>")
-                    title_label.set_margin_bottom(10)
-                    title_group.add(title_label)
-                    
-                    description_label = Gtk.Label(
-                        label="Manage your system kernels. You can install additional kernels or remove unused ones. "
-                              "The default system kernel cannot be removed for system stability."
-                    )
-                    description_label.set_wrap(True)
-                    description_label.set_margin_bottom(10)
-                    title_group.add(description_label)
-                    
-                    self.append(title_group)
-                    
-                    # Add desktop kernels section
-                    desktop_section = Adw.PreferencesGroup()
-                    desktop_section.set_title("Desktop Kernels")
-                    desktop_section.set_description("Kernels optimized for desktop use")
-                    desktop_section.add(desktop_grid)
-                    self.append(desktop_section)
-                    
-                    # Add server kernels section
-                    server_section = Adw.PreferencesGroup()
-                    server_section.set_title("Server Kernels")
-                    server_section.set_description("Kernels optimized for server use")
-                    server_section.add(server_grid)
-                    self.append(server_section)
-                    
-                    dialog = Adw.MessageDialog.new(
-                        self.get_root(),
-                        "Operation Complete",
-                        f"Successfully completed operation on {kernel_name}."
-                    )
-                else:
-                    button.set_label("Install")
-                    button.set_sensitive(True)
-                    dialog = Adw.MessageDialog.new(
-                        self.get_root(),
-                        "Operation Failed",
-                        f"Failed to complete operation on {kernel_name}.\nError: {stderr}"
-                    )
-                dialog.add_response("ok", "OK")
-                dialog.present()
-
-            GLib.idle_add(update_ui, process.returncode == 0)
-
-        except Exception as e:
-            def show_error():
-                # Close the progress dialog first
-                progress_dialog.destroy()
-                
+        def on_line(line, is_error):
+            # Only stdout drives the progress, stderr is reported on failure
+            if is_error:
+                return
+            # Update progress based on key phrases
+            if "Downloading" in line:
+                channel.update(0.25, "Downloading packages...")
+            elif "Dependencies resolved" in line:
+                channel.update(0.50, "Dependencies resolved...")
+            elif "Installing" in line:
+                channel.update(0.75, "Installing kernel...")
+            elif "Complete!" in line:
+                channel.update(1.0, "Installation complete!")
+
+            # Update output text
+            channel.append_line(line.strip())
+
+        def update_ui(success, stderr):
+            # Close the progress dialog first
+            progress_dialog.destroy()
+
+            if success:
+                # Update installed kernels list and refresh the page
+                self.installed_kernels = self.get_installed_kernels()
+
+                # Remove all children from the parent box
+                while child := self.get_first_child():
+                    self.remove(child)
+
+                # Recreate the kernel grids
+                desktop_grid = self.create_kernel_grid([
+                    {
+                        'name': 'kernel-desktop',
+                        'description': 'Desktop kernel compiled with Clang',
+                        'compiler': 'Clang'
+                    },
+                    {
+                        'name': 'kernel-desktop-gcc',
+                        'description': 'Desktop kernel compiled with GCC',
+                        'compiler': 'GCC'
+                    },
+                    {
+                        'name': 'kernel-rc-desktop',
+                        'description': 'Release Candidate desktop kernel compiled with Clang',
+                        'compiler': 'Clang',
+                        'is_testing': True
+                    },
+                    {
+                        'name': 'kernel-rc-desktop-gcc',
+                        'description': 'Release Candidate desktop kernel compiled with GCC',
+                        'compiler': 'GCC',
+                        'is_testing': True
+                    }
+                ])
+
+                server_grid = self.create_kernel_grid([
+                    {
+                        'name': 'kernel-server',
+                        'description': 'Server kernel compiled with Clang',
+                        'compiler': 'Clang'
+                    },
+                    {
+                        'name': 'kernel-server-gcc',
+                        'description': 'Server kernel compiled with GCC',
+                        'compiler': 'GCC'
+                    },
+                    {
+                        'name': 'kernel-rc-server',
+                        'description': 'Release Candidate server kernel compiled with Clang',
+                        'compiler': 'Clang',
+                        'is_testing': True
+                    },
+                    {
+                        'name': 'kernel-rc-server-gcc',
+                        'description': 'Release Candidate server kernel compiled with GCC',
+                        'compiler': 'GCC',
+                        'is_testing': True
+                    }
+                ])
+
+                # Add page title and description
+                title_group = Adw.PreferencesGroup()
+                title_label = Gtk.Label()
+                title_label.set_markup("<span size='x-large' weight='bold'>Kernel Manager</span>")
+                title_label.set_margin_bottom(10)
+                title_group.add(title_label)
+
+                description_label = Gtk.Label(
+                    label="Manage your system kernels. You can install additional kernels or remove unused ones. "
+                          "The default system kernel cannot be removed for system stability."
+                )
+                description_label.set_wrap(True)
+                description_label.set_margin_bottom(10)
+                title_group.add(description_label)
+
+                self.append(title_group)
+
+                # Add desktop kernels section
+                desktop_section = Adw.PreferencesGroup()
+                desktop_section.set_title("Desktop Kernels")
+                desktop_section.set_description("Kernels optimized for desktop use")
+                desktop_section.add(desktop_grid)
+                self.append(desktop_section)
+
+                # Add server kernels section
+                server_section = Adw.PreferencesGroup()
+                server_section.set_title("Server Kernels")
+                server_section.set_description("Kernels optimized for server use")
+                server_section.add(server_grid)
+                self.append(server_section)
+
+                dialog = Adw.MessageDialog.new(
+                    self.get_root(),
+                    "Operation Complete",
+                    f"Successfully completed operation on {kernel_name}."
+                )
+            else:
                 button.set_label("Install")
                 button.set_sensitive(True)
                 dialog = Adw.MessageDialog.new(
                     self.get_root(),
-                    "Installation Error",
-                    f"An error occurred while installing {kernel_name}:\n{str(e)}"
+                    "Operation Failed",
+                    f"Failed to complete operation on {kernel_name}.\nError: {stderr}"
                 )
-                dialog.add_response("ok", "OK")
-                dialog.present()
+                progress_dialog.add_save_log_response(dialog)
+            dialog.add_response("ok", "OK")
+            dialog.present()
+
+        def show_error(error):
+            # Close the progress dialog first
+            progress_dialog.destroy()
+            
+            button.set_label("Install")
+            button.set_sensitive(True)
+            dialog = Adw.MessageDialog.new(
+                self.get_root(),
+                "Installation Error",
+                f"An error occurred while installing {kernel_name}:\n{error}"
+            )
+            dialog.add_response("ok", "OK")
+            dialog.present()
+
+        def on_finished(runner):
+            channel.close()
+            if runner.error:
+                show_error(runner.error)
+            else:
+                # The rpmdb monitor may not have fired yet
+                get_package_index().invalidate()
+                update_ui(runner.success, "\n".join(runner.error_lines))
+
+        run_privileged_command(cmd, on_line=on_line, on_finished=on_finished, merge_stderr=False)
 
-            GLib.idle_add(show_error)
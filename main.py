@@ -5,13 +5,8 @@ import gi
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
 from gi.repository import Gtk, Adw, Gdk, GLib, Gio, GObject
-from system import SystemPage
-from software import SoftwarePage
-from users import UsersPage
-from network import NetworkPage
-from services import ServicesPage
-from security import SecurityPage
-from hardware import HardwarePage
+from page_registry import PageRegistry
+from package_index import get_package_index
 
 class ControlCenterWindow(Adw.ApplicationWindow):
     def __init__(self, *args, **kwargs):
@@ -39,25 +34,38 @@ class ControlCenterWindow(Adw.ApplicationWindow):
         self.main_page = self.create_main_page()
         self.stack.add_named(self.main_page, "main")
         
-        # Create and add system page
-        self.system_page = SystemPage()
-        self.stack.add_named(self.system_page, "system")
-        
-        # Create and add software page
-        self.software_page = SoftwarePage()
-        self.stack.add_named(self.software_page, "software")
-        
-        # Create and add users page
-        self.users_page = UsersPage()
-        self.stack.add_named(self.users_page, "users")
-        
-        # Create and add network page
-        self.network_page = NetworkPage()
-        self.stack.add_named(self.network_page, "network")
+        # Category pages are imported and created on first use
+        self.pages = PageRegistry(self.stack, self)
+        self.register_pages()
         
         self.main_box.append(self.stack)
         self.set_content(self.main_box)
     
+    def register_pages(self):
+        self.pages.register("System", "system", "system",
+                            lambda module, parent: module.SystemPage(),
+                            on_show=lambda page: page.show_main())  # Always show main system page when entering System category
+        self.pages.register("Software", "software", "software",
+                            lambda module, parent: module.SoftwarePage(),
+                            on_show=lambda page: page.show_main())
+        self.pages.register("Network", "network", "network",
+                            lambda module, parent: module.NetworkPage())
+        self.pages.register("Users", "users", "users",
+                            lambda module, parent: module.UsersPage())
+        self.pages.register("Services", "services", "services",
+                            lambda module, parent: module.ServicesPage())
+        self.pages.register("Security", "security", "security",
+                            lambda module, parent: module.SecurityPage())
+        self.pages.register("Hardware", "hardware", "hardware",
+                            lambda module, parent: module.HardwarePage(parent),
+                            on_show=lambda page: page.stack.set_visible_child_name("main"))  # Always show hardware main page
+    
+    def prewarm_pages(self):
+        # Import the most used page modules once the window is on screen
+        self.pages.prewarm(["System", "Software"])
+        # Installed package lookups are answered from the index once it is loaded
+        get_package_index().preload()
+    
     def create_main_page(self):
         page = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
         
@@ -145,39 +153,8 @@ class ControlCenterWindow(Adw.ApplicationWindow):
         return button
 
     def on_category_clicked(self, button, category):
-        if category == "System":
-            self.stack.set_visible_child_name("system")
-            system_page = self.stack.get_visible_child()
-            system_page.show_main()  # Always show main system page when entering System category
-            self.back_button.set_visible(True)
-        elif category == "Software":
-            self.software_page.show_main()
-            self.stack.set_visible_child_name("software")
-            self.back_button.set_visible(True)
-        elif category == "Network":
-            self.stack.set_visible_child_name("network")
-            self.back_button.set_visible(True)
-        elif category == "Users":
-            self.stack.set_visible_child_name("users")
-            self.back_button.set_visible(True)
-        elif category == "Services":
-            if not hasattr(self, 'services_page'):
-                self.services_page = ServicesPage()
-                self.stack.add_named(self.services_page, "services")
-            self.stack.set_visible_child_name("services")
-            self.back_button.set_visible(True)
-        elif category == "Security":
-            if not hasattr(self, 'security_page'):
-                self.security_page = SecurityPage()
-                self.stack.add_named(self.security_page, "security")
-            self.stack.set_visible_child_name("security")
-            self.back_button.set_visible(True)
-        elif category == "Hardware":
-            if not hasattr(self, 'hardware_page'):
-                self.hardware_page = HardwarePage(self)
-                self.stack.add_named(self.hardware_page, "hardware")
-            self.hardware_page.stack.set_visible_child_name("main")  # Always show hardware main page
-            self.stack.set_visible_child_name("hardware")
+        if self.pages.has(category):
+            self.pages.show(category)
             self.back_button.set_visible(True)
         else:
             dialog = Adw.MessageDialog.new(
@@ -189,20 +166,17 @@ class ControlCenterWindow(Adw.ApplicationWindow):
             dialog.present()
     
     def on_back_clicked(self, button):
-        if isinstance(self.stack.get_visible_child(), SystemPage):
-            system_page = self.stack.get_visible_child()
-            if system_page.stack.get_visible_child_name() == "system_info":
-                system_page.show_main()  # Go back to system main page
+        page_name = self.stack.get_visible_child_name()
+        page = self.stack.get_visible_child()
+        if page_name == "system":
+            if page.stack.get_visible_child_name() == "system_info":
+                page.show_main()  # Go back to system main page
             else:
                 self.stack.set_visible_child_name("main")  # Go back to main menu
                 self.back_button.set_visible(False)
-        elif isinstance(self.stack.get_visible_child(), SoftwarePage):
-            self.stack.set_visible_child_name("main")  # Go back to main menu
-            self.back_button.set_visible(False)
-        elif isinstance(self.stack.get_visible_child(), HardwarePage):
-            hardware_page = self.stack.get_visible_child()
-            if hardware_page.stack.get_visible_child_name() != "main":
-                hardware_page.stack.set_visible_child_name("main")  # Go back to hardware main page
+        elif page_name == "hardware":
+            if page.stack.get_visible_child_name() != "main":
+                page.stack.set_visible_child_name("main")  # Go back to hardware main page
             else:
                 self.stack.set_visible_child_name("main")  # Go back to main menu
                 self.back_button.set_visible(False)
@@ -219,6 +193,7 @@ class ControlCenterApp(Adw.Application):
     def on_activate(self, app):
         self.win = ControlCenterWindow(application=app)
         self.win.present()
+        self.win.prewarm_pages()
 
 def main():
     app = ControlCenterApp(application_id="org.tearsofmandrake.controlcenter")
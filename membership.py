@@ -0,0 +1,52 @@
+import grp
+from privileged_helper import HelperError, run_operations, operation
+
+def diff_members(current, desired):
+    current, desired = set(current), set(desired)
+    return sorted(desired - current), sorted(current - desired)
+
+class MembershipPlan:
+    """Collects user and group changes and applies them as one helper batch.
+
+    Membership edits are reduced to the minimal diff, every changed group or user
+    becomes a single gpasswd -M or usermod -G, and the result is checked with one
+    read of the group database afterwards.
+    """
+
+    def __init__(self):
+        self.operations = []
+        # (group, username, is_member) pairs that must hold once applied
+        self.expected = []
+
+    def add(self, op):
+        self.operations.append(op)
+
+    def set_group_members(self, group, current, desired):
+        added, removed = diff_members(current, desired)
+        if not added and not removed:
+            return
+        self.operations.append(operation('set_group_members', group=group, members=sorted(set(desired))))
+        self.expected += [(group, user, True) for user in added]
+        self.expected += [(group, user, False) for user in removed]
+
+    def set_user_groups(self, username, current, desired):
+        added, removed = diff_members(current, desired)
+        if not added and not removed:
+            return
+        self.operations.append(operation('set_user_groups', username=username, groups=sorted(set(desired))))
+        self.expected += [(group, username, True) for group in added]
+        self.expected += [(group, username, False) for group in removed]
+
+    def apply(self):
+        run_operations(*self.operations)
+        self.verify()
+
+    def verify(self):
+        if not self.expected:
+            return
+        members = {group.gr_name: set(group.gr_mem) for group in grp.getgrall()}
+        wrong = [f"{user} in {group}" if is_member else f"{user} not in {group}"
+                 for group, user, is_member in self.expected
+                 if (user in members.get(group, ())) != is_member]
+        if wrong:
+            raise HelperError("Membership was not applied: expected " + ", ".join(wrong))
@@ -0,0 +1,313 @@
+import re
+import ssl
+import sys
+import asyncio
+import platform
+import urllib.parse
+
+USER_AGENT = "tears-of-mandrake"
+
+# Small file every repository has, only the first RANGE_BYTES are fetched
+PROBE_FILE = "repodata/repomd.xml"
+RANGE_BYTES = 16384
+
+PROBE_TIMEOUT = 10.0
+MAX_PARALLEL = 8
+
+# Used when neither the mirror list nor the repo files name a mirror
+DEFAULT_MIRRORS = ["http://abf-downloads.openmandriva.org/"]
+
+# "cooker/repository/x86_64/main/release/" at the end of a repository URL,
+# everything before it is the mirror root
+REPO_PATH = re.compile(r'[^/]+/repository/[^/]+/[^/]+/[^/]+/?$')
+
+class MirrorResult:
+    def __init__(self, root):
+        self.root = root
+        self.connect_time = None
+        self.first_byte_time = None
+        self.total_time = None
+        self.size = 0
+        self.error = None
+
+    @property
+    def host(self):
+        return urllib.parse.urlsplit(self.root).hostname or self.root
+
+    @property
+    def throughput(self):
+        # Bytes per second of the body transfer
+        if self.error or self.total_time is None or self.first_byte_time is None:
+            return None
+        transfer = self.total_time - self.first_byte_time
+        return self.size / transfer if transfer > 0 else None
+
+    @property
+    def score(self):
+        # Lower is better, failed mirrors sort last
+        if self.error or self.total_time is None:
+            return float('inf')
+        return self.total_time
+
+def split_mirror(url):
+    # Returns (root, repository path) or None if the URL has no known layout
+    url = url.strip()
+    if not url.endswith('/'):
+        url += '/'
+    match = REPO_PATH.search(url)
+    if not match:
+        return None
+    return url[:match.start()], match.group(0)
+
+def repo_path(repo):
+    # Path of a repository below the mirror root, from its baseurl or from the
+    # query of its OpenMandriva mirror list
+    arch = platform.machine()
+    baseurl = (repo.baseurl or "").replace("$basearch", arch).replace("$arch", arch)
+    parts = split_mirror(baseurl) if baseurl else None
+    if parts:
+        return parts[1]
+    if repo.mirrorlist:
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(repo.mirrorlist).query)
+        values = [query.get(key, [""])[0] for key in ("platform", "arch", "repo", "release")]
+        if all(values):
+            values[1] = values[1].replace("$basearch", arch)
+            return f"{values[0]}/repository/{values[1]}/{values[2]}/{values[3]}/"
+    return None
+
+def _request(host, path, byte_range=None):
+    # HTTP/1.0 keeps the response free of chunked encoding
+    lines = [f"GET {path} HTTP/1.0", f"Host: {host}", f"User-Agent: {USER_AGENT}",
+             "Connection: close"]
+    if byte_range:
+        lines.append(f"Range: bytes=0-{byte_range - 1}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+async def _open(url):
+    # Returns (reader, writer, seconds for the TCP connect alone)
+    parts = urllib.parse.urlsplit(url)
+    secure = parts.scheme == "https"
+    port = parts.port or (443 if secure else 80)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    reader, writer = await asyncio.open_connection(parts.hostname, port)
+    connect_time = loop.time() - start
+    if secure:
+        await writer.start_tls(ssl.create_default_context(), server_hostname=parts.hostname)
+    return reader, writer, connect_time
+
+async def _read_status(reader):
+    status_line = await reader.readline()
+    fields = status_line.decode('latin-1').split(None, 2)
+    if len(fields) < 2 or not fields[0].startswith("HTTP/") or not fields[1].isdigit():
+        raise ConnectionError("Malformed HTTP response")
+    return int(fields[1])
+
+async def _read_body(reader, status, limit=None):
+    # Skips the headers, a redirect counts as a failure since mirrors are compared as given
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+    if status not in (200, 206):
+        raise ConnectionError(f"HTTP {status}")
+    body = b""
+    while limit is None or len(body) < limit:
+        chunk = await reader.read(65536)
+        if not chunk:
+            break
+        body += chunk
+    return body[:limit] if limit else body
+
+async def probe_mirror(root, path, timeout=PROBE_TIMEOUT):
+    result = MirrorResult(root)
+    url = urllib.parse.urljoin(root, path + PROBE_FILE)
+    parts = urllib.parse.urlsplit(url)
+    loop = asyncio.get_running_loop()
+    writer = None
+
+    async def run():
+        nonlocal writer
+        start = loop.time()
+        reader, writer, result.connect_time = await _open(url)
+        writer.write(_request(parts.netloc, parts.path, RANGE_BYTES))
+        await writer.drain()
+        status = await _read_status(reader)
+        result.first_byte_time = loop.time() - start
+        result.size = len(await _read_body(reader, status, RANGE_BYTES))
+        result.total_time = loop.time() - start
+
+    try:
+        await asyncio.wait_for(run(), timeout)
+        if result.size == 0:
+            raise ConnectionError("Empty response")
+    except asyncio.TimeoutError:
+        result.error = "Timed out"
+    except (OSError, ConnectionError, ValueError) as e:
+        result.error = str(e) or e.__class__.__name__
+    finally:
+        if writer:
+            writer.close()
+    return result
+
+async def fetch_mirrorlist(url, timeout=PROBE_TIMEOUT):
+    # Mirror roots named by a mirror list, one repository URL per line
+    parts = urllib.parse.urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    reader, writer, _ = await asyncio.wait_for(_open(url), timeout)
+    try:
+        writer.write(_request(parts.netloc, path))
+        await writer.drain()
+        body = await asyncio.wait_for(_read_body(reader, await _read_status(reader)), timeout)
+    finally:
+        writer.close()
+    roots = []
+    for line in body.decode('utf-8', 'replace').splitlines():
+        line = line.strip()
+        if line.startswith(("http://", "https://")):
+            parts = split_mirror(line)
+            if parts and parts[0] not in roots:
+                roots.append(parts[0])
+    return roots
+
+async def find_mirrors(repositories):
+    # Candidate roots from the current baseurls and from each distinct mirror list
+    roots = []
+    mirrorlists = []
+    for repo in repositories:
+        parts = split_mirror(repo.baseurl) if repo.baseurl else None
+        if parts and parts[0] not in roots:
+            roots.append(parts[0])
+        if repo.mirrorlist and repo.mirrorlist not in mirrorlists:
+            mirrorlists.append(repo.mirrorlist)
+    results = await asyncio.gather(*(fetch_mirrorlist(url) for url in mirrorlists),
+                                   return_exceptions=True)
+    for url, result in zip(mirrorlists, results):
+        if isinstance(result, Exception):
+            print(f"Error fetching mirror list {url}: {result}")
+            continue
+        roots.extend(root for root in result if root not in roots)
+    return roots or list(DEFAULT_MIRRORS)
+
+async def benchmark(roots, path, on_result=None, timeout=PROBE_TIMEOUT, parallel=MAX_PARALLEL):
+    # Probes every root concurrently and returns the results ranked best first.
+    # on_result(result) is called as each probe finishes.
+    semaphore = asyncio.Semaphore(parallel)
+
+    async def limited(root):
+        async with semaphore:
+            result = await probe_mirror(root, path, timeout)
+        if on_result:
+            on_result(result)
+        return result
+
+    results = await asyncio.gather(*(limited(root) for root in roots))
+    return sorted(results, key=lambda result: result.score)
+
+def pin_changes(repositories, root):
+    # Changes for RepositoryState.update() that point every repository with a
+    # known layout at root. The mirror list is commented out so dnf keeps to it.
+    if not root.endswith('/'):
+        root += '/'
+    changes = {}
+    for repo in repositories:
+        path = repo_path(repo)
+        if path:
+            options = {'baseurl': root + path}
+            if repo.mirrorlist:
+                options['mirrorlist'] = None
+            changes[repo.id] = options
+    return changes
+
+class FakeMirror:
+    """Local HTTP stand-in for a mirror, for trying the benchmark without a network.
+
+    Serves fake metadata for any path after waiting delay seconds, at most rate
+    bytes per second, or answers with status instead if it is not 200.
+    """
+
+    def __init__(self, delay=0.0, rate=None, status=200, size=RANGE_BYTES * 4):
+        self.delay = delay
+        self.rate = rate
+        self.status = status
+        self.content = (b'<?xml version="1.0" encoding="UTF-8"?>\n<repomd>\n'
+                        + b'  <data type="primary"/>\n' * (size // 26) + b'</repomd>\n')
+        self.server = None
+
+    async def start(self, host="127.0.0.1"):
+        self.server = await asyncio.start_server(self._handle, host, 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}/"
+
+    def close(self):
+        if self.server:
+            self.server.close()
+
+    async def _handle(self, reader, writer):
+        byte_range = None
+        try:
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                match = re.match(rb'Range:\s*bytes=(\d+)-(\d*)', line, re.IGNORECASE)
+                if match:
+                    byte_range = (int(match.group(1)), int(match.group(2) or len(self.content) - 1))
+            await asyncio.sleep(self.delay)
+            if self.status != 200:
+                writer.write(f"HTTP/1.0 {self.status} Error\r\n\r\n".encode())
+                return
+            body = self.content[byte_range[0]:byte_range[1] + 1] if byte_range else self.content
+            status = "206 Partial Content" if byte_range else "200 OK"
+            writer.write(f"HTTP/1.0 {status}\r\nContent-Length: {len(body)}\r\n\r\n".encode())
+            chunk_size = 4096
+            for offset in range(0, len(body), chunk_size):
+                writer.write(body[offset:offset + chunk_size])
+                await writer.drain()
+                if self.rate:
+                    await asyncio.sleep(chunk_size / self.rate)
+        except (OSError, ConnectionError):
+            pass
+        finally:
+            await writer.drain()
+            writer.close()
+
+def format_result(result):
+    if result.error:
+        return f"{result.root:<45} failed: {result.error}"
+    throughput = result.throughput
+    speed = f"{throughput / 1024:8.1f} KiB/s" if throughput else "       n/a"
+    return (f"{result.root:<45} connect {result.connect_time * 1000:6.1f} ms  "
+            f"first byte {result.first_byte_time * 1000:6.1f} ms  {speed}")
+
+async def _demo():
+    # Fake mirrors with different latency and bandwidth, and one that fails
+    profiles = [(0.2, 64 * 1024, 200), (0.0, None, 200), (0.05, 256 * 1024, 200),
+                (0.5, None, 200), (0.0, None, 404)]
+    mirrors = [FakeMirror(delay, rate, status) for delay, rate, status in profiles]
+    roots = [await mirror.start() for mirror in mirrors]
+    try:
+        return await benchmark(roots, "cooker/repository/x86_64/main/release/")
+    finally:
+        for mirror in mirrors:
+            mirror.close()
+
+async def _benchmark_system(urls):
+    from repo_metadata import list_repositories
+    repositories = [repo for repo in list_repositories() if repo.enabled]
+    paths = [path for path in (repo_path(repo) for repo in repositories) if path]
+    if not paths:
+        print("No repository with a known mirror layout is enabled")
+        return []
+    roots = urls or await find_mirrors(repositories)
+    return await benchmark(roots, paths[0])
+
+if __name__ == '__main__':
+    # python3 mirror_bench.py --demo       benchmark local fake mirrors
+    # python3 mirror_bench.py [root ...]   benchmark the given or configured mirrors
+    if '--demo' in sys.argv:
+        ranked = asyncio.run(_demo())
+    else:
+        ranked = asyncio.run(_benchmark_system(sys.argv[1:]))
+    for position, result in enumerate(ranked, 1):
+        print(f"{position}. {format_result(result)}")
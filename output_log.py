@@ -0,0 +1,110 @@
+import gi
+import shutil
+import tempfile
+
+gi.require_version('Gtk', '4.0')
+from gi.repository import Gtk, GLib, Pango
+
+# Number of lines kept in memory and shown, older lines are only in the spool file
+DEFAULT_MAX_LINES = 2000
+
+class OutputLog:
+    """Ring buffer of command output backed by a Gtk.StringList.
+
+    Only the last max_lines lines are kept in the model, every line is also
+    written to an anonymous spool file so the full log can still be saved.
+    """
+
+    def __init__(self, max_lines=DEFAULT_MAX_LINES):
+        self.max_lines = max_lines
+        self.model = Gtk.StringList()
+        self.total_lines = 0
+        self._spool = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
+
+    def append_lines(self, lines):
+        if not lines:
+            return
+        if self._spool:
+            self._spool.write("\n".join(lines) + "\n")
+        self.total_lines += len(lines)
+
+        # Lines that would be dropped straight away are never added to the model
+        lines = lines[-self.max_lines:]
+        excess = self.model.get_n_items() + len(lines) - self.max_lines
+        if excess > 0:
+            self.model.splice(0, excess, [])
+        self.model.splice(self.model.get_n_items(), 0, lines)
+
+    @property
+    def dropped_lines(self):
+        return self.total_lines - self.model.get_n_items()
+
+    def save_to(self, path):
+        # Copy the spool in chunks instead of building the whole log in memory
+        self._spool.flush()
+        self._spool.seek(0)
+        with open(path, 'w', encoding='utf-8') as f:
+            shutil.copyfileobj(self._spool, f)
+        self._spool.seek(0, 2)
+
+    def close(self):
+        if self._spool:
+            self._spool.close()
+            self._spool = None
+
+class OutputLogView(Gtk.ScrolledWindow):
+    def __init__(self, log):
+        super().__init__()
+        self.log = log
+        self.set_vexpand(True)
+
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self._on_setup)
+        factory.connect("bind", self._on_bind)
+
+        # Only the rows on screen get a widget, however long the log is
+        self.list_view = Gtk.ListView(model=Gtk.NoSelection(model=log.model), factory=factory)
+        self.list_view.add_css_class('monospace')
+        self.set_child(self.list_view)
+
+        self._follow = True
+        self.get_vadjustment().connect("value-changed", self._on_scrolled)
+        log.model.connect("items-changed", self._on_items_changed)
+
+    def _on_setup(self, factory, list_item):
+        label = Gtk.Label()
+        label.set_halign(Gtk.Align.START)
+        label.set_xalign(0)
+        label.set_wrap(True)
+        label.set_wrap_mode(Pango.WrapMode.WORD_CHAR)
+        label.set_selectable(True)
+        list_item.set_child(label)
+
+    def _on_bind(self, factory, list_item):
+        list_item.get_child().set_label(list_item.get_item().get_string())
+
+    def _on_scrolled(self, adjustment):
+        # Keep following new output only while the view is at the bottom
+        bottom = adjustment.get_upper() - adjustment.get_page_size()
+        self._follow = adjustment.get_value() >= bottom - 1
+
+    def _on_items_changed(self, model, position, removed, added):
+        n_items = model.get_n_items()
+        if added and self._follow and n_items:
+            self.list_view.scroll_to(n_items - 1, Gtk.ListScrollFlags.NONE, None)
+
+def save_log_dialog(parent, log, filename="output.log"):
+    dialog = Gtk.FileDialog(title="Save Full Log", initial_name=filename)
+
+    def on_save(dialog, result):
+        try:
+            file = dialog.save_finish(result)
+        except GLib.Error:
+            # Dialog was dismissed
+            return
+        try:
+            log.save_to(file.get_path())
+        except OSError as e:
+            print(f"Error saving log: {e}")
+
+    dialog.save(parent, None, on_save)
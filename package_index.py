@@ -0,0 +1,139 @@
+import subprocess
+import threading
+from gi.repository import Gio, GLib
+
+RPMDB_DIR = '/var/lib/rpm'
+
+# One line per package: name, version and every capability it provides
+QUERY_FORMAT = '%{NAME}\t%{VERSION}-%{RELEASE}.%{ARCH}\t[%{PROVIDENAME}\t]\n'
+
+class PackageIndex:
+    """Installed packages loaded from a single rpm query.
+
+    Lookups are dictionary hits. The index is marked stale whenever the rpm
+    database directory changes and is only reloaded on the next lookup.
+    """
+
+    def __init__(self):
+        self._packages = {}
+        self._provides = {}
+        self._loaded = False
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._monitor = None
+        self._callbacks = []
+
+    def _load(self):
+        generation = self._generation
+        packages = {}
+        provides = {}
+        try:
+            result = subprocess.run(
+                ["rpm", "-qa", "--qf", QUERY_FORMAT],
+                capture_output=True,
+                text=True,
+                timeout=60
+            )
+            lines = result.stdout.splitlines()
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"Error reading rpm database: {e}")
+            lines = []
+
+        for line in lines:
+            fields = line.rstrip('\t').split('\t')
+            if len(fields) < 2:
+                continue
+            name, version = fields[0], fields[1]
+            packages.setdefault(name, []).append(version)
+            for capability in fields[2:]:
+                provides.setdefault(capability, set()).add(name)
+
+        self._packages = packages
+        self._provides = provides
+        # After an invalidation during the query the result may already be
+        # outdated, it is used for now and replaced on the next lookup
+        self._loaded = generation == self._generation
+
+    def _watch(self):
+        # Monitor signals are delivered on the main loop
+        if self._monitor is None:
+            try:
+                self._monitor = Gio.File.new_for_path(RPMDB_DIR).monitor_directory(
+                    Gio.FileMonitorFlags.NONE, None)
+                self._monitor.connect("changed", self._on_rpmdb_changed)
+            except GLib.Error as e:
+                print(f"Error monitoring rpm database: {e.message}")
+        return False
+
+    def _on_rpmdb_changed(self, monitor, file, other_file, event_type):
+        self.invalidate()
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                if self._monitor is None:
+                    GLib.idle_add(self._watch)
+
+    def invalidate(self):
+        self._generation += 1
+        self._loaded = False
+
+    def preload(self):
+        # Load the index in the background so the first lookup does not block
+        thread = threading.Thread(target=self._load_in_background)
+        thread.daemon = True
+        thread.start()
+
+    def _load_in_background(self):
+        self._ensure_loaded()
+        GLib.idle_add(self._run_callbacks)
+
+    def _run_callbacks(self):
+        if not self._callbacks:
+            return False
+        if not self._loaded:
+            # Invalidated again meanwhile, callbacks must not block on a reload
+            self.preload()
+            return False
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+        return False
+
+    def when_loaded(self, callback):
+        # callback() runs on the main loop as soon as lookups do not block,
+        # right away if the index is loaded already
+        if self._loaded:
+            callback()
+            return
+        self._callbacks.append(callback)
+        if len(self._callbacks) == 1:
+            self.preload()
+
+    def is_installed(self, name):
+        self._ensure_loaded()
+        return name in self._packages
+
+    def provides(self, capability):
+        self._ensure_loaded()
+        return capability in self._packages or capability in self._provides
+
+    def versions(self, name):
+        self._ensure_loaded()
+        return list(self._packages.get(name, []))
+
+    def names(self, prefix=""):
+        self._ensure_loaded()
+        return [name for name in self._packages if name.startswith(prefix)]
+
+_index = None
+
+def get_package_index():
+    global _index
+    if _index is None:
+        _index = PackageIndex()
+    return _index
+
+def is_installed(name):
+    return get_package_index().is_installed(name)
@@ -0,0 +1,79 @@
+import importlib
+from gi.repository import GLib
+
+class PageEntry:
+    def __init__(self, name, module_path, factory, on_show=None):
+        self.name = name                # Name of the page in the stack
+        self.module_path = module_path  # Module imported on first use
+        self.factory = factory          # Called as factory(module, parent) to build the page
+        self.on_show = on_show          # Optional hook called every time the page is shown
+
+class PageRegistry:
+    """Maps categories to page modules that are imported and built on first use."""
+
+    def __init__(self, stack, parent=None):
+        self.stack = stack
+        self.parent = parent
+        self._entries = {}
+        self._pages = {}
+        self._prewarm_queue = []
+        self._prewarm_source = None
+
+    def register(self, category, name, module_path, factory, on_show=None):
+        self._entries[category] = PageEntry(name, module_path, factory, on_show)
+
+    def has(self, category):
+        return category in self._entries
+
+    def is_loaded(self, category):
+        return category in self._pages
+
+    def get_page(self, category):
+        if category in self._pages:
+            return self._pages[category]
+
+        entry = self._entries[category]
+        module = importlib.import_module(entry.module_path)
+        page = entry.factory(module, self.parent)
+        self.stack.add_named(page, entry.name)
+        self._pages[category] = page
+        return page
+
+    def show(self, category):
+        page = self.get_page(category)
+        entry = self._entries[category]
+        if entry.on_show:
+            entry.on_show(page)
+        self.stack.set_visible_child_name(entry.name)
+        return page
+
+    def prewarm(self, categories=None, construct=False):
+        # Import (and optionally build) pages one at a time from idle callbacks
+        # so the first frame is never delayed by this work
+        if categories is None:
+            categories = list(self._entries)
+        self._prewarm_queue.extend(
+            (category, construct) for category in categories if category in self._entries
+        )
+        if self._prewarm_source is None and self._prewarm_queue:
+            self._prewarm_source = GLib.idle_add(self._prewarm_next, priority=GLib.PRIORITY_LOW)
+
+    def _prewarm_next(self):
+        while self._prewarm_queue:
+            category, construct = self._prewarm_queue.pop(0)
+            if self.is_loaded(category):
+                continue
+            try:
+                if construct:
+                    self.get_page(category)
+                else:
+                    importlib.import_module(self._entries[category].module_path)
+            except Exception as e:
+                print(f"Error pre-warming {category} page: {e}")
+            # Handle one page per idle iteration to keep the UI responsive
+            if self._prewarm_queue:
+                return True
+            break
+
+        self._prewarm_source = None
+        return False
@@ -1,12 +1,14 @@
 import gi
 import subprocess
 import os
-import threading
+from collections import deque
 from pathlib import Path
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
-from gi.repository import Gtk, Adw, GLib
-import tempfile
+from gi.repository import Gtk, Adw
+from progress_channel import ProgressChannel
+from command_runner import run_privileged_command
+from package_index import get_package_index, is_installed
 
 ICONS_DIR = "/usr/share/tears-of-mandrake/images"
 
@@ -19,6 +21,15 @@ class Application:
         # If no icon_name provided, use package name as icon name
         self.icon_name = icon_name if icon_name else package
 
+def match_package(line, packages):
+    # dnf prints packages as name-[epoch:]version-release.arch
+    for token in line.split():
+        for package in packages:
+            prefix = package + "-"
+            if token.startswith(prefix) and token[len(prefix):len(prefix) + 1].isdigit():
+                return package
+    return None
+
 class Category:
     def __init__(self, name, icon_name, applications):
         self.name = name
@@ -29,6 +40,11 @@ class PopularAppsPage(Gtk.Box):
     def __init__(self):
         super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=10)
         
+        # Apps ticked for installation, package name -> (app, row)
+        self.cart = {}
+        # Every app row, their buttons are set once the package index is loaded
+        self.rows = []
+        
         # Add page title and description
         title_group = Adw.PreferencesGroup()
         title_label = Gtk.Label()
@@ -204,6 +220,27 @@ class PopularAppsPage(Gtk.Box):
 
         scrolled.set_child(main_box)
         self.append(scrolled)
+        
+        # Cart bar, apps ticked in any category are installed together
+        self.cart_bar = Gtk.ActionBar()
+        self.cart_label = Gtk.Label()
+        self.cart_bar.pack_start(self.cart_label)
+        
+        clear_button = Gtk.Button(label="Clear")
+        clear_button.connect('clicked', self.on_cart_clear_clicked)
+        self.cart_bar.pack_end(clear_button)
+        
+        install_selected_button = Gtk.Button(label="Install Selected")
+        install_selected_button.add_css_class('suggested-action')
+        install_selected_button.connect('clicked', self.on_cart_install_clicked)
+        self.cart_bar.pack_end(install_selected_button)
+        
+        self.cart_bar.set_revealed(False)
+        self.append(self.cart_bar)
+        
+        # Rows stay pending until the index is loaded, rpm is never queried
+        # on the main thread
+        get_package_index().when_loaded(self.update_row_states)
 
     def _add_category(self, main_box, category_name, applications):
         category_group = Adw.PreferencesGroup()
@@ -241,41 +278,186 @@ class PopularAppsPage(Gtk.Box):
         app_icon.set_pixel_size(32)
         row.add_prefix(app_icon)
         
-        # Check if app is installed
-        is_installed = os.path.exists(app.binary_path) if app.binary_path else False
-        
-        # Add button
-        if is_installed:
-            if app.binary_path:  # Only add Launch button if there's a binary path
-                button = Gtk.Button(label="Launch")
-                button.add_css_class('success')
-                button.connect('clicked', self.launch_application, app.binary_path)
-            else:
-                button = Gtk.Button(label="Installed")
-                button.set_sensitive(False)
-        else:
-            button = Gtk.Button(label="Install")
-            button.add_css_class('suggested-action')
-            button.connect('clicked', self.install_package, app.package, app.name, app.binary_path)
+        # Tick to add the app to the install cart, only shown while the
+        # package is not installed
+        cart_check = Gtk.CheckButton()
+        cart_check.set_tooltip_text("Add to install selection")
+        cart_check.set_valign(Gtk.Align.CENTER)
+        cart_check.set_visible(False)
+        cart_check.connect('toggled', self.on_cart_toggled, app, row)
+        row.add_suffix(cart_check)
+        row.cart_check = cart_check
         
+        # Pending until update_row_states() knows whether the app is installed
+        button = Gtk.Button(label="Checking...")
+        button.set_sensitive(False)
+        row.button = button
+        row.button_handler = None
         row.add_suffix(button)
+        row.app = app
+        self.rows.append(row)
         category_group.add(row)
 
+    def update_row_states(self):
+        for row in self.rows:
+            if is_installed(row.app.package):
+                self.set_row_installed(row, row.app)
+            else:
+                row.button.add_css_class('suggested-action')
+                self.set_row_button(row, "Install", self.install_package, row)
+                row.cart_check.set_visible(True)
+
+    def set_row_button(self, row, label, handler=None, *args):
+        # Points the row button at a new action, without one it is insensitive
+        if row.button_handler:
+            row.button.disconnect(row.button_handler)
+            row.button_handler = None
+        row.button.set_label(label)
+        row.button.set_sensitive(handler is not None)
+        if handler:
+            row.button_handler = row.button.connect('clicked', handler, *args)
+
+    def on_cart_toggled(self, check, app, row):
+        if check.get_active():
+            self.cart[app.package] = (app, row)
+        else:
+            self.cart.pop(app.package, None)
+        self.update_cart_bar()
+
+    def update_cart_bar(self):
+        count = len(self.cart)
+        self.cart_label.set_label(f"{count} application{'s' if count != 1 else ''} selected")
+        self.cart_bar.set_revealed(count > 0)
+
+    def on_cart_clear_clicked(self, button):
+        for app, row in list(self.cart.values()):
+            row.cart_check.set_active(False)
+
+    def set_row_installed(self, row, app):
+        # Replace the Install button once the package is on the system, the
+        # app also leaves the cart
+        if row.cart_check:
+            row.cart_check.set_active(False)
+            row.remove(row.cart_check)
+            row.cart_check = None
+        row.button.remove_css_class('suggested-action')
+        # Subpackages or a moved binary leave nothing to launch
+        if app.binary_path and os.path.exists(app.binary_path):
+            row.button.add_css_class('success')
+            self.set_row_button(row, "Launch", self.launch_application, app.binary_path)
+        else:
+            self.set_row_button(row, "Installed")
+
+    def mark_installed(self, package):
+        # Several apps can share a package, e.g. WINE and Proton
+        for row in self.rows:
+            if row.app.package == package:
+                self.set_row_installed(row, row.app)
+
     def launch_application(self, button, binary_path):
         try:
             subprocess.Popen([binary_path])
         except Exception as e:
             self.show_error_dialog("Launch Error", f"Failed to launch application.\nError: {str(e)}")
 
-    def install_package(self, button, package_name, app_name, binary_path=None):
+    def install_package(self, button, row):
+        app_name = row.app.name
         button.set_sensitive(False)
         button.set_label("Installing...")
+        # Installed on its own, it must not be installed again from the cart
+        row.cart_check.set_active(False)
+        row.cart_check.set_sensitive(False)
+
+        def show_success_dialog():
+            success_dialog = Adw.MessageDialog.new(
+                self.get_root(),
+                "Installation Complete",
+                f"{app_name} has been successfully installed!"
+            )
+            success_dialog.add_response("ok", "OK")
+            success_dialog.present()
+
+        def on_finished(runner):
+            if runner.success:
+                show_success_dialog()
+                get_package_index().invalidate()
+                self.mark_installed(row.app.package)
+                return
+
+            row.cart_check.set_sensitive(True)
+            if runner.error:
+                self.show_error_dialog(f"Error installing {app_name}", runner.error)
+            else:
+                self.show_repo_error_dialog(self.format_install_error(runner), button)
+            button.set_label("Install")
+            button.set_sensitive(True)
+
+        self.run_install([row.app.package], f"Installing {app_name}",
+                         "Please wait while the application is being installed...",
+                         on_finished)
+
+    def on_cart_install_clicked(self, button):
+        cart = dict(self.cart)
+        if not cart:
+            return
+        self.cart.clear()
+        self.update_cart_bar()
+
+        for app, row in cart.values():
+            row.cart_check.set_sensitive(False)
+            row.button.set_sensitive(False)
+            row.button.set_label("Queued")
+
+        def on_package_status(package, status):
+            cart[package][1].button.set_label(status)
+
+        def on_finished(runner):
+            # One dnf run for every app, the outcome is read back per package
+            get_package_index().invalidate()
+            failed = []
+            for package, (app, row) in cart.items():
+                if is_installed(package):
+                    self.mark_installed(package)
+                else:
+                    failed.append(app.name)
+                    row.cart_check.set_sensitive(True)
+                    row.cart_check.set_active(False)
+                    row.button.set_label("Install")
+                    row.button.set_sensitive(True)
+
+            if runner.error:
+                self.show_error_dialog("Error installing applications", runner.error)
+            elif failed:
+                self.show_repo_error_dialog(
+                    f"Not installed: {', '.join(failed)}\n\n{self.format_install_error(runner)}")
+            else:
+                success_dialog = Adw.MessageDialog.new(
+                    self.get_root(),
+                    "Installation Complete",
+                    f"{len(cart)} applications have been successfully installed!"
+                )
+                success_dialog.add_response("ok", "OK")
+                success_dialog.present()
+
+        self.run_install(list(cart), f"Installing {len(cart)} Applications",
+                         "Please wait while the selected applications are being installed...",
+                         on_finished, on_package_status)
+
+    def format_install_error(self, runner):
+        error_output = "\n".join(runner.output_lines)
+        if runner.error_lines:
+            error_output += "\n\nErrors:\n" + "\n".join(runner.error_lines)
+        return error_output
+
+    def run_install(self, packages, title, message, on_finished, on_package_status=None):
+        # Install all packages in a single dnf transaction with one authorization,
+        # on_package_status(package, status) follows each package through it
 
         # Create progress dialog
         dialog = Adw.MessageDialog.new(
             self.get_root(),
-            f"Installing {app_name}",
-            "Please wait while the application is being installed..."
+            title,
+            message
         )
         dialog.add_response("cancel", "Cancel")
         
@@ -325,130 +507,64 @@ class PopularAppsPage(Gtk.Box):
             adj = scroll.get_vadjustment()
             adj.set_value(adj.get_upper() - adj.get_page_size())
 
-        def show_success_dialog():
-            success_dialog = Adw.MessageDialog.new(
-                self.get_root(),
-                "Installation Complete",
-                f"{app_name} has been successfully installed!"
-            )
-            success_dialog.add_response("ok", "OK")
-            success_dialog.present()
+        # Prepare the DNF command
+        dnf_cmd = ["dnf", "install", "-y"] + packages
+        package_status = {}
 
+        # Output is applied at most once per frame, the last 10 lines are shown
+        recent_lines = deque(maxlen=10)
 
+        def show_progress(fraction, status, lines):
+            recent_lines.extend(lines)
+            current_text = "\n".join(recent_lines)
+            update_progress(fraction, f"{status}\n{current_text}" if status else current_text)
 
-        def install_thread():
-            try:
-
-                # Start DNF installation with real-time output capture
-                GLib.idle_add(update_progress, 0.2, "Starting installation...\n")
-                
-                # Prepare the DNF command
-                dnf_cmd = ["pkexec", "dnf", "install", "-y", package_name]
-                
-                # Run DNF with output capture
-                process = subprocess.Popen(
-                    dnf_cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    bufsize=1,
-                    universal_newlines=True
-                )
+        channel = ProgressChannel(dialog, show_progress)
+        channel.update(0.2, "Starting installation...")
 
-                # Process output in real-time
-                output_lines = []
-                error_lines = []
-                progress = 0.2
-                downloading = False
-                installing = False
-                
-                # Read both stdout and stderr
-                def read_output(pipe, is_error=False):
-                    while True:
-                        line = pipe.readline()
-                        if not line:
-                            break
-                        line = line.strip()
-                        if line:
-                            if is_error:
-                                error_lines.append(line)
-                                GLib.idle_add(update_progress, progress, f"Status: {line}")
-                            else:
-                                output_lines.append(line)
-                                current_text = "\n".join(output_lines[-10:])  # Keep last 10 lines
-                                if "Downloading Packages:" in line:
-                                    GLib.idle_add(update_progress, 0.3, f"Downloading packages...\n{current_text}")
-                                elif "Dependencies resolved." in line:
-                                    GLib.idle_add(update_progress, 0.4, f"Dependencies resolved, preparing installation...\n{current_text}")
-                                elif "Installing:" in line:
-                                    pkg_info = line.split("Installing:")[-1].strip()
-                                    GLib.idle_add(update_progress, 0.6, f"Installing: {pkg_info}\n{current_text}")
-                                elif "Installed:" in line:
-                                    pkg_info = line.split("Installed:")[-1].strip()
-                                    GLib.idle_add(update_progress, 0.8, f"Installed: {pkg_info}\n{current_text}")
-                                elif "Complete!" in line:
-                                    GLib.idle_add(update_progress, 0.9, f"Installation complete!\n{current_text}")
-                                else:
-                                    GLib.idle_add(update_progress, progress, current_text)
-
-                # Start reading in separate threads to avoid blocking
-                import threading
-                stdout_thread = threading.Thread(target=lambda: read_output(process.stdout))
-                stderr_thread = threading.Thread(target=lambda: read_output(process.stderr, True))
-                
-                stdout_thread.start()
-                stderr_thread.start()
-                
-                stdout_thread.join()
-                stderr_thread.join()
-
-                # Get any remaining stderr
-                stderr_output = process.stderr.read()
-                if stderr_output:
-                    error_lines.append(stderr_output.strip())
-                
-                # Wait for the process to complete
-                process.wait()
-                
-                # Combine all output
-                error_output = "\n".join(output_lines)
-                if error_lines:
-                    error_output += "\n\nErrors:\n" + "\n".join(error_lines)
-                
-                if process.returncode == 0:
-                    GLib.idle_add(update_progress, 1.0, "Installation completed successfully!")
-                    GLib.idle_add(dialog.close)
-                    GLib.idle_add(show_success_dialog)
-                    
-                    # Update button state
-                    def update_button():
-                        if binary_path and os.path.exists(binary_path):
-                            button.set_label("Launch")
-                            button.set_sensitive(True)
-                            button.disconnect_by_func(self.install_package)
-                            button.connect("clicked", self.launch_application, binary_path)
-                        else:
-                            button.set_label("Installed")
-                            button.set_sensitive(False)
-                    
-                    GLib.idle_add(update_button)
-                else:
-                    # Show error dialog with the captured output
-                    GLib.idle_add(dialog.close)
-                    GLib.idle_add(lambda: self.show_repo_error_dialog(error_output, button))
-                    GLib.idle_add(lambda: button.set_label("Install"))
-                    GLib.idle_add(lambda: button.set_sensitive(True))
-                    return
-                
-            except Exception as e:
-                GLib.idle_add(dialog.close)
-                GLib.idle_add(lambda: self.show_error_dialog(f"Error installing {app_name}", str(e)))
-                GLib.idle_add(lambda: button.set_label("Install"))
-                GLib.idle_add(lambda: button.set_sensitive(True))
-
-        thread = threading.Thread(target=install_thread)
-        thread.daemon = True
-        thread.start()
+        def track_package(line):
+            if "Downloading" in line:
+                status = "Downloading..."
+            elif "Installing" in line or "Upgrading" in line:
+                status = "Installing..."
+            else:
+                return
+            package = match_package(line, packages)
+            if package and package_status.get(package) != status:
+                package_status[package] = status
+                on_package_status(package, status)
+
+        def on_line(line, is_error):
+            line = line.strip()
+            if not line:
+                return
+            if is_error:
+                channel.update(status=f"Status: {line}")
+                return
+
+            channel.append_line(line)
+            if on_package_status:
+                track_package(line)
+            if "Downloading Packages:" in line:
+                channel.update(0.3, "Downloading packages...")
+            elif "Dependencies resolved." in line:
+                channel.update(0.4, "Dependencies resolved, preparing installation...")
+            elif "Installing:" in line:
+                pkg_info = line.split("Installing:")[-1].strip()
+                channel.update(0.6, f"Installing: {pkg_info}")
+            elif "Installed:" in line:
+                pkg_info = line.split("Installed:")[-1].strip()
+                channel.update(0.8, f"Installed: {pkg_info}")
+            elif "Complete!" in line:
+                channel.update(0.9, "Installation complete!")
+
+        def finished(runner):
+            channel.close()
+            dialog.close()
+            on_finished(runner)
+
+        runner = run_privileged_command(dnf_cmd, on_line=on_line, on_finished=finished, merge_stderr=False)
+        dialog.connect("response", lambda d, r: runner.cancel() if r == "cancel" else None)
 
     def show_error_dialog(self, title, message):
         dialog = Adw.MessageDialog.new(
@@ -0,0 +1,250 @@
+import io
+import os
+import re
+import sys
+import json
+import subprocess
+import configparser
+
+# Set to "mock" to use MockHelper instead of running anything as root
+HELPER_ENV = 'TEARS_PRIVILEGED_HELPER'
+
+NAME_PATTERN = re.compile(r'^[a-z_][a-z0-9_-]*\$?$')
+
+REPOS_DIR = '/etc/yum.repos.d'
+REPO_FILE_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._+-]*\.repo$')
+
+class HelperError(Exception):
+    pass
+
+def _name(args, key):
+    value = args.get(key)
+    if not isinstance(value, str) or not NAME_PATTERN.match(value):
+        raise HelperError(f"Invalid {key}: {value!r}")
+    return value
+
+def _names(args, key):
+    values = args.get(key) or []
+    if not isinstance(values, list):
+        raise HelperError(f"Invalid {key}: {values!r}")
+    return [_name({key: value}, key) for value in values]
+
+def _text(args, key):
+    value = args.get(key) or ""
+    if not isinstance(value, str) or any(c in value for c in ':\n\r'):
+        raise HelperError(f"Invalid {key}: {value!r}")
+    return value
+
+def _secret(args, key):
+    value = args.get(key)
+    if not isinstance(value, str) or not value or any(c in value for c in '\n\r'):
+        raise HelperError(f"Invalid {key}")
+    return value
+
+def _repo_path(args, key):
+    # Only existing regular .repo files directly inside REPOS_DIR can be
+    # written. The path has to be given in exactly that form, symlinks are
+    # refused since tee would follow them.
+    value = args.get(key)
+    if (not isinstance(value, str) or os.path.dirname(value) != REPOS_DIR
+            or not REPO_FILE_PATTERN.match(os.path.basename(value))
+            or os.path.islink(value) or not os.path.isfile(value)):
+        raise HelperError(f"Invalid {key}: {value!r}")
+    return value
+
+def _repo_content(args, key):
+    value = args.get(key)
+    if not isinstance(value, str):
+        raise HelperError(f"Invalid {key}")
+    parser = configparser.ConfigParser(interpolation=None, strict=False)
+    try:
+        parser.read_string(value)
+    except configparser.Error as e:
+        raise HelperError(f"Invalid {key}: {e}")
+    if not parser.sections():
+        raise HelperError(f"Invalid {key}: no repositories")
+    return value
+
+# Every operation the helper accepts, mapped to the command it runs as
+# (argv, stdin). Nothing outside this table can be executed through it.
+OPERATIONS = {
+    'create_user': lambda a: (
+        ["useradd", "-m", "-c", _text(a, 'fullname') or _name(a, 'username')]
+        + (["-G", ",".join(_names(a, 'groups'))] if a.get('groups') else [])
+        + [_name(a, 'username')], None),
+    'set_password': lambda a: (
+        ["chpasswd"], f"{_name(a, 'username')}:{_secret(a, 'password')}\n"),
+    'set_fullname': lambda a: (
+        ["usermod", "-c", _text(a, 'fullname'), _name(a, 'username')], None),
+    'delete_user': lambda a: (
+        ["userdel", "-r", _name(a, 'username')], None),
+    'create_group': lambda a: (
+        ["groupadd", _name(a, 'group')], None),
+    'delete_group': lambda a: (
+        ["groupdel", _name(a, 'group')], None),
+    # Membership is always written as the complete list in one command
+    'set_user_groups': lambda a: (
+        ["usermod", "-G", ",".join(_names(a, 'groups')), _name(a, 'username')], None),
+    'set_group_members': lambda a: (
+        ["gpasswd", "-M", ",".join(_names(a, 'members')), _name(a, 'group')], None),
+    # The new file is prepared unprivileged, see repositories.py
+    'write_repo_file': lambda a: (
+        ["tee", _repo_path(a, 'path')], _repo_content(a, 'content')),
+}
+
+def operation(op, **args):
+    return {'op': op, 'args': args}
+
+def build_command(request):
+    op = request.get('op')
+    if op not in OPERATIONS:
+        raise HelperError(f"Unknown operation: {op!r}")
+    return OPERATIONS[op](request.get('args') or {})
+
+def _run_command(argv, stdin):
+    proc = subprocess.run(argv, input=stdin, capture_output=True, text=True)
+    return proc.returncode, proc.stderr
+
+def execute_batch(batch, run=_run_command):
+    # Operations run in order, the batch stops at the first failure. run(argv,
+    # stdin) executes one command and returns (returncode, stderr).
+    results = []
+    for request in batch:
+        try:
+            argv, stdin = build_command(request)
+            returncode, stderr = run(argv, stdin)
+            if returncode != 0:
+                raise HelperError(stderr.strip() or
+                                  f"{argv[0]} returned non-zero exit status {returncode}")
+            results.append({'ok': True})
+        except (HelperError, OSError) as e:
+            results.append({'ok': False, 'error': str(e)})
+            break
+    return results
+
+def serve(stdin=sys.stdin, stdout=sys.stdout, run=_run_command):
+    # One JSON batch per line in, one JSON list of results per line out
+    for line in stdin:
+        try:
+            batch = json.loads(line)
+            if not isinstance(batch, list):
+                raise ValueError("batch must be a list")
+            results = execute_batch(batch, run)
+        except ValueError as e:
+            results = [{'ok': False, 'error': f"Malformed request: {e}"}]
+        stdout.write(json.dumps(results) + "\n")
+        stdout.flush()
+
+def _parse_results(line):
+    try:
+        results = json.loads(line)
+    except ValueError as e:
+        raise HelperError(f"Malformed reply from privileged helper: {e}")
+    if not isinstance(results, list) or not all(isinstance(r, dict) for r in results):
+        raise HelperError("Malformed reply from privileged helper")
+    return results
+
+def _check_results(batch, results):
+    for request, result in zip(batch, results):
+        if not result.get('ok'):
+            raise HelperError(f"{request['op']} failed: {result.get('error')}")
+    if len(results) < len(batch):
+        raise HelperError("Privileged helper did not run every operation")
+
+class PrivilegedHelper:
+    """Client for the helper, authorized through pkexec once per session.
+
+    The helper is this module running as root, it reads batches from the pipe
+    pkexec gave it, so the connection is private to this process.
+    """
+
+    def __init__(self):
+        self.process = None
+
+    def _start(self):
+        try:
+            self.process = subprocess.Popen(
+                ["pkexec", sys.executable, os.path.abspath(__file__), "--serve"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                bufsize=1
+            )
+        except OSError as e:
+            raise HelperError(f"Failed to start privileged helper: {e}")
+
+    def run_batch(self, batch):
+        if not batch:
+            return []
+        if self.process is None or self.process.poll() is not None:
+            self._start()
+        try:
+            self.process.stdin.write(json.dumps(batch) + "\n")
+            self.process.stdin.flush()
+            line = self.process.stdout.readline()
+        except (OSError, ValueError) as e:
+            self.process = None
+            raise HelperError(f"Lost connection to privileged helper: {e}")
+        if not line:
+            # Authorization was refused or the helper exited
+            self.process.wait()
+            self.process = None
+            raise HelperError("Authorization failed or privileged helper exited")
+        try:
+            results = _parse_results(line)
+        except HelperError:
+            # A partial reply, the helper died or is in an unknown state
+            self.stop()
+            raise
+        _check_results(batch, results)
+        return results
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
+        self.process = None
+
+class MockHelper:
+    """Stand-in for the helper that runs batches in-process without pkexec.
+
+    Batches go through the same JSON protocol and operation table as the real
+    helper, but the commands are recorded in self.commands instead of being
+    executed. A command whose name is fail_on fails.
+    """
+
+    def __init__(self, fail_on=None):
+        self.commands = []
+        self.fail_on = fail_on
+
+    def _run(self, argv, stdin):
+        self.commands.append((argv, stdin))
+        if argv[0] == self.fail_on:
+            return 1, "mock failure"
+        return 0, ""
+
+    def run_batch(self, batch):
+        if not batch:
+            return []
+        reply = io.StringIO()
+        serve(io.StringIO(json.dumps(batch) + "\n"), reply, self._run)
+        results = _parse_results(reply.getvalue())
+        _check_results(batch, results)
+        return results
+
+    def stop(self):
+        pass
+
+_helper = None
+
+def get_helper():
+    global _helper
+    if _helper is None:
+        _helper = MockHelper() if os.environ.get(HELPER_ENV) == 'mock' else PrivilegedHelper()
+    return _helper
+
+def run_operations(*operations):
+    return get_helper().run_batch(list(operations))
+
+if __name__ == '__main__' and '--serve' in sys.argv:
+    serve()
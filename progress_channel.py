@@ -0,0 +1,73 @@
+import threading
+from gi.repository import GLib
+
+class ProgressChannel:
+    """Collects progress updates and applies them at most once per frame.
+
+    Updates may come from the main loop or from worker threads. Only the latest
+    fraction and status are kept; log lines are queued and handed over in one batch.
+    on_flush(fraction, status, lines) is always called on the main thread.
+    """
+
+    def __init__(self, widget, on_flush):
+        self.widget = widget
+        self.on_flush = on_flush
+        self.fraction = None
+        self.status = None
+        self._lines = []
+        self._dirty = False
+        self._scheduled = False
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def update(self, fraction=None, status=None):
+        with self._lock:
+            if fraction is not None:
+                self.fraction = fraction
+            if status is not None:
+                self.status = status
+            self._mark_dirty()
+
+    def append_line(self, line):
+        with self._lock:
+            self._lines.append(line)
+            self._mark_dirty()
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if self._scheduled or self._closed:
+            return
+        self._scheduled = True
+        if GLib.MainContext.default().is_owner():
+            self._add_tick()
+        else:
+            GLib.idle_add(self._add_tick)
+
+    def _add_tick(self):
+        # Widgets that are not mapped get no frame ticks, flush those from idle
+        if self.widget.get_mapped():
+            self.widget.add_tick_callback(self._on_tick)
+        else:
+            GLib.idle_add(self._on_tick, self.widget, None)
+        return False
+
+    def _on_tick(self, widget, frame_clock):
+        with self._lock:
+            self._scheduled = False
+        self.flush()
+        return GLib.SOURCE_REMOVE
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            fraction, status, lines = self.fraction, self.status, self._lines
+            self._lines = []
+            self._dirty = False
+        self.on_flush(fraction, status, lines)
+
+    def close(self):
+        # Apply whatever is still pending, later updates are dropped
+        self.flush()
+        with self._lock:
+            self._closed = True
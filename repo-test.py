@@ -1,8 +1,12 @@
 import gi
-import subprocess
+import asyncio
+import threading
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
-from gi.repository import Gtk, Adw, Gio, Gdk
+from gi.repository import Gtk, Adw, Gio, Gdk, GLib
+from repositories import RepositoryState, get_base_type
+from privileged_helper import HelperError
+import mirror_bench
 
 class MyApp(Adw.Application):
 
@@ -110,43 +114,51 @@ class MyAppWindow(Adw.ApplicationWindow):
         button_box.append(self.nonfree_button)
         
         main_box.append(button_box)
+
+        # Mirror benchmark
+        mirror_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        mirror_box.set_margin_start(20)
+        mirror_box.set_margin_end(20)
+        mirror_box.set_margin_bottom(20)
+        mirror_box.set_vexpand(True)
+
+        mirror_header = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        self.mirror_status = Gtk.Label(label="Measure which mirror is fastest from your location.")
+        self.mirror_status.set_xalign(0)
+        self.mirror_status.set_hexpand(True)
+        self.mirror_status.set_wrap(True)
+        mirror_header.append(self.mirror_status)
+
+        self.bench_button = Gtk.Button(label="Find Fastest Mirror")
+        self.bench_button.connect("clicked", self.on_bench_clicked)
+        mirror_header.append(self.bench_button)
+        mirror_box.append(mirror_header)
+
+        self.mirror_list = Gtk.ListBox()
+        self.mirror_list.set_selection_mode(Gtk.SelectionMode.NONE)
+        self.mirror_list.add_css_class("boxed-list")
+        mirror_scroll = Gtk.ScrolledWindow()
+        mirror_scroll.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        mirror_scroll.set_vexpand(True)
+        mirror_scroll.set_child(self.mirror_list)
+        mirror_box.append(mirror_scroll)
+
+        main_box.append(mirror_box)
         
+        # Repository states come from the .repo files, which are watched for changes
+        self.base_type = get_base_type()
+        self.repositories = RepositoryState(on_changed=lambda state: self.update_repo_states())
+
         # Now that buttons are created, update repository states
         self.update_repo_states()
 
-    def get_base_type(self):
-        try:
-            result = subprocess.run(["cat", "/etc/openmandriva-release"], capture_output=True, text=True, check=True)
-            release_info = result.stdout.strip()
-            if "ROME" in release_info or "Rolling" in release_info:
-                return "rolling"
-            elif "ROCK" in release_info:
-                return "rock"
-            else:
-                return "cooker"
-        except:
-            return "cooker"  # Default to cooker if can't determine
-
-    def check_repo_enabled(self, repo_name):
-        try:
-            # Use dnf repolist to check if repository is enabled
-            result = subprocess.run(
-                ["dnf", "repolist", "--enabled"], 
-                capture_output=True, 
-                text=True
-            )
-            return repo_name in result.stdout
-        except Exception as e:
-            print(f"Error checking repository {repo_name}: {e}")
-            return False
+    def repo_id(self, repo_type):
+        return f"{self.base_type}-x86_64-{repo_type}"
 
     def update_repo_states(self):
-        base_type = self.get_base_type()
         try:
-            # Check each repository's actual state using dnf repolist
-            self.repo_states["extra"] = self.check_repo_enabled(f"{base_type}-x86_64-extra")
-            self.repo_states["restricted"] = self.check_repo_enabled(f"{base_type}-x86_64-restricted")
-            self.repo_states["non-free"] = self.check_repo_enabled(f"{base_type}-x86_64-non-free")
+            for repo_type in self.repo_states:
+                self.repo_states[repo_type] = self.repositories.is_enabled(self.repo_id(repo_type))
             
             print("Current repository states:")
             for repo, state in self.repo_states.items():
@@ -173,38 +185,47 @@ class MyAppWindow(Adw.ApplicationWindow):
         all_enabled = all(self.repo_states.values())
         self.all_button.set_label("Disable All Repositories" if all_enabled else "Enable All Repositories")
 
+    def set_buttons_sensitive(self, sensitive):
+        for button in (self.all_button, self.extra_button, self.restricted_button, self.nonfree_button):
+            button.set_sensitive(sensitive)
+
     def on_button_clicked(self, button, repo_type_arg):
-        try:
-            base_type = self.get_base_type()
-            enable = True  # Default to enable
+        if repo_type_arg == "all":
+            # If any repo is disabled, enable all. Otherwise, disable all.
+            enable = not all(self.repo_states.values())
+            repo_ids = [self.repo_id(repo_type) for repo_type in self.repo_states]
+        else:
+            # Toggle individual repository
+            enable = not self.repo_states[repo_type_arg]
+            repo_ids = [self.repo_id(repo_type_arg)]
 
-            if repo_type_arg != "all":
-                # Toggle individual repository
-                enable = not self.repo_states[repo_type_arg]
+        self.set_buttons_sensitive(False)
 
-            # Prepare command
-            command = ["pkexec", "dnf", "config-manager", "--enable" if enable else "--disable"]
-            
-            if repo_type_arg == "all":
-                # If any repo is disabled, enable all. Otherwise, disable all.
-                enable = not all(self.repo_states.values())
-                command.extend([
-                    f"{base_type}-x86_64-extra",
-                    f"{base_type}-x86_64-restricted",
-                    f"{base_type}-x86_64-non-free"
-                ])
-            else:
-                command.append(f"{base_type}-x86_64-{repo_type_arg}")
+        def run():
+            try:
+                # Writes the .repo files and returns the reloaded state
+                self.repositories.set_enabled(repo_ids, enable)
+                GLib.idle_add(self.on_repos_changed, repo_type_arg, enable, None)
+            except HelperError as e:
+                GLib.idle_add(self.on_repos_changed, repo_type_arg, enable, str(e))
 
-            # Execute the command
-            subprocess.run(command, check=True)
-            
-            # Wait a moment for DNF to update its cache
-            subprocess.run(["dnf", "clean", "expire-cache"], check=True)
-            
-            # Verify the new states
-            self.update_repo_states()
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+
+    def on_repos_changed(self, repo_type_arg, enable, error):
+        self.set_buttons_sensitive(True)
+        self.update_repo_states()
 
+        if error:
+            print(f"Error occurred: {error}")
+            # Show error dialog
+            dialog = Adw.MessageDialog(
+                transient_for=self,
+                heading="Error",
+                body=f"Failed to modify repository: {error}"
+            )
+        else:
             # Show success dialog
             action = "enabled" if enable else "disabled"
             dialog = Adw.MessageDialog(
@@ -212,21 +233,105 @@ class MyAppWindow(Adw.ApplicationWindow):
                 heading="Success",
                 body=f"Repository {repo_type_arg} has been {action} successfully."
             )
-            dialog.add_response("ok", "OK")
-            dialog.present()
+        dialog.add_response("ok", "OK")
+        dialog.present()
+        return False
 
-        except subprocess.CalledProcessError as e:
-            print(f"Error occurred: {e}")
-            # Show error dialog
+    def on_bench_clicked(self, button):
+        button.set_sensitive(False)
+        self.mirror_status.set_label("Looking for mirrors...")
+        while row := self.mirror_list.get_row_at_index(0):
+            self.mirror_list.remove(row)
+
+        repos = [repo for repo in self.repositories.repositories.values() if repo.enabled]
+        paths = [path for path in (mirror_bench.repo_path(repo) for repo in repos) if path]
+        if not paths:
+            self.mirror_status.set_label("No enabled repository uses OpenMandriva mirrors.")
+            button.set_sensitive(True)
+            return
+
+        def on_result(result):
+            GLib.idle_add(self.mirror_status.set_label, f"Tested {result.host}...")
+
+        async def find_and_benchmark():
+            roots = await mirror_bench.find_mirrors(repos)
+            GLib.idle_add(self.mirror_status.set_label, f"Testing {len(roots)} mirrors...")
+            return await mirror_bench.benchmark(roots, paths[0], on_result)
+
+        def run():
+            try:
+                ranked = asyncio.run(find_and_benchmark())
+            except Exception as e:
+                print(f"Error benchmarking mirrors: {e}")
+                ranked = []
+            GLib.idle_add(self.show_mirror_results, ranked)
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+
+    def show_mirror_results(self, ranked):
+        self.bench_button.set_sensitive(True)
+        working = [result for result in ranked if not result.error]
+        if not working:
+            self.mirror_status.set_label("No mirror could be reached.")
+            return False
+        self.mirror_status.set_label(f"{len(working)} of {len(ranked)} mirrors responded, fastest first.")
+
+        for result in ranked:
+            row = Adw.ActionRow(title=result.host, subtitle=result.root)
+            if result.error:
+                row.set_subtitle(f"{result.root} - {result.error}")
+                row.set_sensitive(False)
+            else:
+                throughput = result.throughput
+                speed = f", {throughput / 1024:.0f} KiB/s" if throughput else ""
+                row.add_suffix(Gtk.Label(
+                    label=f"{result.connect_time * 1000:.0f} ms, first byte "
+                          f"{result.first_byte_time * 1000:.0f} ms{speed}"))
+                use_button = Gtk.Button(label="Use")
+                use_button.set_valign(Gtk.Align.CENTER)
+                use_button.connect("clicked", self.on_use_mirror_clicked, result.root)
+                row.add_suffix(use_button)
+            self.mirror_list.append(row)
+        return False
+
+    def on_use_mirror_clicked(self, button, root):
+        changes = mirror_bench.pin_changes(self.repositories.repositories.values(), root)
+        if not changes:
+            return
+        self.bench_button.set_sensitive(False)
+
+        def run():
+            try:
+                # Points every OpenMandriva repository at this mirror
+                self.repositories.update(changes)
+                GLib.idle_add(self.on_mirror_pinned, root, None)
+            except HelperError as e:
+                GLib.idle_add(self.on_mirror_pinned, root, str(e))
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+
+    def on_mirror_pinned(self, root, error):
+        self.bench_button.set_sensitive(True)
+        if error:
+            print(f"Error occurred: {error}")
             dialog = Adw.MessageDialog(
                 transient_for=self,
                 heading="Error",
-                body=f"Failed to modify repository: {str(e)}"
+                body=f"Failed to set mirror: {error}"
             )
-            dialog.add_response("ok", "OK")
-            dialog.present()
-            # Refresh states in case of error
-            self.update_repo_states()
+        else:
+            dialog = Adw.MessageDialog(
+                transient_for=self,
+                heading="Success",
+                body=f"Repositories now use {root}"
+            )
+        dialog.add_response("ok", "OK")
+        dialog.present()
+        return False
 
 if __name__ == '__main__':
     app = MyApp()
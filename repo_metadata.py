@@ -0,0 +1,124 @@
+import os
+import re
+import glob
+import json
+import time
+import configparser
+from facts_cache import CACHE_DIR
+
+REPOS_DIR = '/etc/yum.repos.d'
+STATE_FILE = os.path.join(CACHE_DIR, 'repo_metadata.json')
+
+# Repos without their own metadata_expire are refreshed at most this often
+DEFAULT_TTL = 6 * 60 * 60
+
+# Printed by refresh scripts once makecache succeeded, see CommandRunner
+REFRESHED_MARKER = "METADATA-REFRESHED:"
+
+class Repository:
+    def __init__(self, repo_id, path, enabled, ttl, baseurl="", mirrorlist=""):
+        self.id = repo_id
+        self.path = path
+        self.enabled = enabled
+        self.ttl = ttl
+        self.baseurl = baseurl
+        self.mirrorlist = mirrorlist
+
+def parse_expire(value):
+    # metadata_expire is seconds, optionally with an m/h/d suffix, or "never"
+    value = (value or "").strip().lower()
+    if not value:
+        return DEFAULT_TTL
+    if value in ('never', '-1'):
+        return None
+    match = re.match(r'^(\d+)([smhd]?)$', value)
+    if not match:
+        return DEFAULT_TTL
+    factor = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}[match.group(2)]
+    return int(match.group(1)) * factor
+
+def list_repositories(repos_dir=REPOS_DIR):
+    repos = []
+    for path in sorted(glob.glob(os.path.join(repos_dir, '*.repo'))):
+        parser = configparser.ConfigParser(interpolation=None, strict=False)
+        try:
+            parser.read(path)
+        except configparser.Error as e:
+            print(f"Error reading {path}: {e}")
+            continue
+        for section in parser.sections():
+            enabled = parser.get(section, 'enabled', fallback='1').strip() in ('1', 'true', 'yes')
+            ttl = parse_expire(parser.get(section, 'metadata_expire', fallback=''))
+            # baseurl may list several URLs, the first one is what dnf tries first
+            baseurl = parser.get(section, 'baseurl', fallback='').split()
+            repos.append(Repository(section, path, enabled, ttl,
+                                    baseurl[0] if baseurl else '',
+                                    parser.get(section, 'mirrorlist', fallback='').strip()))
+    return repos
+
+def _file_mtime(path):
+    try:
+        return int(os.stat(path).st_mtime)
+    except OSError:
+        return None
+
+def load_state():
+    try:
+        with open(STATE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_state(state):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = STATE_FILE + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, STATE_FILE)
+    except OSError as e:
+        print(f"Error writing repository metadata state: {e}")
+
+def stale_repositories(now=None):
+    # Enabled repos whose TTL ran out or whose .repo file changed since the last refresh
+    now = now or time.time()
+    state = load_state()
+    stale = []
+    for repo in list_repositories():
+        if not repo.enabled:
+            continue
+        entry = state.get(repo.id)
+        if (entry is None
+                or entry.get('repo_mtime') != _file_mtime(repo.path)
+                or (repo.ttl is not None and now - entry.get('refreshed', 0) > repo.ttl)):
+            stale.append(repo.id)
+    return stale
+
+def mark_refreshed(repo_ids, now=None):
+    now = now or time.time()
+    paths = {repo.id: repo.path for repo in list_repositories()}
+    state = load_state()
+    for repo_id in repo_ids:
+        if repo_id in paths:
+            state[repo_id] = {'refreshed': now, 'repo_mtime': _file_mtime(paths[repo_id])}
+    _save_state(state)
+
+def refresh_command(repo_ids, dnf="dnf"):
+    return f"{dnf} makecache --refresh " + " ".join(f"--repo={repo_id}" for repo_id in repo_ids)
+
+def refresh_script(repo_ids, dnf="dnf", output_handler=None):
+    # Shell lines that refresh only the given repos and report them on success
+    if not repo_ids:
+        return ""
+    command = refresh_command(repo_ids, dnf)
+    if output_handler:
+        command += f" 2>&1 | {output_handler}"
+    return f"{command}\necho \"{REFRESHED_MARKER}{','.join(repo_ids)}\"\n"
+
+def handle_marker(line):
+    # Returns True if the line was a refresh report and has been recorded
+    if not line.startswith(REFRESHED_MARKER):
+        return False
+    repo_ids = [repo_id for repo_id in line[len(REFRESHED_MARKER):].split(',') if repo_id]
+    mark_refreshed(repo_ids)
+    return True
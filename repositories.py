@@ -0,0 +1,121 @@
+import re
+from gi.repository import Gio, GLib
+from repo_metadata import REPOS_DIR, list_repositories
+from privileged_helper import operation, run_operations, HelperError
+
+RELEASE_FILE = '/etc/openmandriva-release'
+
+SECTION_LINE = re.compile(r'^\s*\[([^\]]+)\]\s*$')
+OPTION_LINE = re.compile(r'^\s*([A-Za-z_][A-Za-z0-9_]*)\s*[=:]')
+
+def get_base_type(release_file=RELEASE_FILE):
+    # Repository ids start with the release flavour, e.g. rolling-x86_64-extra
+    try:
+        with open(release_file, 'r') as f:
+            release_info = f.read()
+    except OSError:
+        return "cooker"
+    if "ROME" in release_info or "Rolling" in release_info:
+        return "rolling"
+    if "ROCK" in release_info:
+        return "rock"
+    return "cooker"
+
+def update_sections(text, changes):
+    # changes maps a section to {key: value}. Existing lines are rewritten in
+    # place, missing keys are added to the end of the section and a value of
+    # None comments the key out. Comments and everything else are kept.
+    output = []
+    pending = {}
+
+    def add_missing():
+        lines = [f"{key}={value}" for key, value in pending.items() if value is not None]
+        index = len(output)
+        while index > 0 and not output[index - 1].strip():
+            index -= 1
+        output[index:index] = lines
+
+    for line in text.splitlines():
+        match = SECTION_LINE.match(line)
+        if match:
+            add_missing()
+            pending = dict(changes.get(match.group(1).strip(), {}))
+        else:
+            option = OPTION_LINE.match(line)
+            if option and option.group(1) in pending:
+                value = pending.pop(option.group(1))
+                line = f"{option.group(1)}={value}" if value is not None else f"#{line.lstrip()}"
+        output.append(line)
+    add_missing()
+    return "\n".join(output) + "\n"
+
+class RepositoryState:
+    """Repositories read straight from the .repo files.
+
+    The directory is watched, so changes made by dnf or another tool show up
+    without polling. on_changed(state) is called on the main loop after every
+    reload. update() and set_enabled() write through the privileged helper and
+    return the reloaded state, no dnf process is started.
+    """
+
+    def __init__(self, on_changed=None, repos_dir=REPOS_DIR):
+        self.on_changed = on_changed
+        self.repos_dir = repos_dir
+        self.repositories = {}
+        self.reload()
+        try:
+            self._monitor = Gio.File.new_for_path(repos_dir).monitor_directory(
+                Gio.FileMonitorFlags.WATCH_MOVES, None)
+            self._monitor.connect("changed", self._on_directory_changed)
+        except GLib.Error as e:
+            print(f"Error monitoring {repos_dir}: {e.message}")
+            self._monitor = None
+
+    def reload(self):
+        self.repositories = {repo.id: repo for repo in list_repositories(self.repos_dir)}
+        return self.repositories
+
+    def _on_directory_changed(self, monitor, file, other_file, event_type):
+        # A write is reported as several CHANGED events, wait for the last one
+        if event_type == Gio.FileMonitorEvent.CHANGED:
+            return
+        if not (file.get_basename() or "").endswith('.repo'):
+            return
+        self.reload()
+        if self.on_changed:
+            self.on_changed(self)
+
+    def is_enabled(self, repo_id):
+        repo = self.repositories.get(repo_id)
+        return bool(repo and repo.enabled)
+
+    def update(self, changes):
+        # Blocks while pkexec asks for authorization, call it from a thread.
+        # changes maps repository ids to {key: value}, see update_sections().
+        # Raises HelperError if a repository is unknown or the write failed.
+        by_file = {}
+        for repo_id, options in changes.items():
+            repo = self.repositories.get(repo_id)
+            if repo is None:
+                raise HelperError(f"Unknown repository: {repo_id}")
+            by_file.setdefault(repo.path, {})[repo_id] = options
+
+        operations = []
+        for path, file_changes in by_file.items():
+            try:
+                with open(path, 'r') as f:
+                    text = f.read()
+            except OSError as e:
+                raise HelperError(f"Error reading {path}: {e}")
+            operations.append(operation('write_repo_file', path=path,
+                                        content=update_sections(text, file_changes)))
+        run_operations(*operations)
+        return self.reload()
+
+    def set_enabled(self, repo_ids, enabled):
+        for repo_id in repo_ids:
+            if repo_id not in self.repositories:
+                raise HelperError(f"Unknown repository: {repo_id}")
+        return self.update({repo_id: {'enabled': '1' if enabled else '0'}
+                            for repo_id in repo_ids
+                            if self.repositories[repo_id].enabled != enabled})
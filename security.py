@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 import gi
-import subprocess
-import threading
 from typing import Optional
 
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
-from gi.repository import Gtk, Adw, GLib
+from gi.repository import Gtk, Adw
+from progress_channel import ProgressChannel
+from command_runner import run_command
 
 class SecurityPage(Gtk.Box):
     def __init__(self):
@@ -152,46 +152,32 @@ class SecurityPage(Gtk.Box):
         )
         progress_dialog.present()
 
-        def install_thread():
-            try:
-                # Create dnf install command
-                cmd = f'echo "{password}" | sudo -S dnf install -y firewalld'
-                
-                # Run the installation
-                process = subprocess.Popen(
-                    cmd,
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    universal_newlines=True
-                )
-                
-                # Monitor the output
-                while True:
-                    output = process.stdout.readline()
-                    if output == '' and process.poll() is not None:
-                        break
-                    if output:
-                        GLib.idle_add(self.update_progress_dialog, progress_dialog, output.strip())
-
-                return_code = process.poll()
-                
-                # Show final result
-                if return_code == 0:
-                    GLib.idle_add(self.show_result_dialog, True, "Firewalld has been successfully installed!")
-                else:
-                    error = process.stderr.read()
-                    GLib.idle_add(self.show_result_dialog, False, f"Failed to install Firewalld: {error}")
-                
-                GLib.idle_add(progress_dialog.close)
-                
-            except Exception as e:
-                GLib.idle_add(self.show_result_dialog, False, f"Error during installation: {str(e)}")
-                GLib.idle_add(progress_dialog.close)
-
-        thread = threading.Thread(target=install_thread)
-        thread.daemon = True
-        thread.start()
+        # Create dnf install command
+        cmd = f'echo "{password}" | sudo -S dnf install -y firewalld'
+
+        # The latest output line is shown at most once per frame
+        channel = ProgressChannel(progress_dialog,
+                                  lambda fraction, status, lines: self.update_progress_dialog(progress_dialog, status))
+
+        def on_line(line, is_error):
+            # Only stdout is shown while it runs, stderr is reported on failure
+            if line and not is_error:
+                channel.update(status=line.strip())
+
+        def on_finished(runner):
+            channel.close()
+            # Show final result
+            if runner.success:
+                self.show_result_dialog(True, "Firewalld has been successfully installed!")
+            elif runner.error:
+                self.show_result_dialog(False, f"Error during installation: {runner.error}")
+            else:
+                error = "\n".join(runner.error_lines)
+                self.show_result_dialog(False, f"Failed to install Firewalld: {error}")
+            progress_dialog.close()
+
+        # Run the installation
+        run_command(["sh", "-c", cmd], on_line=on_line, on_finished=on_finished, merge_stderr=False)
 
     def update_progress_dialog(self, dialog, message):
         dialog.set_body(message)
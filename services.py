@@ -1,18 +1,66 @@
 #!/usr/bin/env python3
 import gi
 import subprocess
+import threading
 from typing import List, Tuple, Optional
 
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
 from gi.repository import Gtk, Adw, GLib, Gio, Gdk, GObject
+from systemd_units import ServiceInfo, UnitMonitor, list_services, run_batch_action
+from boot_analysis import load_boot_analysis
 
-class ServiceInfo:
-    def __init__(self, name: str, description: str, status: str, active: bool):
-        self.name = name
-        self.description = description
-        self.status = status
-        self.active = active
+# Milliseconds the search entry waits after the last keystroke
+SEARCH_DELAY = 250
+
+def format_boot_timing(seconds: float, critical: bool) -> str:
+    parts = []
+    if seconds is not None and seconds >= 0:
+        parts.append(f"Started in {seconds:.2f} s" if seconds < 10 else f"Started in {seconds:.1f} s")
+    if critical:
+        parts.append("on the boot critical chain")
+    return ", ".join(parts)
+
+class ServiceItem(GObject.Object):
+    name = GObject.Property(type=str, default="")
+    description = GObject.Property(type=str, default="")
+    active_state = GObject.Property(type=str, default="")
+    sub_state = GObject.Property(type=str, default="")
+    object_path = GObject.Property(type=str, default="")
+    # Seconds the service took to start during this boot, -1 if unknown
+    activation_time = GObject.Property(type=float, default=-1.0)
+    critical = GObject.Property(type=bool, default=False)
+
+    def __init__(self, info: ServiceInfo):
+        super().__init__()
+        self.name = info.name
+        self.update(info)
+
+    def update(self, info: ServiceInfo) -> bool:
+        changed = False
+        for key in ("description", "active_state", "sub_state", "object_path"):
+            if self.get_property(key) != getattr(info, key):
+                self.set_property(key, getattr(info, key))
+                changed = True
+        return changed
+
+    def apply_properties(self, properties: dict) -> bool:
+        # Unit properties as sent in PropertiesChanged
+        changed = False
+        for key, prop in (("Description", "description"), ("ActiveState", "active_state"),
+                          ("SubState", "sub_state")):
+            if key in properties and self.get_property(prop) != properties[key]:
+                self.set_property(prop, properties[key])
+                changed = True
+        return changed
+
+    @property
+    def status(self) -> str:
+        return self.active_state
+
+    @property
+    def active(self) -> bool:
+        return self.active_state == "active"
 
 class ServicesPage(Gtk.Box):
     def __init__(self):
@@ -21,6 +69,21 @@ class ServicesPage(Gtk.Box):
         # Initialize filter state
         self.current_filter = "all"
         self.current_search = ""
+        self.store = Gio.ListStore(item_type=ServiceItem)
+        self.items_by_name = {}
+        self.items_by_path = {}
+        self.load_generation = 0
+
+        # Rows follow systemd's unit signals, changes that arrive while the
+        # inventory is loading are applied once it is in the store
+        self.loading = False
+        self.pending_paths = set()
+        self.pending_removals = {}
+        self.monitor = UnitMonitor(self.on_unit_new, self.on_unit_removed, self.on_unit_changed)
+        self.monitor.start()
+
+        # Boot timings, joined to the inventory once both are loaded
+        self.boot_analysis = None
         
         # Create stack for different pages
         self.stack = Gtk.Stack()
@@ -30,7 +93,12 @@ class ServicesPage(Gtk.Box):
         self.main_services_page = self.create_main_services_page()
         self.stack.add_named(self.main_services_page, "main")
         
+        # Boot performance page
+        self.boot_page = self.create_boot_page()
+        self.stack.add_named(self.boot_page, "boot")
+        
         self.append(self.stack)
+        self.load_boot_analysis()
 
     def create_main_services_page(self):
         main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
@@ -46,6 +114,12 @@ class ServicesPage(Gtk.Box):
         title_label.set_markup("<span size='large'>System Services</span>")
         title_label.set_justify(Gtk.Justification.CENTER)
         title_box.append(title_label)
+
+        boot_button = Gtk.Button(label="Boot Performance")
+        boot_button.set_halign(Gtk.Align.CENTER)
+        boot_button.set_margin_top(10)
+        boot_button.connect("clicked", lambda button: self.stack.set_visible_child_name("boot"))
+        title_box.append(boot_button)
         
         separator = Gtk.Separator(orientation=Gtk.Orientation.HORIZONTAL)
         
@@ -61,6 +135,7 @@ class ServicesPage(Gtk.Box):
         
         self.search_entry = Gtk.SearchEntry()
         self.search_entry.set_hexpand(True)
+        self.search_entry.set_search_delay(SEARCH_DELAY)
         self.search_entry.connect('search-changed', self.on_search_changed)
         search_box.append(self.search_entry)
         
@@ -96,77 +171,150 @@ class ServicesPage(Gtk.Box):
         scrolled.set_margin_end(20)
         scrolled.set_margin_bottom(20)
 
-        # Create list box for services
-        self.list_box = Gtk.ListBox()
-        self.list_box.set_selection_mode(Gtk.SelectionMode.NONE)
-        self.list_box.set_show_separators(True)
+        # Services are filtered in memory, only visible rows are realized
+        self.filter = Gtk.CustomFilter.new(self.should_show_service)
+        filter_model = Gtk.FilterListModel(model=self.store, filter=self.filter)
+
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self.on_row_setup)
+        factory.connect("bind", self.on_row_bind)
+
+        # Several services can be selected and changed in one go
+        self.selection = Gtk.MultiSelection(model=filter_model)
+        self.selection.connect("selection-changed", self.on_selection_changed)
+
+        self.list_view = Gtk.ListView(model=self.selection, factory=factory)
+        self.list_view.set_show_separators(True)
         
-        scrolled.set_child(self.list_box)
+        scrolled.set_child(self.list_view)
         main_box.append(scrolled)
 
+        # Batch actions for the selected services
+        self.batch_bar = Gtk.ActionBar()
+        self.batch_label = Gtk.Label()
+        self.batch_bar.pack_start(self.batch_label)
+
+        clear_button = Gtk.Button(label="Clear")
+        clear_button.connect("clicked", lambda button: self.selection.unselect_all())
+        self.batch_bar.pack_end(clear_button)
+
+        for action in ("disable", "enable", "stop", "start"):
+            button = Gtk.Button(label=action.title())
+            if action in ("disable", "stop"):
+                button.add_css_class("destructive-action")
+            button.connect("clicked", self.on_batch_action, action)
+            self.batch_bar.pack_end(button)
+
+        self.batch_bar.set_revealed(False)
+        main_box.append(self.batch_bar)
+
         # Load services
         self.load_services()
         
         return main_box
 
-    def get_services(self) -> List[ServiceInfo]:
-        services = []
+    def get_services(self) -> Optional[List[ServiceInfo]]:
+        # Runs in a worker thread, a single ListUnits call covers every unit
         try:
-            # Get list of all services
-            output = subprocess.check_output(
-                ["systemctl", "list-units", "--type=service", "--all", "--no-pager", "--no-legend"],
-                universal_newlines=True
-            )
-            
-            for line in output.splitlines():
-                parts = line.split()
-                if len(parts) >= 4 and parts[0].endswith('.service'):
-                    name = parts[0].replace('.service', '')
-                    active = parts[2] == "active"
-                    status = parts[2]
-                    
-                    # Get service description
-                    try:
-                        desc_output = subprocess.check_output(
-                            ["systemctl", "show", "-p", "Description", name],
-                            universal_newlines=True
-                        )
-                        description = desc_output.strip().split("=")[1]
-                    except:
-                        description = "No description available"
-                    
-                    services.append(ServiceInfo(name, description, status, active))
-            
-        except subprocess.CalledProcessError:
-            dialog = Adw.MessageDialog.new(
-                self.get_root(),
-                "Error",
-                "Failed to get services list. Make sure you have the necessary permissions."
-            )
-            dialog.add_response("ok", "OK")
-            dialog.present()
-        
-        return services
+            return list_services()
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Error getting services: {e}")
+            return None
+
+    def show_services_error(self):
+        dialog = Adw.MessageDialog.new(
+            self.get_root(),
+            "Error",
+            "Failed to get services list. Make sure you have the necessary permissions."
+        )
+        dialog.add_response("ok", "OK")
+        dialog.present()
 
     def load_services(self):
-        # Clear existing list
-        while True:
-            row = self.list_box.get_first_child()
-            if row is None:
-                break
-            self.list_box.remove(row)
-
-        # Get services and add them to the list
-        services = self.get_services()
-        
-        for service in services:
-            if self.should_show_service(service):
-                self.list_box.append(self.create_service_row(service))
+        # Only the newest load is shown if several are in flight
+        self.load_generation += 1
+        generation = self.load_generation
+        self.loading = True
 
-    def create_service_row(self, service: ServiceInfo) -> Gtk.ListBoxRow:
-        row = Gtk.ListBoxRow()
-        
-        # Main box for the row
+        def load():
+            services = self.get_services()
+            GLib.idle_add(self.on_services_loaded, generation, services)
+
+        thread = threading.Thread(target=load)
+        thread.daemon = True
+        thread.start()
+
+    def on_services_loaded(self, generation, services):
+        if generation != self.load_generation:
+            return False
+        if services is None:
+            self.show_services_error()
+            services = []
+        # One items-changed for the whole inventory
+        items = [ServiceItem(service) for service in services]
+        self.store.splice(0, self.store.get_n_items(), items)
+        self.items_by_name = {item.name: item for item in items}
+        self.items_by_path = {item.object_path: item for item in items if item.object_path}
+        self.apply_boot_analysis()
+        if self.boot_analysis:
+            # Descriptions in the boot list come from the inventory
+            self.show_boot_analysis()
+
+        self.loading = False
+        for path, name in self.pending_removals.items():
+            self.on_unit_removed(name, path)
+        for path in self.pending_paths:
+            self.monitor.fetch_service(path, lambda service: service and self.on_unit_new(service))
+        self.pending_paths.clear()
+        self.pending_removals.clear()
+        return False
+
+    def refresh_item(self, item: ServiceItem):
+        # Re-run the filter and rebind the row of this item only
+        found, position = self.store.find(item)
+        if found:
+            self.store.items_changed(position, 1, 1)
+
+    def on_unit_changed(self, path: str, properties: dict):
+        if self.loading:
+            self.pending_paths.add(path)
+            self.pending_removals.pop(path, None)
+            return
+        item = self.items_by_path.get(path)
+        if item and item.apply_properties(properties):
+            self.refresh_item(item)
+
+    def on_unit_new(self, service: ServiceInfo):
+        if self.loading:
+            self.pending_paths.add(service.object_path)
+            self.pending_removals.pop(service.object_path, None)
+            return
+        item = self.items_by_name.get(service.name)
+        if item:
+            if item.update(service):
+                self.refresh_item(item)
+        else:
+            item = ServiceItem(service)
+            self.set_boot_timing(item)
+            self.store.insert_sorted(item, lambda a, b: (a.name > b.name) - (a.name < b.name))
+            self.items_by_name[item.name] = item
+        if item.object_path:
+            self.items_by_path[item.object_path] = item
+
+    def on_unit_removed(self, name: str, path: str):
+        if self.loading:
+            self.pending_paths.discard(path)
+            self.pending_removals[path] = name
+            return
+        item = self.items_by_name.pop(name, None)
+        self.items_by_path.pop(path, None)
+        if item:
+            found, position = self.store.find(item)
+            if found:
+                self.store.remove(position)
+
+    def on_row_setup(self, factory, list_item):
+        # Widgets are created once per visible row and reused while scrolling
         box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
         box.set_margin_top(10)
         box.set_margin_bottom(10)
@@ -177,51 +325,170 @@ class ServicesPage(Gtk.Box):
         info_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
         info_box.set_hexpand(True)
         
-        name_label = Gtk.Label(label=service.name)
+        name_label = Gtk.Label()
         name_label.set_halign(Gtk.Align.START)
         name_label.add_css_class("heading")
         
-        desc_label = Gtk.Label(label=service.description)
+        desc_label = Gtk.Label()
         desc_label.set_halign(Gtk.Align.START)
         desc_label.set_wrap(True)
         desc_label.add_css_class("caption")
         
+        # Start time of this boot and critical chain membership
+        boot_label = Gtk.Label()
+        boot_label.set_halign(Gtk.Align.START)
+        boot_label.add_css_class("caption")
+        boot_label.add_css_class("dim-label")
+        
         info_box.append(name_label)
         info_box.append(desc_label)
+        info_box.append(boot_label)
         
         # Status label
         status_label = Gtk.Label()
-        status_label.set_markup(
-            f"<span foreground='{'green' if service.active else 'red'}'>{service.status}</span>"
-        )
         status_label.set_margin_end(10)
         
-        # Action buttons
+        # Action buttons, the clicked item is looked up when a button is pressed
         button_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
         
-        if service.active:
-            stop_button = Gtk.Button(label="Stop")
-            stop_button.add_css_class("destructive-action")
-            stop_button.connect("clicked", self.on_service_action, service.name, "stop")
-            button_box.append(stop_button)
-            
-            restart_button = Gtk.Button(label="Restart")
-            restart_button.connect("clicked", self.on_service_action, service.name, "restart")
-            button_box.append(restart_button)
-        else:
-            start_button = Gtk.Button(label="Start")
-            start_button.add_css_class("suggested-action")
-            start_button.connect("clicked", self.on_service_action, service.name, "start")
-            button_box.append(start_button)
+        stop_button = Gtk.Button(label="Stop")
+        stop_button.add_css_class("destructive-action")
+        stop_button.connect("clicked", self.on_row_action, list_item, "stop")
+        button_box.append(stop_button)
         
+        restart_button = Gtk.Button(label="Restart")
+        restart_button.connect("clicked", self.on_row_action, list_item, "restart")
+        button_box.append(restart_button)
+
+        start_button = Gtk.Button(label="Start")
+        start_button.add_css_class("suggested-action")
+        start_button.connect("clicked", self.on_row_action, list_item, "start")
+        button_box.append(start_button)
+        
+        # Selection check box, kept in sync with the list item's selected state
+        select_check = Gtk.CheckButton()
+        select_check.set_valign(Gtk.Align.CENTER)
+        select_check.set_tooltip_text("Select for a batch action")
+        select_check.connect("toggled", self.on_select_toggled, list_item)
+        list_item.connect("notify::selected", lambda item, pspec: select_check.set_active(item.get_selected()))
+
+        box.append(select_check)
         box.append(info_box)
         box.append(status_label)
         box.append(button_box)
         
-        row.set_child(box)
-        return row
+        list_item.set_child(box)
+        list_item.widgets = (name_label, desc_label, boot_label, status_label,
+                             stop_button, restart_button, start_button)
+
+    def on_row_bind(self, factory, list_item):
+        item = list_item.get_item()
+        (name_label, desc_label, boot_label, status_label,
+         stop_button, restart_button, start_button) = list_item.widgets
+        name_label.set_label(item.name)
+        desc_label.set_label(item.description)
+        boot_label.set_label(format_boot_timing(item.activation_time, item.critical))
+        boot_label.set_visible(item.activation_time >= 0 or item.critical)
+        status_label.set_markup(
+            f"<span foreground='{'green' if item.active else 'red'}'>{GLib.markup_escape_text(item.status)}</span>"
+        )
+        stop_button.set_visible(item.active)
+        restart_button.set_visible(item.active)
+        start_button.set_visible(not item.active)
+
+    def on_select_toggled(self, check, list_item):
+        position = list_item.get_position()
+        if position == Gtk.INVALID_LIST_POSITION or check.get_active() == list_item.get_selected():
+            return
+        if check.get_active():
+            self.selection.select_item(position, False)
+        else:
+            self.selection.unselect_item(position)
+
+    def selected_items(self) -> List[ServiceItem]:
+        selected = self.selection.get_selection()
+        return [self.selection.get_item(selected.get_nth(index)) for index in range(selected.get_size())]
+
+    def on_selection_changed(self, selection, position, n_items):
+        count = selection.get_selection().get_size()
+        self.batch_label.set_label(f"{count} service{'s' if count != 1 else ''} selected")
+        self.batch_bar.set_revealed(count > 0)
 
-    def should_show_service(self, service: ServiceInfo) -> bool:
+    def on_batch_action(self, button, action: str):
+        names = [item.name for item in self.selected_items()]
+        if names:
+            self.confirm_batch_action(names, action)
+
+    def confirm_batch_action(self, names: List[str], action: str):
+        verb = {"enable": "enable and start", "disable": "disable and stop"}.get(action, action)
+        shown = ", ".join(names[:10]) + (f" and {len(names) - 10} more" if len(names) > 10 else "")
+        dialog = Adw.MessageDialog.new(
+            self.get_root(),
+            f"Confirm {action.title()}",
+            f"Are you sure you want to {verb} {len(names)} service{'s' if len(names) != 1 else ''}?\n\n{shown}"
+        )
+        dialog.add_response("cancel", "Cancel")
+        dialog.add_response("confirm", action.title())
+        dialog.set_response_appearance("confirm", Adw.ResponseAppearance.DESTRUCTIVE)
+        dialog.connect("response", self._on_batch_action_response, names, action)
+        dialog.present()
+
+    def _on_batch_action_response(self, dialog, response, names: List[str], action: str):
+        if response != "confirm":
+            return
+        self.batch_bar.set_sensitive(False)
+
+        def run():
+            # One systemctl call for every unit
+            results, errors = run_batch_action(action, [f"{name}.service" for name in names])
+            GLib.idle_add(self.on_batch_action_done, action, results, errors)
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+
+    def on_batch_action_done(self, action: str, results, errors):
+        self.batch_bar.set_sensitive(True)
+        if action in ("enable", "disable"):
+            # Disable candidates depend on which units are enabled
+            self.load_boot_analysis()
+        failed = [(unit, state, message) for unit, (ok, state, message) in results.items() if not ok]
+
+        # Failed units stay selected so the action can be retried
+        selected = self.selection.get_selection()
+        for index in range(selected.get_size()):
+            position = selected.get_nth(index)
+            result = results.get(f"{self.selection.get_item(position).name}.service")
+            if result and result[0]:
+                self.selection.unselect_item(position)
+        if not self.monitor.active:
+            self.load_services()
+
+        succeeded = len(results) - len(failed)
+        body = f"{succeeded} of {len(results)} service{'s' if len(results) != 1 else ''} changed."
+        if failed:
+            lines = []
+            for unit, state, message in failed:
+                lines.append(f"{unit}: {state}" + (f" - {message}" if message else ""))
+            body += "\n\nNot changed:\n" + "\n".join(lines)
+        if errors:
+            body += "\n\n" + "\n".join(errors)
+
+        dialog = Adw.MessageDialog.new(
+            self.get_root(),
+            f"{action.title()} finished" if not failed else f"{action.title()} partly failed",
+            body
+        )
+        dialog.add_response("ok", "OK")
+        dialog.present()
+        return False
+
+    def on_row_action(self, button, list_item, action: str):
+        item = list_item.get_item()
+        if item is not None:
+            self.on_service_action(button, item.name, action)
+
+    def should_show_service(self, service: ServiceItem) -> bool:
         # Apply search filter
         if self.current_search and self.current_search.lower() not in service.name.lower():
             return False
@@ -235,8 +502,17 @@ class ServicesPage(Gtk.Box):
         return True
 
     def on_search_changed(self, entry):
+        # search-changed is already delayed until typing pauses
+        previous = self.current_search.lower()
         self.current_search = entry.get_text()
-        self.load_services()
+        search = self.current_search.lower()
+        if previous in search:
+            change = Gtk.FilterChange.MORE_STRICT
+        elif search in previous:
+            change = Gtk.FilterChange.LESS_STRICT
+        else:
+            change = Gtk.FilterChange.DIFFERENT
+        self.filter.changed(change)
 
     def on_filter_toggled(self, button, filter_type):
         if button.get_active():
@@ -249,7 +525,7 @@ class ServicesPage(Gtk.Box):
                 self.inactive_button.set_active(False)
                 
             self.current_filter = filter_type
-            self.load_services()
+            self.filter.changed(Gtk.FilterChange.DIFFERENT)
         elif not self.all_button.get_active() and not self.active_button.get_active() and not self.inactive_button.get_active():
             # If no button is active, activate "All" button
             self.all_button.set_active(True)
@@ -270,7 +546,9 @@ class ServicesPage(Gtk.Box):
         if response == "confirm":
             try:
                 subprocess.check_call(["systemctl", action, f"{service_name}.service"])
-                self.load_services()  # Refresh the list
+                # The row follows the unit's signals, reload only without them
+                if not self.monitor.active:
+                    self.load_services()
             except subprocess.CalledProcessError:
                 error_dialog = Adw.MessageDialog.new(
                     self.get_root(),
@@ -280,5 +558,133 @@ class ServicesPage(Gtk.Box):
                 error_dialog.add_response("ok", "OK")
                 error_dialog.present()
 
+    def create_boot_page(self):
+        page = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        page.set_margin_top(20)
+        page.set_margin_bottom(20)
+        page.set_margin_start(20)
+        page.set_margin_end(20)
+
+        header = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        back_button = Gtk.Button(label="Back")
+        back_button.connect("clicked", lambda button: self.show_main())
+        header.append(back_button)
+
+        title_label = Gtk.Label()
+        title_label.set_markup("<span size='large'>Boot Performance</span>")
+        title_label.set_hexpand(True)
+        header.append(title_label)
+
+        self.disable_slowest_button = Gtk.Button(label="Disable Slowest")
+        self.disable_slowest_button.add_css_class("destructive-action")
+        self.disable_slowest_button.set_sensitive(False)
+        self.disable_slowest_button.connect("clicked", self.on_disable_slowest_clicked)
+        header.append(self.disable_slowest_button)
+        page.append(header)
+
+        self.boot_summary = Gtk.Label(label="Analyzing boot...")
+        self.boot_summary.set_wrap(True)
+        self.boot_summary.set_xalign(0)
+        page.append(self.boot_summary)
+
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_vexpand(True)
+        self.boot_list = Gtk.ListBox()
+        self.boot_list.set_selection_mode(Gtk.SelectionMode.NONE)
+        self.boot_list.add_css_class("boxed-list")
+        scrolled.set_child(self.boot_list)
+        page.append(scrolled)
+        return page
+
+    def load_boot_analysis(self):
+        # systemd-analyze runs once per boot, later loads only re-read is-enabled
+        def load():
+            try:
+                analysis = load_boot_analysis()
+                GLib.idle_add(self.on_boot_analysis_loaded, analysis, None)
+            except RuntimeError as e:
+                GLib.idle_add(self.on_boot_analysis_loaded, None, str(e))
+
+        thread = threading.Thread(target=load)
+        thread.daemon = True
+        thread.start()
+
+    def set_boot_timing(self, item: ServiceItem) -> bool:
+        if self.boot_analysis is None:
+            return False
+        unit = f"{item.name}.service"
+        seconds = self.boot_analysis.activation_time(unit)
+        seconds = -1.0 if seconds is None else seconds
+        critical = self.boot_analysis.on_critical_chain(unit)
+        if item.activation_time == seconds and item.critical == critical:
+            return False
+        item.activation_time = seconds
+        item.critical = critical
+        return True
+
+    def apply_boot_analysis(self):
+        changed = [self.set_boot_timing(item) for item in self.items_by_name.values()]
+        if any(changed):
+            # Rebind all rows once instead of once per service
+            n_items = self.store.get_n_items()
+            self.store.items_changed(0, n_items, n_items)
+
+    def clear_boot_list(self):
+        while row := self.boot_list.get_row_at_index(0):
+            self.boot_list.remove(row)
+
+    def on_boot_analysis_loaded(self, analysis, error):
+        if error:
+            self.clear_boot_list()
+            self.boot_summary.set_label(f"Boot timings are not available: {error}")
+            self.disable_slowest_button.set_sensitive(False)
+            return False
+
+        self.boot_analysis = analysis
+        self.apply_boot_analysis()
+        self.show_boot_analysis()
+        return False
+
+    def show_boot_analysis(self):
+        analysis = self.boot_analysis
+        self.clear_boot_list()
+        phases = " + ".join(f"{seconds:.1f} s {phase}" for phase, seconds in analysis.phases.items()
+                            if seconds is not None)
+        total = f"{analysis.total:.1f} s" if analysis.total is not None else "unknown"
+        self.boot_summary.set_label(f"Startup took {total}" + (f" ({phases})" if phases else "") +
+                                    ". Services on the critical chain delay the boot directly.")
+
+        candidates = analysis.disable_candidates()
+        self.disable_slowest_button.set_sensitive(bool(candidates))
+        self.disable_slowest_button.set_label(f"Disable {len(candidates)} Slowest" if candidates
+                                              else "Disable Slowest")
+
+        # Slowest services first
+        services = [(unit, seconds) for unit, seconds in analysis.blame if unit.endswith(".service")]
+        for unit, seconds in services[:30]:
+            name = unit[:-len(".service")]
+            item = self.items_by_name.get(name)
+            row = Adw.ActionRow(title=GLib.markup_escape_text(name))
+            subtitle = format_boot_timing(-1.0, analysis.on_critical_chain(unit))
+            if item and item.description:
+                subtitle = f"{item.description}, {subtitle}" if subtitle else item.description
+            row.set_subtitle(GLib.markup_escape_text(subtitle))
+
+            time_label = Gtk.Label(label=f"{seconds:.2f} s")
+            row.add_suffix(time_label)
+            if unit in candidates:
+                disable_button = Gtk.Button(label="Disable")
+                disable_button.set_valign(Gtk.Align.CENTER)
+                disable_button.connect("clicked", lambda button, name=name:
+                                       self.confirm_batch_action([name], "disable"))
+                row.add_suffix(disable_button)
+            self.boot_list.append(row)
+
+    def on_disable_slowest_clicked(self, button):
+        if self.boot_analysis:
+            names = [unit[:-len(".service")] for unit in self.boot_analysis.disable_candidates()]
+            if names:
+                self.confirm_batch_action(names, "disable")
+
     def show_main(self):
         self.stack.set_visible_child_name("main")
@@ -1,15 +1,15 @@
 import gi
 import subprocess
 import os
-import tempfile
-import threading
+from collections import deque
 from pathlib import Path
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
-from gi.repository import Gtk, Adw, GLib
+from gi.repository import Gtk, Adw
+from progress_channel import ProgressChannel
+from command_runner import run_privileged_command, run_dnf_script, build_install_script
+from package_index import is_installed
 
-from popular_apps import PopularAppsPage
-from download_manager import DownloadManagerPage
 
 class SoftwarePage(Gtk.Box):
     def __init__(self):
@@ -159,11 +159,13 @@ class SoftwarePage(Gtk.Box):
                 dialog.present()
         elif title == "Install popular apps":
             if not hasattr(self, 'popular_apps_page'):
+                from popular_apps import PopularAppsPage
                 self.popular_apps_page = PopularAppsPage()
                 self.stack.add_named(self.popular_apps_page, "popular_apps")
             self.stack.set_visible_child_name("popular_apps")
         elif title == "Install external apps":
             if not hasattr(self, 'download_manager_page'):
+                from download_manager import DownloadManagerPage
                 self.download_manager_page = DownloadManagerPage()
                 self.stack.add_named(self.download_manager_page, "download_manager")
             self.stack.set_visible_child_name("download_manager")
@@ -179,10 +181,9 @@ class SoftwarePage(Gtk.Box):
             self.stack.set_visible_child_name("drivers")
 
     def check_and_run_yumex(self):
-        try:
-            subprocess.run(['which', 'yumex'], check=True)
+        if is_installed('yumex'):
             subprocess.Popen(['yumex'])
-        except subprocess.CalledProcessError:
+        else:
             dialog = Adw.MessageDialog.new(
                 self.get_root(),
                 "Install Yumex",
@@ -231,88 +232,24 @@ class SoftwarePage(Gtk.Box):
                     progress_bar.set_fraction(fraction)
                 status_label.set_markup(f"<span size='small'>{text}</span>")
 
-            def install_thread():
-                try:
-                    # Create temporary script file
-                    script_content = """#!/bin/bash
-set -e
-
-# Function to handle dnf output
-handle_output() {
-    while IFS= read -r line; do
-        if [[ $line == *"Downloading"* ]]; then
-            echo "PROGRESS:30:$line"
-        elif [[ $line == *"Installing"* ]] || [[ $line == *"Upgrading"* ]]; then
-            echo "PROGRESS:60:$line"
-        elif [[ $line == *"Verifying"* ]]; then
-            echo "PROGRESS:80:$line"
-        elif [[ $line == *"Complete!"* ]]; then
-            echo "PROGRESS:100:Installation complete!"
-        else
-            echo "INFO:$line"
-        fi
-    done
-}
-
-# Update package cache
-echo "PROGRESS:10:Refreshing package cache..."
-dnf makecache 2>&1 | handle_output
-
-# Install package
-echo "PROGRESS:20:Starting installation..."
-dnf install -y yumex 2>&1 | handle_output
-"""
-                    
-                    with tempfile.NamedTemporaryFile(mode='w', suffix='.sh', delete=False) as script_file:
-                        script_file.write(script_content)
-                        script_path = script_file.name
-                    
-                    # Make script executable
-                    os.chmod(script_path, 0o755)
-                    
-                    # Execute script with pkexec and capture output
-                    process = subprocess.Popen(
-                        ["pkexec", script_path],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.STDOUT,
-                        universal_newlines=True,
-                        bufsize=1
-                    )
+            # Progress is applied at most once per frame
+            channel = ProgressChannel(progress_dialog, lambda fraction, text, lines: update_progress(fraction, text))
 
-                    # Process output in real-time
-                    while True:
-                        line = process.stdout.readline()
-                        if not line and process.poll() is not None:
-                            break
-                            
-                        if line.startswith("PROGRESS:"):
-                            _, percent, message = line.strip().split(":", 2)
-                            GLib.idle_add(update_progress, float(percent)/100, message)
-                        elif line.startswith("INFO:"):
-                            _, message = line.strip().split(":", 1)
-                            GLib.idle_add(update_progress, None, message)
-                    
-                    # Check if process was successful
-                    if process.returncode != 0:
-                        raise subprocess.CalledProcessError(process.returncode, "pkexec")
-                    
-                    # Remove temporary script
-                    os.unlink(script_path)
-                    
+            def on_finished(runner):
+                channel.close()
+                progress_dialog.close()
+                if runner.success:
                     # Launch yumex
-                    GLib.idle_add(lambda: subprocess.Popen(['yumex']))
-                    GLib.idle_add(progress_dialog.close)
-                    
-                except Exception as e:
-                    GLib.idle_add(progress_dialog.close)
-                    GLib.idle_add(lambda: self.show_error_dialog(
+                    subprocess.Popen(['yumex'])
+                else:
+                    self.show_error_dialog(
                         "Installation Error",
-                        f"Failed to install Yumex.\nError: {str(e)}"
-                    ))
-            
-            thread = threading.Thread(target=install_thread)
-            thread.daemon = True
-            thread.start()
+                        f"Failed to install Yumex.\nError: {runner.error_message}"
+                    )
+
+            runner = run_dnf_script(build_install_script(["yumex"]),
+                                    on_progress=channel.update, on_finished=on_finished)
+            progress_dialog.connect("response", lambda d, r: runner.cancel() if r == "cancel" else None)
 
     def show_error_dialog(self, title, message):
         dialog = Adw.MessageDialog.new(
@@ -363,6 +300,23 @@ class UpdateFrequencyPage(Gtk.Box):
         self.option3.set_group(self.option1)
         main_box.append(self.option3)
         
+        # Periodic unprivileged check, its result is shown when the updater starts.
+        # Imported here so loading this module stays cheap.
+        from update_check_service import timer_enabled
+        self.check_switch = Gtk.Switch()
+        self.check_switch.set_valign(Gtk.Align.CENTER)
+        self.check_switch.set_active(timer_enabled())
+        self.check_switch.connect("state-set", self._on_check_switch_set)
+        
+        check_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        check_box.set_margin_top(10)
+        check_label = Gtk.Label(label="Check for updates in the background")
+        check_label.set_hexpand(True)
+        check_label.set_halign(Gtk.Align.START)
+        check_box.append(check_label)
+        check_box.append(self.check_switch)
+        main_box.append(check_box)
+        
         # Add apply button
         button_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
         button_box.set_halign(Gtk.Align.END)
@@ -380,6 +334,21 @@ class UpdateFrequencyPage(Gtk.Box):
         
         self.append(main_box)
     
+    def _on_check_switch_set(self, switch, state):
+        from update_check_service import timer_enabled, enable_timer, disable_timer
+        ok = enable_timer() if state else disable_timer()
+        if not ok:
+            # Put the switch back to what the timer really is, without
+            # running this handler again
+            print("Failed to change the background update check")
+            enabled = timer_enabled()
+            switch.handler_block_by_func(self._on_check_switch_set)
+            switch.set_active(enabled)
+            switch.set_state(enabled)
+            switch.handler_unblock_by_func(self._on_check_switch_set)
+            return True
+        return False
+    
     def _load_current_settings(self):
         try:
             download_updates = "yes"
@@ -668,15 +637,14 @@ class CodecsPage(Gtk.Box):
             adj = scroll.get_vadjustment()
             adj.set_value(adj.get_upper() - adj.get_page_size())
 
-        def install_thread():
-            try:
-                # Get system information
-                GLib.idle_add(update_progress, 0.1, "Checking system information...")
-                
-                # Get OS version
-                os_info = subprocess.run(['cat', '/etc/os-release'], 
-                                      capture_output=True, text=True, check=True)
-                for line in os_info.stdout.split('\n'):
+        # Get system information
+        update_progress(0.1, "Checking system information...")
+
+        # Get OS version
+        os_version = None
+        try:
+            with open('/etc/os-release', 'r') as f:
+                for line in f:
                     if line.startswith('VERSION='):
                         if 'Cooker' in line:
                             os_version = 'cooker'
@@ -685,96 +653,84 @@ class CodecsPage(Gtk.Box):
                         elif 'Rock' in line:
                             os_version = 'rock'
                         break
-                
-                # Get architecture
-                arch_info = subprocess.run(['uname', '-a'], 
-                                        capture_output=True, text=True, check=True)
-                if 'x86_64' in arch_info.stdout:
-                    arch = 'x86_64'
-                elif 'znver1' in arch_info.stdout:
-                    arch = 'znver1'
-                elif 'aarch64' in arch_info.stdout:
-                    arch = 'aarch64'
-                elif 'riscv64' in arch_info.stdout:
-                    arch = 'riscv64'
-                else:
-                    arch = 'x86_64'  # default to x86_64 if unknown
-                
-                # Prepare DNF command
-                packages = ' '.join(selected_codecs)
-                repo_arg = f'--enablerepo={os_version}-{arch}-restricted'
-                dnf_cmd = ['pkexec', 'dnf', 'install', '-y'] + packages.split() + [repo_arg]
-                
-                GLib.idle_add(update_progress, 0.2, f"Installing selected codecs using {os_version}-{arch} repository...\n")
-                
-                # Run DNF with output capture
-                process = subprocess.Popen(
-                    dnf_cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True
-                )
+        except OSError:
+            pass
 
-                # Process output in real-time
-                output_lines = []
-                progress = 0.2
-                downloading = False
-                installing = False
-                
-                while True:
-                    line = process.stdout.readline()
-                    if not line:
-                        break
-                    
-                    line = line.strip()
-                    if line:
-                        # Keep only the last 8 lines
-                        output_lines = (output_lines + [line])[-8:]
-                        
-                        # Update progress based on operation
-                        if "Downloading" in line:
-                            if not downloading:
-                                downloading = True
-                                progress = 0.4
-                        elif "Installing" in line or "Upgrading" in line:
-                            if not installing:
-                                installing = True
-                                progress = 0.7
-                        elif "Complete!" in line:
-                            progress = 0.9
-                        
-                        GLib.idle_add(update_progress, progress, "\n".join(output_lines))
-
-                # Wait for process to complete
-                process.wait()
-
-                if process.returncode == 0:
-                    GLib.idle_add(update_progress, 1.0, "Codec installation completed successfully!")
-                    GLib.idle_add(dialog.close)
-                    
-                    success_dialog = Adw.MessageDialog.new(
-                        self.get_root(),
-                        "Installation Complete",
-                        f"Selected codecs have been successfully installed!"
-                    )
-                    success_dialog.add_response("ok", "OK")
-                    GLib.idle_add(success_dialog.present)
-                else:
-                    raise subprocess.CalledProcessError(process.returncode, dnf_cmd)
-                
-            except Exception as e:
-                GLib.idle_add(dialog.close)
+        if os_version is None:
+            dialog.close()
+            error_dialog = Adw.MessageDialog.new(
+                self.get_root(),
+                "Installation Error",
+                "Failed to install codecs: could not detect the OpenMandriva release."
+            )
+            error_dialog.add_response("ok", "OK")
+            error_dialog.present()
+            return
+
+        # Get architecture
+        machine = os.uname().machine
+        if machine in ('x86_64', 'znver1', 'aarch64', 'riscv64'):
+            arch = machine
+        else:
+            arch = 'x86_64'  # default to x86_64 if unknown
+
+        # Prepare DNF command
+        repo_arg = f'--enablerepo={os_version}-{arch}-restricted'
+        dnf_cmd = ['dnf', 'install', '-y'] + selected_codecs + [repo_arg]
+
+        update_progress(0.2, f"Installing selected codecs using {os_version}-{arch} repository...\n")
+
+        # Process output as it arrives, the dialog is refreshed at most once per frame
+        output_lines = deque(maxlen=8)  # Keep only the last 8 lines
+        state = {'downloading': False, 'installing': False}
+
+        def show_progress(fraction, text, lines):
+            output_lines.extend(lines)
+            update_progress(fraction, "\n".join(output_lines))
+
+        channel = ProgressChannel(dialog, show_progress)
+        channel.update(0.2)
+
+        def on_line(line, is_error):
+            line = line.strip()
+            if not line:
+                return
+            channel.append_line(line)
+
+            # Update progress based on operation
+            if "Downloading" in line:
+                if not state['downloading']:
+                    state['downloading'] = True
+                    channel.update(0.4)
+            elif "Installing" in line or "Upgrading" in line:
+                if not state['installing']:
+                    state['installing'] = True
+                    channel.update(0.7)
+            elif "Complete!" in line:
+                channel.update(0.9)
+
+        def on_finished(runner):
+            channel.close()
+            dialog.close()
+            if runner.success:
+                success_dialog = Adw.MessageDialog.new(
+                    self.get_root(),
+                    "Installation Complete",
+                    f"Selected codecs have been successfully installed!"
+                )
+                success_dialog.add_response("ok", "OK")
+                success_dialog.present()
+            else:
                 error_dialog = Adw.MessageDialog.new(
                     self.get_root(),
                     "Installation Error",
-                    f"Failed to install codecs: {str(e)}"
+                    f"Failed to install codecs: {runner.error_message}"
                 )
                 error_dialog.add_response("ok", "OK")
-                GLib.idle_add(error_dialog.present)
+                error_dialog.present()
 
-        thread = threading.Thread(target=install_thread)
-        thread.daemon = True
-        thread.start()
+        runner = run_privileged_command(dnf_cmd, on_line=on_line, on_finished=on_finished)
+        dialog.connect("response", lambda d, r: runner.cancel() if r == "cancel" else None)
 
 class DriversPage(Gtk.Box):
     def __init__(self):
@@ -930,10 +886,10 @@ class DriversPage(Gtk.Box):
         )
         progress_dialog.present()
         
-        def on_installation_complete(process):
+        def on_installation_complete(runner):
             progress_dialog.close()
             
-            if process.returncode == 0:
+            if runner.success:
                 message = f"{driver_name} have been installed successfully!"
                 if post_success_message:
                     message += "\n\n" + post_success_message
@@ -954,29 +910,4 @@ class DriversPage(Gtk.Box):
                 error_dialog.add_response("ok", "OK")
                 error_dialog.present()
         # Run the installation with pkexec
-        try:
-            process = subprocess.Popen(
-                ["pkexec"] + command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            
-            # Use GLib.idle_add to check process status
-            def check_process():
-                if process.poll() is None:
-                    return True
-                
-                on_installation_complete(process)
-                return False
-            
-            GLib.idle_add(check_process)
-            
-        except Exception as e:
-            progress_dialog.close()
-            error_dialog = Adw.MessageDialog.new(
-                self.get_root(),
-                "Installation Failed",
-                f"Failed to start installation: {str(e)}"
-            )
-            error_dialog.add_response("ok", "OK")
-            error_dialog.present()
+        run_privileged_command(command, on_finished=on_installation_complete)
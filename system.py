@@ -1,22 +1,14 @@
 import gi
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
-from gi.repository import Gtk, Adw
-from system_info import get_system_info
-from hardware_info import HardwareInfoPage
-from datetime_settings import DateTimeSettingsPage
-from system_logs import SystemLogsPage
-from kernel_manager import KernelManagerPage
-from tweaks import TweaksPage
-from news import NewsPage
+from gi.repository import Gtk, Adw, GLib
+from system_info import probe_system_info, BOOT_SCOPED_FACTS
+from facts_cache import load_facts, update_facts
 
 class SystemInfoPage(Gtk.Box):
     def __init__(self):
         super().__init__(orientation=Gtk.Orientation.VERTICAL)
         
-        # Get system information
-        info = get_system_info()
-        
         # Create title
         title_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
         title_box.set_margin_top(20)
@@ -29,6 +21,13 @@ class SystemInfoPage(Gtk.Box):
         title_label.set_justify(Gtk.Justification.CENTER)
         title_box.append(title_label)
         
+        # Refresh button probes everything again, bypassing the cache
+        refresh_button = Gtk.Button(label="Refresh")
+        refresh_button.set_halign(Gtk.Align.CENTER)
+        refresh_button.set_margin_top(10)
+        refresh_button.connect("clicked", self.on_refresh_clicked)
+        title_box.append(refresh_button)
+        
         separator = Gtk.Separator(orientation=Gtk.Orientation.HORIZONTAL)
         
         self.append(title_box)
@@ -41,18 +40,19 @@ class SystemInfoPage(Gtk.Box):
         info_box.set_margin_start(20)
         info_box.set_margin_end(20)
         
-        # Add system information
+        # Add system information, values are filled in as each probe finishes
         info_items = [
-            ("System Name", info['system_name']),
-            ("Distribution", info['distribution']),
-            ("Architecture", info['architecture']),
-            ("Kernel Version", info['kernel']),
-            ("Desktop Environment", info['desktop_environment']),
-            ("Graphics Driver", info['graphics_driver']),
-            ("Hostname", info['hostname'])
+            ("System Name", 'system_name'),
+            ("Distribution", 'distribution'),
+            ("Architecture", 'architecture'),
+            ("Kernel Version", 'kernel'),
+            ("Desktop Environment", 'desktop_environment'),
+            ("Graphics Driver", 'graphics_driver'),
+            ("Hostname", 'hostname')
         ]
         
-        for label, value in info_items:
+        self.value_labels = {}
+        for label, key in info_items:
             row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
             row.set_margin_bottom(10)
             
@@ -61,9 +61,11 @@ class SystemInfoPage(Gtk.Box):
             label_widget.set_halign(Gtk.Align.START)
             label_widget.set_width_chars(20)
             
-            value_widget = Gtk.Label(label=value)
+            value_widget = Gtk.Label(label="Loading...")
             value_widget.set_halign(Gtk.Align.START)
             value_widget.set_selectable(True)
+            value_widget.add_css_class("dim-label")
+            self.value_labels[key] = value_widget
             
             row.append(label_widget)
             row.append(value_widget)
@@ -71,6 +73,35 @@ class SystemInfoPage(Gtk.Box):
             info_box.append(row)
         
         self.append(info_box)
+        
+        # Facts cached earlier in this boot are shown without probing again
+        cached = load_facts('system_info')
+        for key, value in cached.items():
+            self.set_info_value(key, value, store=False)
+        
+        missing = [key for key in self.value_labels if key not in cached]
+        self.probe_info(missing)
+    
+    def probe_info(self, keys):
+        # Probe system information without blocking the main thread
+        probe_system_info(lambda key, value: GLib.idle_add(self.set_info_value, key, value),
+                          keys=keys)
+    
+    def on_refresh_clicked(self, button):
+        for value_widget in self.value_labels.values():
+            value_widget.set_label("Loading...")
+            value_widget.add_css_class("dim-label")
+        self.probe_info(list(self.value_labels))
+    
+    def set_info_value(self, key, value, store=True):
+        value_widget = self.value_labels.get(key)
+        if value_widget:
+            value_widget.set_label(value)
+            value_widget.remove_css_class("dim-label")
+        # Failed probes are not cached so they are retried on the next launch
+        if store and key in BOOT_SCOPED_FACTS and value != "Unknown":
+            update_facts('system_info', {key: value})
+        return False
 
 class SystemPage(Gtk.Box):
     def __init__(self):
@@ -235,31 +266,37 @@ class SystemPage(Gtk.Box):
             self.stack.set_visible_child_name("system_info")
         elif title == "Hardware Info":
             if not hasattr(self, 'hardware_info_page'):
+                from hardware_info import HardwareInfoPage
                 self.hardware_info_page = HardwareInfoPage()
                 self.stack.add_named(self.hardware_info_page, "hardware_info")
             self.stack.set_visible_child_name("hardware_info")
         elif title == "Date & Time":
             if not hasattr(self, 'datetime_page'):
+                from datetime_settings import DateTimeSettingsPage
                 self.datetime_page = DateTimeSettingsPage()
                 self.stack.add_named(self.datetime_page, "datetime")
             self.stack.set_visible_child_name("datetime")
         elif title == "System Logs":
             if not hasattr(self, 'logs_page'):
+                from system_logs import SystemLogsPage
                 self.logs_page = SystemLogsPage()
                 self.stack.add_named(self.logs_page, "logs")
             self.stack.set_visible_child_name("logs")
         elif title == "Kernels":
             if not hasattr(self, 'kernel_page'):
+                from kernel_manager import KernelManagerPage
                 self.kernel_page = KernelManagerPage(self)
                 self.stack.add_named(self.kernel_page, "kernels")
             self.stack.set_visible_child_name("kernels")
         elif title == "News":
             if not hasattr(self, 'news_page'):
+                from news import NewsPage
                 self.news_page = NewsPage(self)
                 self.stack.add_named(self.news_page, "news")
             self.stack.set_visible_child_name("news")
         elif title == "Tweaks":
             if not hasattr(self, 'tweaks_page'):
+                from tweaks import TweaksPage
                 self.tweaks_page = TweaksPage(self)
             if not hasattr(self, 'tweaks'):
                 self.stack.add_named(self.tweaks_page, "tweaks")
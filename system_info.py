@@ -2,31 +2,59 @@ import os
 import platform
 import subprocess
 import re
+from concurrent.futures import ThreadPoolExecutor
+
+# Seconds a single external command may take before its probe gives up on it
+PROBE_TIMEOUT = 3
+
+# Shared pool so probes from different pages never pile up extra threads
+_probe_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="system-probe")
+
+def get_system_probes(timeout=PROBE_TIMEOUT):
+    return {
+        'system_name': platform.system,
+        'distribution': get_distribution_info,
+        'architecture': platform.machine,
+        'kernel': platform.release,
+        'desktop_environment': get_desktop_environment,
+        'hostname': platform.node,
+        'graphics_driver': lambda: get_graphics_driver_info(timeout),
+    }
+
+def run_probes(probes, on_result):
+    # Run every probe concurrently; on_result(key, value) is called from a
+    # worker thread as soon as each one finishes
+    def done(key, future):
+        try:
+            value = future.result()
+        except Exception as e:
+            print(f"Error probing {key}: {e}")
+            value = "Unknown"
+        on_result(key, value)
+
+    for key, probe in probes.items():
+        future = _probe_executor.submit(probe)
+        future.add_done_callback(lambda future, key=key: done(key, future))
+
+# Facts that cannot change until the next boot or package update
+BOOT_SCOPED_FACTS = ('system_name', 'distribution', 'architecture', 'kernel', 'graphics_driver')
+
+def probe_system_info(on_result, timeout=PROBE_TIMEOUT, keys=None):
+    probes = get_system_probes(timeout)
+    if keys is not None:
+        probes = {key: probe for key, probe in probes.items() if key in keys}
+    run_probes(probes, on_result)
 
 def get_system_info():
     info = {}
-    
-    # Get OS information
-    info['system_name'] = platform.system()
-    info['distribution'] = get_distribution_info()
-    info['architecture'] = platform.machine()
-    info['kernel'] = platform.release()
-    
-    # Get desktop environment
-    info['desktop_environment'] = get_desktop_environment()
-    
-    # Get hostname
-    info['hostname'] = platform.node()
-    
-    # Get graphics driver information
-    info['graphics_driver'] = get_graphics_driver_info()
-    
+    for key, probe in get_system_probes().items():
+        info[key] = probe()
     return info
 
-def get_graphics_driver_info():
+def get_graphics_driver_info(timeout=PROBE_TIMEOUT):
     # First try to get Mesa information using glxinfo
     try:
-        glxinfo = subprocess.run(['glxinfo'], capture_output=True, text=True)
+        glxinfo = subprocess.run(['glxinfo'], capture_output=True, text=True, timeout=timeout)
         if glxinfo.returncode == 0:
             output = glxinfo.stdout
             
@@ -45,21 +73,21 @@ def get_graphics_driver_info():
                 if 'nvidia' in vendor.lower():
                     return f"NVIDIA {version}"
                 return f"{vendor} - {version}"
-    except FileNotFoundError:
+    except (FileNotFoundError, subprocess.TimeoutExpired):
         pass
     
     # If glxinfo fails, try nvidia-smi
     try:
         nvidia_info = subprocess.run(['nvidia-smi', '--query-gpu=driver_version', '--format=csv,noheader'],
-                                   capture_output=True, text=True)
+                                   capture_output=True, text=True, timeout=timeout)
         if nvidia_info.returncode == 0:
             return f"NVIDIA {nvidia_info.stdout.strip()}"
-    except FileNotFoundError:
+    except (FileNotFoundError, subprocess.TimeoutExpired):
         pass
     
     # If both methods fail, try lspci as a last resort
     try:
-        lspci = subprocess.run(['lspci', '-k'], capture_output=True, text=True)
+        lspci = subprocess.run(['lspci', '-k'], capture_output=True, text=True, timeout=timeout)
         if lspci.returncode == 0:
             output = lspci.stdout
             # Look for graphics related entries
@@ -110,12 +138,22 @@ def get_desktop_environment():
         return current_desktop.upper()
     
     # If XDG_CURRENT_DESKTOP is not set, try to detect running processes
+    # with a single pass over /proc instead of one pgrep per desktop
+    process_names = []
+    try:
+        for pid in os.listdir('/proc'):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f'/proc/{pid}/comm', 'r') as f:
+                    process_names.append(f.read().strip().lower())
+            except OSError:
+                continue
+    except OSError:
+        pass
+    
     for de in ['gnome', 'kde', 'xfce', 'mate', 'lxde', 'cinnamon']:
-        try:
-            output = subprocess.check_output(f'pgrep -l {de}', shell=True)
-            if output:
-                return de.upper()
-        except:
-            continue
+        if any(de in name for name in process_names):
+            return de.upper()
     
     return "Unknown"
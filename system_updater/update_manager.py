@@ -4,11 +4,35 @@ import subprocess
 import threading
 import sys
 import os
+import time
+from collections import deque
 from typing import List, Optional, Tuple
 
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
 from gi.repository import Gtk, Adw, GLib, Gio, GObject
+from progress_channel import ProgressChannel
+from repo_metadata import stale_repositories, refresh_command, handle_marker, REFRESHED_MARKER
+from dnf_updates import check_updates_incremental
+from update_list import UpdateList, ACTION_COLORS
+from transaction_progress import TransactionProgress, TransactionRecorder
+from update_prefetch import UpdatePrefetcher
+from update_check_service import load_pending_updates, save_pending_updates
+
+# Environment variable naming a file that update runs are recorded to
+RECORD_ENV = 'TEARS_RECORD_TRANSACTION'
+
+def format_age(timestamp):
+    minutes = int((time.time() - (timestamp or 0)) // 60)
+    if minutes < 1:
+        return "just now"
+    if minutes < 60:
+        return f"{minutes} minute{'s' if minutes != 1 else ''} ago"
+    hours = minutes // 60
+    if hours < 24:
+        return f"{hours} hour{'s' if hours != 1 else ''} ago"
+    days = hours // 24
+    return f"{days} day{'s' if days != 1 else ''} ago"
 
 class UpdateManagerApp(Adw.Application):
     def __init__(self):
@@ -35,16 +59,9 @@ class UpdateManager(Adw.ApplicationWindow):
         header = Adw.HeaderBar()
         self.main_box.append(header)
         
-        # Package list
-        self.package_list = Gtk.ListBox()
-        self.package_list.set_selection_mode(Gtk.SelectionMode.NONE)
-        self.package_list.add_css_class("boxed-list")
-        
-        scrolled = Gtk.ScrolledWindow()
-        scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
-        scrolled.set_min_content_height(300)
-        scrolled.set_child(self.package_list)
-        self.main_box.append(scrolled)
+        # Package list, rows are only created for the packages on screen
+        self.package_list = UpdateList()
+        self.main_box.append(self.package_list)
         
         # Progress area
         self.progress_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
@@ -62,6 +79,14 @@ class UpdateManager(Adw.ApplicationWindow):
         self.progress_bar = Gtk.ProgressBar()
         self.progress_box.append(self.progress_bar)
         
+        # State of the background download of pending updates
+        self.prefetch_label = Gtk.Label()
+        self.prefetch_label.set_xalign(0)
+        self.prefetch_label.add_css_class("dim-label")
+        self.prefetch_label.set_visible(False)
+        self.progress_box.append(self.prefetch_label)
+        self.prefetcher = UpdatePrefetcher(self.on_prefetch_state_changed)
+        
         # Action buttons
         self.action_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
         self.action_box.set_halign(Gtk.Align.END)
@@ -75,6 +100,11 @@ class UpdateManager(Adw.ApplicationWindow):
         self.refresh_button.connect("clicked", self.check_updates)
         self.action_box.append(self.refresh_button)
         
+        # The background download only starts when asked for, it needs root
+        self.download_button = Gtk.Button(label="Download in Background")
+        self.download_button.connect("clicked", lambda button: self.prefetcher.start())
+        self.action_box.append(self.download_button)
+        
         self.update_button = Gtk.Button(label="Update System")
         self.update_button.add_css_class("suggested-action")
         self.update_button.connect("clicked", self.on_update_clicked)
@@ -83,152 +113,148 @@ class UpdateManager(Adw.ApplicationWindow):
         # Initial state
         self.progress_box.set_visible(False)
         self.update_button.set_sensitive(False)
-        self.check_updates()
-
-    def add_package_row(self, package_info):
-        """Add a package row to the list with action type and details"""
-        row = Gtk.ListBoxRow()
-        box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
-        box.set_margin_top(5)
-        box.set_margin_bottom(5)
-        box.set_margin_start(10)
-        box.set_margin_end(10)
-        
-        # Package info box (left side)
-        info_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
-        
-        # Package name with arch
-        name_label = Gtk.Label(label=f"{package_info['name']} ({package_info['arch']})")
-        name_label.set_xalign(0)
-        name_label.add_css_class("heading")
-        info_box.append(name_label)
-        
-        # Version and size
-        details = []
-        if "version" in package_info:
-            details.append(package_info["version"])
-        if "size" in package_info:
-            details.append(package_info["size"])
-        
-        if details:
-            version_label = Gtk.Label()
-            version_label.set_markup(f'<span size="small">{" - ".join(details)}</span>')
-            version_label.set_xalign(0)
-            info_box.append(version_label)
-        
-        box.append(info_box)
-        
-        # Action type (right side)
-        action_label = Gtk.Label()
-        action_label.add_css_class("caption")
-        
-        action_colors = {
-            "upgrade": "#2ec27e",    # Green
-            "reinstall": "#1c71d8",  # Blue
-            "downgrade": "#e66100",  # Orange
-            "install": "#3584e4",    # Light Blue
-            "remove": "#c01c28"      # Red
-        }
-        
-        action_text = package_info["action"].capitalize()
-        color = action_colors.get(package_info["action"], "#888888")
-        action_label.set_markup(f'<span color="{color}">{action_text}</span>')
-        
-        box.append(action_label)
-        
-        row.set_child(box)
-        self.package_list.append(row)
+        self.download_button.set_sensitive(False)
+        
+        # Show the result of the last background check right away and
+        # revalidate it without clearing the list
+        pending = load_pending_updates()
+        if pending:
+            updates, checked = pending
+            self.progress_box.set_visible(True)
+            self.update_package_list(updates)
+            self.status_label.set_markup(
+                self.status_label.get_label() + f"\n<i>Last checked {format_age(checked)}</i>"
+            )
+            self.check_updates(revalidate=True)
+        else:
+            self.check_updates()
 
     def clear_package_list(self):
-        while True:
-            row = self.package_list.get_first_child()
-            if row is None:
-                break
-            self.package_list.remove(row)
+        self.package_list.clear()
 
-    def check_updates(self, button=None):
-        self.clear_package_list()
-        self.status_label.set_markup("<i>Checking for updates...</i>")
+    def check_updates(self, button=None, revalidate=False):
         self.progress_box.set_visible(True)
         self.progress_bar.set_fraction(0.0)
-        self.update_button.set_sensitive(False)
+        if revalidate:
+            # Keep what is shown, it is replaced only if the check differs
+            self.revalidating = True
+        else:
+            self.revalidating = False
+            self.clear_package_list()
+            self.status_label.set_markup("<i>Checking for updates...</i>")
+            self.update_button.set_sensitive(False)
+        
+        # Results of an older check that is still running are ignored
+        self.check_generation = getattr(self, 'check_generation', 0) + 1
+        generation = self.check_generation
+        
+        def in_main_loop(func):
+            def callback(*args):
+                if generation == self.check_generation:
+                    func(*args)
+                return False
+            return lambda *args: GLib.idle_add(callback, *args)
+        
+        # Packages are added to the list in batches, at most once per frame
+        def add_packages(fraction, status, records):
+            if generation == self.check_generation and records and not self.revalidating:
+                self.package_list.add_records(records)
+                self.status_label.set_markup(f"<i>Checking for updates... {len(self.package_list.store)} found</i>")
+        
+        channel = ProgressChannel(self, add_packages)
+        
+        def after_streaming(func, close=True):
+            # Records still queued in the channel are added before func runs
+            def callback(*args):
+                if close:
+                    channel.close()
+                else:
+                    channel.flush()
+                func(*args)
+            return in_main_loop(callback)
         
         def check_thread():
-            try:
-                # Use pkexec with sh -c to run both commands with a single root prompt
-                process = subprocess.Popen(
-                    ["pkexec", "sh", "-c", "dnf5 clean all && dnf5 distro-sync --assumeno"],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    universal_newlines=True
-                )
-                
-                output, error = process.communicate()
-                updates = []
-                current_section = None
-                
-                for line in output.split('\n'):
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    # Track sections
-                    if line.startswith("Reinstalling:"):
-                        current_section = "reinstall"
-                        continue
-                    elif line.startswith("Upgrading:"):
-                        current_section = "upgrade"
-                        continue
-                    elif line.startswith("Downgrading:"):
-                        current_section = "downgrade"
-                        continue
-                    elif line.startswith("Installing:"):
-                        current_section = "install"
-                        continue
-                    elif line.startswith("Removing:"):
-                        current_section = "remove"
-                        continue
-                    elif line.startswith("Transaction Summary:"):
-                        break
-                    
-                    # Parse package lines
-                    if current_section and not line.startswith(" ") and not line.startswith("replacing"):
-                        try:
-                            parts = line.split()
-                            if len(parts) >= 3:  # name arch version repo size
-                                package_info = {
-                                    "name": parts[0],
-                                    "arch": parts[1],
-                                    "version": parts[2],
-                                    "action": current_section
-                                }
-                                
-                                # Try to get size if available
-                                if len(parts) >= 5:
-                                    package_info["size"] = f"{parts[-2]} {parts[-1]}"
-                                
-                                updates.append(package_info)
-                        except Exception as e:
-                            print(f"Error parsing package line: {str(e)}")
-                            continue
-                
-                GLib.idle_add(self.update_package_list, updates)
-                
-            except Exception as e:
-                GLib.idle_add(
-                    self.status_label.set_markup,
-                    f"<span color='red'>Error checking updates: {str(e)}</span>"
-                )
+            # Cached metadata answers first, the refreshing check reconciles it.
+            # It is skipped while the shared record says no repo expired.
+            check_updates_incremental(
+                channel.append_line,
+                after_streaming(self.show_cached_updates, close=False),
+                after_streaming(self.show_refreshed_updates),
+                after_streaming(self.show_check_error),
+                refresh=bool(stale_repositories())
+            )
         
         thread = threading.Thread(target=check_thread)
         thread.daemon = True
         thread.start()
 
-    def update_package_list(self, updates):
-        self.clear_package_list()
+    def show_cached_updates(self, updates):
+        if self.revalidating:
+            # Nothing was streamed, the cached answer replaces the startup result
+            if updates is not None:
+                self.update_package_list(updates)
+            return
+        if updates is None:
+            # Nothing cached, the refreshing check streams into the list instead
+            self.clear_package_list()
+            self.status_label.set_markup("<i>Downloading package information...</i>")
+            return
+        self.update_package_list(updates, rebuild=False)
+        self.status_label.set_markup(
+            self.status_label.get_label() + "\n<i>Checking for newer package information...</i>"
+        )
+        self.progress_bar.set_fraction(0.5)
+
+    def show_refreshed_updates(self, updates, changed):
+        # Streamed records are already listed unless the startup result is shown
+        if changed or self.revalidating:
+            self.update_package_list(updates)
+        else:
+            self.update_package_list(updates, rebuild=False)
+        
+        # Later launches show this result without running dnf
+        save_pending_updates(updates)
+        
+        # Start downloading while the user reviews the list, only after a check
+        # the user started and if that is enabled, it asks for authorization
+        if updates and not self.revalidating and self.prefetcher.auto_start_enabled():
+            self.prefetcher.start()
+
+    def on_prefetch_state_changed(self, state):
+        messages = {
+            "downloading": "Downloading updates in the background...",
+            "stopping": "Stopping the background download...",
+            "paused": "Background download paused on a metered connection",
+            "done": "Updates downloaded, ready to install",
+            "failed": "Background download failed, updates will be downloaded during the update",
+        }
+        self.prefetch_label.set_label(messages.get(state, ""))
+        self.prefetch_label.set_visible(state in messages)
+        self.update_download_button()
+
+    def update_download_button(self):
+        self.download_button.set_sensitive(
+            self.update_button.get_sensitive() and self.prefetcher.state in ("idle", "failed"))
+
+    def show_check_error(self, error, cached):
+        if cached is None and not self.revalidating:
+            self.status_label.set_markup(
+                f"<span color='red'>Error checking updates: {GLib.markup_escape_text(error)}</span>"
+            )
+        else:
+            # Keep the results shown, they are only possibly out of date
+            if cached is not None:
+                self.update_package_list(cached, rebuild=False)
+            self.status_label.set_markup(
+                self.status_label.get_label() +
+                "\n<span color='red'>Could not refresh package information, results may be outdated</span>"
+            )
+        self.progress_bar.set_fraction(1.0)
+
+    def update_package_list(self, updates, rebuild=True):
+        if rebuild:
+            self.package_list.replace_records(updates)
         if updates:
-            for package in updates:
-                self.add_package_row(package)
             self.status_label.set_markup(
                 f"<i>{len(updates)} package{'s' if len(updates) != 1 else ''} to update</i>"
             )
@@ -236,6 +262,7 @@ class UpdateManager(Adw.ApplicationWindow):
         else:
             self.status_label.set_markup("<i>System is up to date</i>")
             self.update_button.set_sensitive(False)
+        self.update_download_button()
         self.progress_bar.set_fraction(1.0)
 
     def on_update_clicked(self, button):
@@ -250,108 +277,77 @@ class UpdateManager(Adw.ApplicationWindow):
         self.status_label.set_visible(True)
         self.refresh_button.set_sensitive(False)
         self.update_button.set_sensitive(False)
+        self.download_button.set_sensitive(False)
+        
+        # Packages the prefetch already downloaded are taken from the dnf cache.
+        # An unfinished prefetch is stopped first and the update only starts
+        # once it has exited, so the two never compete for the dnf lock.
+        prefetched = self.prefetcher.state == "done"
+        if self.prefetcher.runner:
+            self.status_label.set_markup("<i>Stopping the background download...</i>")
+        self.prefetcher.stop(lambda: self.run_update(prefetched))
+
+    def run_update(self, prefetched):
+        # Worker updates are applied at most once per frame
+        channel = ProgressChannel(self, self.apply_update_progress)
         
         def update_thread():
             try:
-                self.status_label.set_markup("<i>Starting system update...</i>")
+                channel.update(status="<i>Installing downloaded updates...</i>" if prefetched
+                               else "<i>Starting system update...</i>")
+                # upgrade is the operation check-upgrade previewed. Only repos
+                # whose metadata expired are refreshed, in the same root session.
+                command = "dnf5 upgrade -y"
+                stale = stale_repositories()
+                if stale:
+                    command = (f"{refresh_command(stale, 'dnf5')} && "
+                               f"echo \"{REFRESHED_MARKER}{','.join(stale)}\"; {command}")
                 self.update_process = subprocess.Popen(
-                    ["pkexec", "dnf5", "distro-sync", "-y"],
+                    ["pkexec", "sh", "-c", command],
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
                     universal_newlines=True,
                     bufsize=1
                 )
                 
+                # stderr is drained while the progress is read, a dnf printing
+                # many warnings would otherwise block on a full pipe
+                errors = deque(maxlen=50)
+                stderr = self.update_process.stderr
+                reader = threading.Thread(target=lambda: errors.extend(stderr))
+                reader.daemon = True
+                reader.start()
+                
                 updated_packages = []
-                total_size = None
-                current_phase = None
-                current_item = 0
-                total_items = 0
+                seen_packages = set()
+                progress = TransactionProgress()
                 
-                while True:
-                    output = self.update_process.stdout.readline()
-                    if output == '' and self.update_process.poll() is not None:
-                        break
-                    if output:
-                        output = output.strip()
-                        print(f"DNF5 Output: {output}")
-                        
-                        # Parse total size
-                        if "Total size of inbound packages is" in output:
-                            try:
-                                total_size = output.split("is")[1].split(".")[0].strip()
-                                GLib.idle_add(
-                                    self.status_label.set_markup,
-                                    f"<i>Total download size: {total_size}</i>"
-                                )
-                            except Exception as e:
-                                print(f"Error parsing total size: {str(e)}")
-                        
-                        # Parse progress lines [X/Y]
-                        elif "[" in output and "]" in output:
-                            try:
-                                progress_part = output[output.find("[")+1:output.find("]")]
-                                current_item, total_items = map(int, progress_part.split("/"))
-                                
-                                # Extract package name and progress
-                                rest = output[output.find("]")+1:].strip()
-                                
-                                if "%" in output:  # Download/Install progress
-                                    parts = rest.split("%", 1)
-                                    package_name = parts[0].strip()
-                                    progress = float(package_name.split()[-1])
-                                    package_name = " ".join(package_name.split()[:-1])
-                                    
-                                    # Extract speed and size if available
-                                    extra_info = ""
-                                    if "|" in parts[1]:
-                                        details = parts[1].split("|")
-                                        if len(details) >= 3:
-                                            speed = details[1].strip()
-                                            size = details[2].strip()
-                                            extra_info = f"\nSpeed: {speed}\nSize: {size}"
-                                    
-                                    status = f"<i>Processing [{current_item}/{total_items}]:\n{package_name}\n{progress}%{extra_info}</i>"
-                                    GLib.idle_add(
-                                        self.status_label.set_markup,
-                                        status
-                                    )
-                                    GLib.idle_add(
-                                        self.progress_bar.set_fraction,
-                                        progress / 100.0
-                                    )
-                                
-                                # Update overall progress
-                                overall_progress = current_item / total_items
-                                GLib.idle_add(
-                                    self.progress_bar.set_fraction,
-                                    overall_progress
-                                )
-                            
-                            except Exception as e:
-                                print(f"Error parsing progress: {str(e)}")
-                        
-                        # Track transaction phases
-                        elif "Running transaction" in output:
-                            current_phase = "install"
-                            GLib.idle_add(
-                                self.status_label.set_markup,
-                                "<i>Running transaction...</i>"
-                            )
-                        elif "Verify package files" in output:
-                            current_phase = "verify"
-                            GLib.idle_add(
-                                self.status_label.set_markup,
-                                "<i>Verifying package files...</i>"
-                            )
-                        elif "Prepare transaction" in output:
-                            current_phase = "prepare"
-                            GLib.idle_add(
-                                self.status_label.set_markup,
-                                "<i>Preparing transaction...</i>"
-                            )
+                # Set TEARS_RECORD_TRANSACTION to a file to record the run for replay
+                record_path = os.environ.get(RECORD_ENV)
+                recorder = TransactionRecorder(record_path) if record_path else None
+                
+                for output in self.update_process.stdout:
+                    if handle_marker(output.strip()):
+                        continue
+                    if recorder:
+                        recorder.record(output)
+                    for kind, data in progress.feed(output):
+                        # The old version of an upgraded package is removed afterwards
+                        if (kind == "install" and data["action"] in ACTION_COLORS
+                                and data["name"] not in seen_packages):
+                            seen_packages.add(data["name"])
+                            updated_packages.append(data)
+                    channel.update(progress.fraction,
+                                   f"<i>{GLib.markup_escape_text(progress.status_text())}</i>")
+                
+                self.update_process.wait()
+                reader.join()
+                if recorder:
+                    recorder.close()
                 
                 return_code = self.update_process.poll()
+                # Pending progress is applied before the final status
+                GLib.idle_add(channel.close)
                 if return_code == 0:
                     GLib.idle_add(
                         self.show_success_dialog,
@@ -360,7 +356,7 @@ class UpdateManager(Adw.ApplicationWindow):
                         updated_packages
                     )
                 else:
-                    error = self.update_process.stderr.read()
+                    error = "".join(errors).strip() or f"dnf5 returned exit status {return_code}"
                     GLib.idle_add(
                         self.show_error_dialog,
                         "Update Failed",
@@ -368,6 +364,7 @@ class UpdateManager(Adw.ApplicationWindow):
                     )
             
             except Exception as e:
+                GLib.idle_add(channel.close)
                 GLib.idle_add(
                     self.show_error_dialog,
                     "Update Error",
@@ -380,12 +377,19 @@ class UpdateManager(Adw.ApplicationWindow):
         thread.daemon = True
         thread.start()
 
+    def apply_update_progress(self, fraction, status, lines):
+        if status is not None:
+            self.status_label.set_markup(status)
+        if fraction is not None:
+            self.progress_bar.set_fraction(fraction)
+
     def on_update_complete(self):
         self.progress_box.set_visible(True)
         self.package_list.set_visible(True)
         self.action_box.set_visible(True)
         self.refresh_button.set_sensitive(True)
         self.update_button.set_sensitive(False)
+        self.update_download_button()
 
     def show_success_dialog(self, title, message, updated_packages):
         # Update the status label with success message and package list
@@ -399,14 +403,7 @@ class UpdateManager(Adw.ApplicationWindow):
         # Create a list of updated packages with their actions
         package_list = []
         for pkg in updated_packages:
-            action_colors = {
-                "upgrade": "#2ec27e",    # Green
-                "reinstall": "#1c71d8",  # Blue
-                "downgrade": "#e66100",  # Orange
-                "install": "#3584e4",    # Light Blue
-                "remove": "#c01c28"      # Red
-            }
-            color = action_colors.get(pkg["action"], "#888888")
+            color = ACTION_COLORS.get(pkg["action"], "#888888")
             action = pkg["action"].capitalize()
             package_list.append(
                 f'<span color="{color}">{action}</span>: '
@@ -435,11 +432,12 @@ class UpdateManager(Adw.ApplicationWindow):
         self.add_toast(toast)
 
     def show_error_dialog(self, title, message):
-        # Update the status label with error message
+        # Update the status label with error message, dnf output may contain
+        # characters that are markup
         self.status_label.set_markup(
             f'<span color="#c01c28">'
             f'<b>⚠ Update Error</b>\n\n'
-            f'{message}\n\n'
+            f'{GLib.markup_escape_text(message)}\n\n'
             f'Please try again later or check the system logs for more information.'
             f'</span>'
         )
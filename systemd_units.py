@@ -0,0 +1,245 @@
+import subprocess
+from typing import Dict, List, Optional, Tuple
+from gi.repository import Gio, GLib
+
+SYSTEMD_BUS_NAME = "org.freedesktop.systemd1"
+SYSTEMD_PATH = "/org/freedesktop/systemd1"
+MANAGER_INTERFACE = "org.freedesktop.systemd1.Manager"
+UNIT_INTERFACE = "org.freedesktop.systemd1.Unit"
+PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
+
+# name, description, load state, active state, sub state, followed unit,
+# object path, job id, job type, job path
+LIST_UNITS_TYPE = "(a(ssssssouso))"
+
+class ServiceInfo:
+    __slots__ = ("name", "description", "load_state", "active_state", "sub_state", "object_path")
+
+    def __init__(self, name: str, description: str, load_state: str, active_state: str,
+                 sub_state: str, object_path: str = ""):
+        self.name = name
+        self.description = description
+        self.load_state = load_state
+        self.active_state = active_state
+        self.sub_state = sub_state
+        self.object_path = object_path
+
+    @property
+    def unit(self) -> str:
+        return f"{self.name}.service"
+
+    @property
+    def status(self) -> str:
+        return self.active_state
+
+    @property
+    def active(self) -> bool:
+        return self.active_state == "active"
+
+# Batch actions: systemctl arguments, the query that tells whether a unit got
+# there and the states that count as success
+BATCH_ACTIONS = {
+    "start": (["start"], "is-active", ("active",)),
+    "stop": (["stop"], "is-active", ("inactive", "failed")),
+    "restart": (["restart"], "is-active", ("active",)),
+    "enable": (["enable", "--now"], "is-enabled", ("enabled",)),
+    "disable": (["disable", "--now"], "is-enabled", ("disabled",)),
+}
+
+def _service_from_unit(unit) -> Optional[ServiceInfo]:
+    name, description, load_state, active_state, sub_state = unit[:5]
+    if not name.endswith(".service"):
+        return None
+    return ServiceInfo(name[:-len(".service")], description or "No description available",
+                       load_state, active_state, sub_state, unit[6])
+
+def list_services_dbus(connection: Optional[Gio.DBusConnection] = None) -> List[ServiceInfo]:
+    # One ListUnits call returns every loaded unit with its description
+    connection = connection or Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
+    reply = connection.call_sync(
+        SYSTEMD_BUS_NAME, SYSTEMD_PATH, MANAGER_INTERFACE, "ListUnits",
+        None, GLib.VariantType(LIST_UNITS_TYPE), Gio.DBusCallFlags.NONE, 10000, None)
+    services = [_service_from_unit(unit) for unit in reply.unpack()[0]]
+    return sorted((service for service in services if service), key=lambda service: service.name)
+
+def list_services_systemctl() -> List[ServiceInfo]:
+    # Fallback without D-Bus, the description is the last column of list-units
+    output = subprocess.check_output(
+        ["systemctl", "list-units", "--type=service", "--all", "--no-pager", "--no-legend",
+         "--plain"],
+        universal_newlines=True,
+        timeout=30
+    )
+    services = []
+    for line in output.splitlines():
+        parts = line.split(None, 4)
+        if len(parts) >= 4 and parts[0].endswith(".service"):
+            description = parts[4] if len(parts) > 4 else "No description available"
+            services.append(ServiceInfo(parts[0][:-len(".service")], description,
+                                        parts[1], parts[2], parts[3]))
+    return sorted(services, key=lambda service: service.name)
+
+def _query_lines(query: str, units: List[str]) -> Optional[List[str]]:
+    try:
+        result = subprocess.run(["systemctl", query] + units, capture_output=True,
+                                text=True, timeout=30)
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"Error querying units: {e}")
+        return None
+    return result.stdout.splitlines()
+
+def query_states(query: str, units: List[str]) -> Dict[str, str]:
+    # is-active and is-enabled print one line per unit, in order. A unit that
+    # only writes to stderr, e.g. a missing one for is-enabled, shifts every
+    # line after it, so then each unit is queried on its own.
+    if not units:
+        return {}
+    lines = _query_lines(query, units)
+    if lines is None:
+        return {}
+    if len(lines) == len(units):
+        return dict(zip(units, lines))
+    print(f"systemctl {query} printed {len(lines)} lines for {len(units)} units, "
+          "querying them one by one")
+    states = {}
+    for unit in units:
+        lines = _query_lines(query, [unit])
+        if lines:
+            states[unit] = lines[0]
+        else:
+            print(f"Could not query {unit} with systemctl {query}")
+    return states
+
+def run_batch_action(action: str, units: List[str]) -> Tuple[Dict[str, Tuple[bool, str, str]], List[str]]:
+    """Run one systemctl command for all units, e.g. `systemctl disable --now a b c`.
+
+    Blocks, so call it from a worker thread. systemd asks polkit once and keeps the
+    authorization for the remaining units. Returns ({unit: (ok, state, message)},
+    errors that name no unit); ok is decided by the state each unit ends up in.
+    """
+    args, query, expected = BATCH_ACTIONS[action]
+    try:
+        result = subprocess.run(["systemctl"] + args + units, capture_output=True,
+                                text=True, timeout=300)
+        errors = [line for line in result.stderr.splitlines() if line.strip()]
+    except (OSError, subprocess.SubprocessError) as e:
+        errors = [str(e)]
+
+    states = query_states(query, units)
+    results = {}
+    for unit in units:
+        state = states.get(unit, "unknown")
+        message = "\n".join(line for line in errors if unit in line)
+        results[unit] = (state in expected, state, message)
+    general = [line for line in errors if not any(unit in line for unit in units)]
+    return results, general
+
+def list_services() -> List[ServiceInfo]:
+    # Raises OSError or subprocess.SubprocessError if neither source works
+    try:
+        return list_services_dbus()
+    except GLib.Error as e:
+        print(f"Error listing units over D-Bus: {e.message}")
+    return list_services_systemctl()
+
+def service_from_properties(path: str, properties: dict) -> Optional[ServiceInfo]:
+    name = properties.get("Id", "")
+    if not name.endswith(".service"):
+        return None
+    return ServiceInfo(name[:-len(".service")],
+                       properties.get("Description") or "No description available",
+                       properties.get("LoadState", ""), properties.get("ActiveState", ""),
+                       properties.get("SubState", ""), path)
+
+class UnitMonitor:
+    """Follows systemd unit changes through its D-Bus signals.
+
+    on_unit_new(service) and on_unit_removed(name, path) report services that are
+    loaded or unloaded, on_unit_changed(path, properties) receives the changed
+    Unit properties, e.g. ActiveState and SubState. Callbacks run on the main loop.
+    """
+
+    def __init__(self, on_unit_new=None, on_unit_removed=None, on_unit_changed=None):
+        self.on_unit_new = on_unit_new
+        self.on_unit_removed = on_unit_removed
+        self.on_unit_changed = on_unit_changed
+        self.connection = None
+        self.subscriptions = []
+
+    @property
+    def active(self) -> bool:
+        return bool(self.subscriptions)
+
+    def start(self) -> bool:
+        try:
+            self.connection = Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
+        except GLib.Error as e:
+            print(f"Error connecting to the system bus: {e.message}")
+            return False
+        self.subscriptions = [
+            self.connection.signal_subscribe(
+                SYSTEMD_BUS_NAME, MANAGER_INTERFACE, "UnitNew", SYSTEMD_PATH, None,
+                Gio.DBusSignalFlags.NONE, self._on_unit_new),
+            self.connection.signal_subscribe(
+                SYSTEMD_BUS_NAME, MANAGER_INTERFACE, "UnitRemoved", SYSTEMD_PATH, None,
+                Gio.DBusSignalFlags.NONE, self._on_unit_removed),
+            # Only property changes of the Unit interface, for any unit path
+            self.connection.signal_subscribe(
+                SYSTEMD_BUS_NAME, PROPERTIES_INTERFACE, "PropertiesChanged", None,
+                UNIT_INTERFACE, Gio.DBusSignalFlags.NONE, self._on_properties_changed),
+        ]
+        # systemd only emits unit signals while at least one client is subscribed
+        self.connection.call(
+            SYSTEMD_BUS_NAME, SYSTEMD_PATH, MANAGER_INTERFACE, "Subscribe",
+            None, None, Gio.DBusCallFlags.NONE, -1, None, self._on_subscribed)
+        return True
+
+    def stop(self):
+        for subscription in self.subscriptions:
+            self.connection.signal_unsubscribe(subscription)
+        self.subscriptions = []
+
+    def _on_subscribed(self, connection, result):
+        try:
+            connection.call_finish(result)
+        except GLib.Error as e:
+            # Already subscribed on this connection is fine
+            if "AlreadySubscribed" not in e.message:
+                print(f"Error subscribing to systemd: {e.message}")
+
+    def fetch_service(self, path: str, callback):
+        # callback(service) with the current state of one unit, None if it is
+        # not a service or has gone away
+        def on_reply(connection, result):
+            try:
+                properties = connection.call_finish(result).unpack()[0]
+            except GLib.Error:
+                callback(None)
+                return
+            callback(service_from_properties(path, properties))
+
+        self.connection.call(
+            SYSTEMD_BUS_NAME, path, PROPERTIES_INTERFACE, "GetAll",
+            GLib.Variant("(s)", (UNIT_INTERFACE,)), GLib.VariantType("(a{sv})"),
+            Gio.DBusCallFlags.NONE, -1, None, on_reply)
+
+    def _on_unit_new(self, connection, sender, path, interface, signal, parameters):
+        name, unit_path = parameters.unpack()
+        if name.endswith(".service") and self.on_unit_new:
+            self.fetch_service(unit_path, lambda service: service and self.on_unit_new(service))
+
+    def _on_unit_removed(self, connection, sender, path, interface, signal, parameters):
+        name, unit_path = parameters.unpack()
+        if name.endswith(".service") and self.on_unit_removed:
+            self.on_unit_removed(name[:-len(".service")], unit_path)
+
+    def _on_properties_changed(self, connection, sender, path, interface, signal, parameters):
+        changed_interface, changed, invalidated = parameters.unpack()
+        if changed_interface == UNIT_INTERFACE and self.on_unit_changed:
+            if changed:
+                self.on_unit_changed(path, changed)
+            elif invalidated:
+                # Values were not sent along, read the unit again
+                self.fetch_service(path, lambda service: service and self.on_unit_changed(
+                    path, {"ActiveState": service.active_state, "SubState": service.sub_state,
+                           "Description": service.description}))
@@ -0,0 +1,263 @@
+import re
+import sys
+import time
+from collections import deque
+
+# Phases of a dnf5 transaction, in the order they happen
+PHASES = ["resolve", "download", "verify", "prepare", "install", "done"]
+
+UNITS = {"B": 1, "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3, "TiB": 1024 ** 4,
+         "kB": 1000, "KB": 1000, "MB": 1000 ** 2, "GB": 1000 ** 3, "TB": 1000 ** 4}
+
+# "[ 3/120] firefox-0:123.0-1.x86_64   42% |   5.0 MiB/s |  60.0 MiB |  00m12s"
+COUNTER_LINE = re.compile(r'^\[\s*(\d+)/(\d+)\]\s+(.*)$')
+PERCENT = re.compile(r'(\d+(?:\.\d+)?)%')
+SIZE = re.compile(r'(\d+(?:\.\d+)?)\s*(B|[KMGT]i?B|kB)\b')
+TOTAL_SIZE = re.compile(r'Total size of inbound packages is (\d+(?:\.\d+)?\s*\S+)')
+TRANSACTION_ACTIONS = ("Installing", "Upgrading", "Downgrading", "Reinstalling", "Removing",
+                       "Cleanup", "Erasing", "Replacing")
+
+# Transaction verbs and the update list action they correspond to
+ACTION_NAMES = {"Installing": "install", "Upgrading": "upgrade", "Downgrading": "downgrade",
+                "Reinstalling": "reinstall", "Removing": "remove", "Erasing": "remove"}
+
+# Seconds of history used for the aggregate download throughput
+THROUGHPUT_WINDOW = 5.0
+
+def split_nevra(nevra):
+    # "firefox-0:123.0-1.x86_64" -> ("firefox", "0:123.0-1", "x86_64")
+    rest, _, arch = nevra.rpartition('.')
+    parts = rest.rsplit('-', 2)
+    if not rest or len(parts) < 3:
+        return nevra, "", ""
+    return parts[0], f"{parts[1]}-{parts[2]}", arch
+
+def parse_size(text):
+    match = SIZE.search(text or "")
+    if not match:
+        return None
+    return int(float(match.group(1)) * UNITS[match.group(2)])
+
+class PackageProgress:
+    def __init__(self, name):
+        self.name = name
+        self.size = None
+        self.downloaded = 0
+        self.state = "pending"
+
+class TransactionProgress:
+    """Turns dnf5 transaction output into a progress model.
+
+    feed() takes one output line at a time and returns the events it produced as
+    (kind, data) tuples. The model tracks the phase, per-package download bytes,
+    aggregate throughput and ETA. Timestamps can be passed in so recorded logs can
+    be replayed faster or slower than real time.
+    """
+
+    def __init__(self):
+        self.phase = "resolve"
+        self.packages = {}
+        self.total_bytes = None
+        self.download_count = (0, 0)
+        self.install_count = (0, 0)
+        self.current_package = None
+        self.current_action = None
+        self.downloaded_bytes = 0
+        self._samples = deque()
+
+    # Aggregate values
+
+    @property
+    def throughput(self):
+        # Bytes per second over the last THROUGHPUT_WINDOW seconds
+        if len(self._samples) < 2:
+            return None
+        (start, start_bytes), (end, end_bytes) = self._samples[0], self._samples[-1]
+        if end <= start:
+            return None
+        return (end_bytes - start_bytes) / (end - start)
+
+    @property
+    def eta(self):
+        throughput = self.throughput
+        if self.phase != "download" or not throughput or not self.total_bytes:
+            return None
+        return max(self.total_bytes - self.downloaded_bytes, 0) / throughput
+
+    @property
+    def fraction(self):
+        # Downloads fill the first half of the bar, the transaction the second
+        if self.phase == "done":
+            return 1.0
+        if self.phase in ("verify", "prepare", "install"):
+            done, total = self.install_count
+            return 0.5 + 0.5 * (done / total if total else 0.0)
+        if self.total_bytes:
+            return 0.5 * min(self.downloaded_bytes / self.total_bytes, 1.0)
+        done, total = self.download_count
+        return 0.5 * (done / total if total else 0.0)
+
+    # Parsing
+
+    def _set_phase(self, phase, events):
+        if phase != self.phase and PHASES.index(phase) > PHASES.index(self.phase):
+            self.phase = phase
+            events.append(("phase", phase))
+
+    def _record_sample(self, timestamp):
+        self._samples.append((timestamp, self.downloaded_bytes))
+        while len(self._samples) > 2 and timestamp - self._samples[0][0] > THROUGHPUT_WINDOW:
+            self._samples.popleft()
+
+    def feed(self, line, timestamp=None):
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        line = line.strip()
+        events = []
+        if not line:
+            return events
+
+        total = TOTAL_SIZE.search(line)
+        if total:
+            self.total_bytes = parse_size(total.group(1))
+            events.append(("total", self.total_bytes))
+            return events
+
+        if line.startswith("Complete!") or line == "Transaction complete.":
+            self._set_phase("done", events)
+            return events
+
+        match = COUNTER_LINE.match(line)
+        if not match:
+            if "Verify package files" in line:
+                self._set_phase("verify", events)
+            elif "Prepare transaction" in line:
+                self._set_phase("prepare", events)
+            elif "Running transaction" in line:
+                self._set_phase("install", events)
+            return events
+
+        current, count, rest = int(match.group(1)), int(match.group(2)), match.group(3)
+        words = rest.split()
+        action = words[0] if words else ""
+
+        if action in TRANSACTION_ACTIONS:
+            self._set_phase("install", events)
+            self.install_count = (current, count)
+            self.current_action = action
+            self.current_package = words[1] if len(words) > 1 else None
+            name, version, arch = split_nevra(self.current_package or "")
+            events.append(("install", {"action": ACTION_NAMES.get(action, action.lower()),
+                                       "package": self.current_package, "name": name,
+                                       "version": version, "arch": arch,
+                                       "current": current, "total": count}))
+        elif "Verify package files" in rest:
+            self._set_phase("verify", events)
+        elif "Prepare transaction" in rest:
+            self._set_phase("prepare", events)
+        elif words:
+            # Anything else with a counter is a package download
+            self._set_phase("download", events)
+            self.download_count = (current, count)
+            name = words[0]
+            package = self.packages.setdefault(name, PackageProgress(name))
+            columns = [column.strip() for column in rest.split("|")]
+            percent = PERCENT.search(columns[0])
+            size = parse_size(columns[2]) if len(columns) >= 3 else None
+            if size:
+                package.size = size
+            if package.size and percent:
+                downloaded = int(package.size * float(percent.group(1)) / 100)
+                self.downloaded_bytes += downloaded - package.downloaded
+                package.downloaded = downloaded
+            package.state = "downloaded" if percent and float(percent.group(1)) >= 100 else "downloading"
+            self.current_package = name
+            self._record_sample(timestamp)
+            events.append(("download", {"package": name, "downloaded": package.downloaded,
+                                        "size": package.size, "current": current, "total": count}))
+        return events
+
+    def status_text(self):
+        if self.phase == "download":
+            done, total = self.download_count
+            text = f"Downloading [{done}/{total}]: {self.current_package or ''}"
+            throughput = self.throughput
+            if throughput:
+                text += f"\nSpeed: {format_bytes(throughput)}/s"
+            if self.total_bytes:
+                text += f"\nDownloaded: {format_bytes(self.downloaded_bytes)} of {format_bytes(self.total_bytes)}"
+            eta = self.eta
+            if eta is not None:
+                text += f"\nTime remaining: {int(eta // 60)}m {int(eta % 60):02d}s"
+            return text
+        if self.phase == "verify":
+            return "Verifying package files..."
+        if self.phase == "prepare":
+            return "Preparing transaction..."
+        if self.phase == "install":
+            done, total = self.install_count
+            if total:
+                return f"{self.current_action} [{done}/{total}]: {self.current_package or ''}"
+            return "Running transaction..."
+        if self.phase == "done":
+            return "Transaction complete"
+        return "Resolving dependencies..."
+
+def format_bytes(size):
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+class TransactionRecorder:
+    # Writes "<seconds since start>\t<line>" so a run can be replayed later
+    def __init__(self, path):
+        self.file = open(path, 'w')
+        self.start = time.monotonic()
+
+    def record(self, line):
+        self.file.write(f"{time.monotonic() - self.start:.3f}\t{line.rstrip()}\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def read_recording(path):
+    with open(path) as f:
+        for line in f:
+            elapsed, _, text = line.rstrip('\n').partition('\t')
+            try:
+                yield float(elapsed), text
+            except ValueError:
+                continue
+
+def replay(path, on_events=None, speed=None):
+    # Feed a recording back through a fresh model. With speed=None it runs as fast
+    # as possible, otherwise recorded delays are divided by speed.
+    progress = TransactionProgress()
+    previous = 0.0
+    for elapsed, text in read_recording(path):
+        if speed:
+            time.sleep(max(elapsed - previous, 0) / speed)
+        previous = elapsed
+        events = progress.feed(text, timestamp=elapsed)
+        if on_events and events:
+            on_events(progress, events)
+    return progress
+
+if __name__ == '__main__':
+    # python3 transaction_progress.py <recording> [--verbose]
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <recording> [--verbose]")
+        sys.exit(1)
+
+    def show(progress, events):
+        for kind, data in events:
+            print(f"{kind}: {data}")
+
+    started = time.perf_counter()
+    progress = replay(sys.argv[1], show if '--verbose' in sys.argv else None)
+    elapsed = time.perf_counter() - started
+    lines = sum(1 for _ in read_recording(sys.argv[1]))
+    print(f"Replayed {lines} lines in {elapsed * 1000:.1f} ms, final phase: {progress.phase}, "
+          f"downloaded {format_bytes(progress.downloaded_bytes)} of {len(progress.packages)} packages")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import subprocess
+from facts_cache import CACHE_DIR, get_package_stamp
+from updater_settings import load_settings
+from dnf_updates import check_upgrades, UpdateCheckError
+
+# Pending updates found by the last check, read by the update manager at startup
+RESULT_FILE = os.path.join(CACHE_DIR, 'pending_updates.json')
+
+UNIT_NAME = 'tears-of-mandrake-update-check'
+UNIT_DIR = os.path.join(os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config'),
+                        'systemd', 'user')
+
+SERVICE_TEMPLATE = """[Unit]
+Description=Check for pending system updates
+
+[Service]
+Type=oneshot
+Nice=19
+IOSchedulingClass=idle
+ExecStart={python} {script}
+"""
+
+TIMER_TEMPLATE = """[Unit]
+Description=Periodic check for pending system updates
+
+[Timer]
+OnBootSec=15min
+OnUnitActiveSec={interval}
+RandomizedDelaySec=10min
+Persistent=true
+
+[Install]
+WantedBy=timers.target
+"""
+
+def save_pending_updates(updates):
+    # Only the fields the update list shows, so the file stays small
+    data = {
+        'checked': time.time(),
+        'packages': get_package_stamp(),
+        'updates': [[u['name'], u['arch'], u['version'], u.get('repo', ''), u['action']]
+                    for u in updates],
+    }
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = RESULT_FILE + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, RESULT_FILE)
+    except OSError as e:
+        print(f"Error writing pending updates: {e}")
+
+def load_pending_updates():
+    # Returns (updates, checked) or None. Reads one file, no process is started.
+    try:
+        with open(RESULT_FILE, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('packages') != get_package_stamp():
+        # Packages were installed or updated since, the result is outdated
+        return None
+    updates = [{'name': name, 'arch': arch, 'version': version, 'repo': repo, 'action': action}
+               for name, arch, version, repo, action in data.get('updates', [])]
+    return updates, data.get('checked')
+
+def _systemctl(*args):
+    try:
+        subprocess.run(["systemctl", "--user"] + list(args), check=True,
+                       capture_output=True, text=True, timeout=30)
+        return True
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"systemctl --user {' '.join(args)} failed: {e}")
+        return False
+
+def timer_enabled():
+    return os.path.exists(os.path.join(UNIT_DIR, 'timers.target.wants', f'{UNIT_NAME}.timer'))
+
+def enable_timer():
+    settings = load_settings()
+    interval = settings.get('schedule', 'interval', fallback='6h')
+    try:
+        os.makedirs(UNIT_DIR, exist_ok=True)
+        with open(os.path.join(UNIT_DIR, f'{UNIT_NAME}.service'), 'w') as f:
+            f.write(SERVICE_TEMPLATE.format(python=sys.executable, script=os.path.abspath(__file__)))
+        with open(os.path.join(UNIT_DIR, f'{UNIT_NAME}.timer'), 'w') as f:
+            f.write(TIMER_TEMPLATE.format(interval=interval))
+    except OSError as e:
+        print(f"Error writing update check units: {e}")
+        return False
+    return _systemctl("daemon-reload") and _systemctl("enable", "--now", f"{UNIT_NAME}.timer")
+
+def disable_timer():
+    return _systemctl("disable", "--now", f"{UNIT_NAME}.timer")
+
+def run_check():
+    # Entry point of the timer service, runs unprivileged
+    try:
+        updates = check_upgrades()
+    except UpdateCheckError as e:
+        print(f"Update check failed: {e}")
+        return 1
+    save_pending_updates(updates)
+    print(f"{len(updates)} pending updates")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(run_check())
@@ -0,0 +1,169 @@
+import gi
+gi.require_version('Gtk', '4.0')
+from gi.repository import Gtk, Gio, GObject
+
+ACTION_COLORS = {
+    "upgrade": "#2ec27e",    # Green
+    "reinstall": "#1c71d8",  # Blue
+    "downgrade": "#e66100",  # Orange
+    "install": "#3584e4",    # Light Blue
+    "remove": "#c01c28"      # Red
+}
+
+SORT_KEYS = [("Name", "name"), ("Repository", "repo")]
+
+class PackageItem(GObject.Object):
+    name = GObject.Property(type=str, default="")
+    arch = GObject.Property(type=str, default="")
+    version = GObject.Property(type=str, default="")
+    size = GObject.Property(type=str, default="")
+    repo = GObject.Property(type=str, default="")
+    action = GObject.Property(type=str, default="")
+
+    def __init__(self, package_info):
+        super().__init__()
+        for key in ("name", "arch", "version", "size", "repo", "action"):
+            self.set_property(key, package_info.get(key) or "")
+
+class UpdateList(Gtk.Box):
+    """Pending updates in a Gio.ListStore shown through a virtualized Gtk.ListView.
+
+    Only the rows on screen are realized, records can be appended while dnf is
+    still printing them and the list can be filtered by repository.
+    """
+
+    def __init__(self):
+        super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        self.store = Gio.ListStore(item_type=PackageItem)
+        self.repos = []
+
+        # Filter and sort controls
+        controls = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        controls.set_margin_start(10)
+        controls.set_margin_end(10)
+
+        self.repo_model = Gtk.StringList.new(["All repositories"])
+        self.repo_dropdown = Gtk.DropDown(model=self.repo_model)
+        self.repo_dropdown.connect("notify::selected", self._on_filter_changed)
+        controls.append(self.repo_dropdown)
+
+        sort_label = Gtk.Label(label="Sort by")
+        sort_label.set_hexpand(True)
+        sort_label.set_halign(Gtk.Align.END)
+        controls.append(sort_label)
+
+        self.sort_dropdown = Gtk.DropDown.new_from_strings([label for label, key in SORT_KEYS])
+        self.sort_dropdown.connect("notify::selected", self._on_sort_changed)
+        controls.append(self.sort_dropdown)
+        self.append(controls)
+
+        self.filter = Gtk.CustomFilter.new(self._filter_func)
+        filter_model = Gtk.FilterListModel(model=self.store, filter=self.filter)
+        self.sorter = Gtk.CustomSorter.new(self._sort_func)
+        sort_model = Gtk.SortListModel(model=filter_model, sorter=self.sorter)
+
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self._on_setup)
+        factory.connect("bind", self._on_bind)
+
+        self.list_view = Gtk.ListView(model=Gtk.NoSelection(model=sort_model), factory=factory)
+        self.list_view.add_css_class("boxed-list")
+
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        scrolled.set_min_content_height(300)
+        scrolled.set_vexpand(True)
+        scrolled.set_child(self.list_view)
+        self.append(scrolled)
+
+    def _on_setup(self, factory, list_item):
+        box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        box.set_margin_top(5)
+        box.set_margin_bottom(5)
+        box.set_margin_start(10)
+        box.set_margin_end(10)
+
+        # Package info box (left side)
+        info_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        info_box.set_hexpand(True)
+        name_label = Gtk.Label()
+        name_label.set_xalign(0)
+        name_label.add_css_class("heading")
+        info_box.append(name_label)
+
+        details_label = Gtk.Label()
+        details_label.set_xalign(0)
+        info_box.append(details_label)
+        box.append(info_box)
+
+        # Action type (right side)
+        action_label = Gtk.Label()
+        action_label.add_css_class("caption")
+        box.append(action_label)
+
+        list_item.set_child(box)
+        list_item.labels = (name_label, details_label, action_label)
+
+    def _on_bind(self, factory, list_item):
+        item = list_item.get_item()
+        name_label, details_label, action_label = list_item.labels
+
+        name_label.set_label(f"{item.name} ({item.arch})")
+
+        # Version, size and repository
+        details = [detail for detail in (item.version, item.size, item.repo) if detail]
+        details_label.set_markup(f'<span size="small">{" - ".join(details)}</span>')
+        details_label.set_visible(bool(details))
+
+        color = ACTION_COLORS.get(item.action, "#888888")
+        action_label.set_markup(f'<span color="{color}">{item.action.capitalize()}</span>')
+
+    def _filter_func(self, item):
+        repo_index = self.repo_dropdown.get_selected()
+        if repo_index > 0 and item.repo != self.repos[repo_index - 1]:
+            return False
+        return True
+
+    def _sort_func(self, a, b, user_data=None):
+        key = SORT_KEYS[self.sort_dropdown.get_selected()][1]
+        first = (a.get_property(key), a.name)
+        second = (b.get_property(key), b.name)
+        return (first > second) - (first < second)
+
+    def _on_filter_changed(self, dropdown, pspec):
+        self.filter.changed(Gtk.FilterChange.DIFFERENT)
+
+    def _on_sort_changed(self, dropdown, pspec):
+        self.sorter.changed(Gtk.SorterChange.DIFFERENT)
+
+    def _add_repos(self, records):
+        for record in records:
+            repo = record.get("repo")
+            if repo and repo not in self.repos:
+                self.repos.append(repo)
+                self.repo_model.append(repo)
+
+    def _reset_repos(self):
+        # The filter falls back to all repositories, the old ones are dropped
+        self.repo_dropdown.set_selected(0)
+        self.repo_model.splice(1, len(self.repos), [])
+        self.repos = []
+
+    def add_records(self, records):
+        # One items-changed for the whole batch
+        self._add_repos(records)
+        self.store.splice(self.store.get_n_items(), 0, [PackageItem(record) for record in records])
+
+    def replace_records(self, records):
+        # A repository filter stays selected if the new records still use it
+        selected = self.repo_dropdown.get_selected()
+        repo = self.repos[selected - 1] if 0 < selected <= len(self.repos) else None
+        self._reset_repos()
+        self._add_repos(records)
+        if repo in self.repos:
+            self.repo_dropdown.set_selected(self.repos.index(repo) + 1)
+        self.store.splice(0, self.store.get_n_items(), [PackageItem(record) for record in records])
+
+    def clear(self):
+        self._reset_repos()
+        self.store.remove_all()
@@ -0,0 +1,95 @@
+import re
+from gi.repository import Gio
+from command_runner import run_privileged_command
+from updater_settings import load_settings
+
+THROTTLE_PATTERN = re.compile(r'^\d+(\.\d+)?[kKmMgG]?$|^\d+(\.\d+)?%$')
+
+class UpdatePrefetcher:
+    """Downloads pending updates ahead of time with dnf5 --downloadonly.
+
+    Nothing starts on its own: start() runs after the user asked for it, or
+    after a check the user started if auto_start is set in updater.conf. The
+    download is throttled to the configured bandwidth and is paused while the
+    network is metered, unless that is allowed. Packages it fetched stay in the
+    dnf cache, so the real update only verifies and installs. on_state_changed
+    (state) receives idle, paused, downloading, stopping, done or failed.
+    """
+
+    def __init__(self, on_state_changed=None):
+        self.on_state_changed = on_state_changed
+        self.state = "idle"
+        self.runner = None
+        self._on_stopped = []
+        self.monitor = Gio.NetworkMonitor.get_default()
+        self.monitor.connect("notify::network-metered", self._on_metered_changed)
+
+    def _set_state(self, state):
+        self.state = state
+        if self.on_state_changed:
+            self.on_state_changed(state)
+
+    def _metered_blocked(self, settings):
+        return (self.monitor.get_network_metered()
+                and not settings.getboolean('prefetch', 'allow_metered', fallback=False))
+
+    def auto_start_enabled(self):
+        return load_settings().getboolean('prefetch', 'auto_start', fallback=False)
+
+    def start(self):
+        # A cancelled download that is still exiting is restarted from _on_finished
+        if self.state in ("downloading", "stopping", "done") or self.runner:
+            return
+        settings = load_settings()
+        if self._metered_blocked(settings):
+            self._set_state("paused")
+            return
+
+        cmd = ["dnf5", "upgrade", "--downloadonly", "-y"]
+        limit = settings.get('prefetch', 'bandwidth_limit', fallback='').strip()
+        if limit and THROTTLE_PATTERN.match(limit):
+            cmd.append(f"--setopt=throttle={limit}")
+        elif limit:
+            print(f"Ignoring invalid bandwidth_limit: {limit}")
+
+        # dnf runs as root, the runner stops it through the cancel watchdog
+        self.runner = run_privileged_command(cmd, on_finished=self._on_finished)
+        self._set_state("downloading")
+
+    def stop(self, on_stopped=None):
+        # on_stopped() runs once no download holds the dnf lock any more
+        if self.runner is None:
+            if self.state != "done":
+                self._set_state("idle")
+            if on_stopped:
+                on_stopped()
+            return
+        if on_stopped:
+            self._on_stopped.append(on_stopped)
+        self.runner.cancel()
+        self._set_state("stopping")
+
+    def _on_finished(self, runner):
+        self.runner = None
+        callbacks, self._on_stopped = self._on_stopped, []
+        if callbacks:
+            self._set_state("idle")
+            for callback in callbacks:
+                callback()
+        elif runner.cancelled:
+            # Paused on a metered network, it may have become free meanwhile
+            if self.state == "paused" and not self._metered_blocked(load_settings()):
+                self._set_state("idle")
+                self.start()
+        else:
+            self._set_state("done" if runner.success else "failed")
+
+    def _on_metered_changed(self, monitor, pspec):
+        settings = load_settings()
+        if self.state == "downloading" and self._metered_blocked(settings):
+            # Whatever was downloaded so far stays in the cache
+            self.runner.cancel()
+            self._set_state("paused")
+        elif self.state == "paused" and not self.runner and not self._metered_blocked(settings):
+            self._set_state("idle")
+            self.start()
@@ -0,0 +1,41 @@
+import os
+import configparser
+
+CONFIG_DIR = os.path.join(os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config'),
+                          'tears-of-mandrake')
+CONFIG_FILE = os.path.join(CONFIG_DIR, 'updater.conf')
+
+DEFAULTS = {
+    'prefetch': {
+        # Start the background download after a check the user started, it
+        # asks for authorization. Otherwise it only runs when asked for.
+        'auto_start': 'false',
+        # Passed to dnf as throttle, bytes per second with an optional k/M/G
+        # suffix or a percentage of the available bandwidth
+        'bandwidth_limit': '1M',
+        'allow_metered': 'false',
+    },
+    'schedule': {
+        # How often the background checker runs, as a systemd time span
+        'interval': '6h',
+    },
+}
+
+def load_settings():
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.read_dict(DEFAULTS)
+    try:
+        parser.read(CONFIG_FILE)
+    except configparser.Error as e:
+        print(f"Error reading {CONFIG_FILE}: {e}")
+    return parser
+
+def save_settings(parser):
+    try:
+        os.makedirs(CONFIG_DIR, exist_ok=True)
+        tmp_path = CONFIG_FILE + '.tmp'
+        with open(tmp_path, 'w') as f:
+            parser.write(f)
+        os.replace(tmp_path, CONFIG_FILE)
+    except OSError as e:
+        print(f"Error writing {CONFIG_FILE}: {e}")
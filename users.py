@@ -3,6 +3,8 @@ import subprocess
 import pwd
 import grp
 from gi.repository import Gtk, Adw, GLib, Gio, Pango
+from privileged_helper import HelperError, operation, run_operations
+from membership import MembershipPlan
 
 class UserDialog(Adw.Window):
     def __init__(self, parent, user=None):
@@ -166,39 +168,31 @@ class UserDialog(Adw.Window):
                 return
             
             try:
-                # Create user
-                cmd = ["useradd", "-m", "-c", fullname or username, username]
-                if is_admin:
-                    cmd.extend(["-G", "wheel"])
-                subprocess.run(["pkexec"] + cmd, check=True)
-                
-                # Set password
-                p = subprocess.Popen(["pkexec", "passwd", username],
-                                  stdin=subprocess.PIPE,
-                                  stdout=subprocess.PIPE,
-                                  stderr=subprocess.PIPE)
-                p.communicate(input=f"{password}\n{password}\n".encode())
-            except subprocess.CalledProcessError as e:
+                # Create user and set the password in one batch
+                run_operations(
+                    operation('create_user', username=username, fullname=fullname,
+                              groups=["wheel"] if is_admin else []),
+                    operation('set_password', username=username, password=password)
+                )
+            except HelperError as e:
                 self.show_error(f"Failed to create user: {e}")
                 return
         else:  # Editing existing user
             try:
+                plan = MembershipPlan()
+                
                 # Update full name
                 if fullname != self.user.pw_gecos:
-                    subprocess.run(["pkexec", "usermod", "-c", fullname, username], check=True)
+                    plan.add(operation('set_fullname', username=username, fullname=fullname))
                 
-                # Update groups
+                # Update groups, a group named after the user is always kept
                 current_groups = [g.gr_name for g in grp.getgrall() if username in g.gr_mem]
-                groups_to_add = [g for g in groups if g not in current_groups]
-                groups_to_remove = [g for g in current_groups if g not in groups and g != username]
-                
-                if groups_to_add:
-                    subprocess.run(["pkexec", "usermod", "-a", "-G", ",".join(groups_to_add), username], check=True)
+                desired_groups = groups + [g for g in current_groups if g == username and g not in groups]
+                plan.set_user_groups(username, current_groups, desired_groups)
                 
-                if groups_to_remove:
-                    for group in groups_to_remove:
-                        subprocess.run(["pkexec", "gpasswd", "-d", username, group], check=True)
-            except subprocess.CalledProcessError as e:
+                # All changes are applied with a single request to the helper
+                plan.apply()
+            except HelperError as e:
                 self.show_error(f"Failed to update user: {e}")
                 return
         
@@ -330,25 +324,15 @@ class GroupDialog(Adw.Window):
             return
         
         try:
+            plan = MembershipPlan()
             if not self.group:  # Adding new group
-                subprocess.run(["pkexec", "groupadd", groupname], check=True)
-            
-            # Update members
-            if self.group:
-                current_members = self.group.gr_mem
-            else:
-                current_members = []
-            
-            members_to_add = [m for m in members if m not in current_members]
-            members_to_remove = [m for m in current_members if m not in members]
-            
-            for member in members_to_add:
-                subprocess.run(["pkexec", "gpasswd", "-a", member, groupname], check=True)
-            
-            for member in members_to_remove:
-                subprocess.run(["pkexec", "gpasswd", "-d", member, groupname], check=True)
+                plan.add(operation('create_group', group=groupname))
             
-        except subprocess.CalledProcessError as e:
+            # Update members with a single gpasswd -M for the whole list
+            current_members = self.group.gr_mem if self.group else []
+            plan.set_group_members(groupname, current_members, members)
+            plan.apply()
+        except HelperError as e:
             self.show_error(f"Failed to {'create' if not self.group else 'update'} group: {e}")
             return
         
@@ -668,9 +652,9 @@ class UsersPage(Gtk.Box):
     def on_delete_user_response(self, dialog, response, username):
         if response == "delete":
             try:
-                subprocess.run(["pkexec", "userdel", "-r", username], check=True)
+                run_operations(operation('delete_user', username=username))
                 self.refresh_users()
-            except subprocess.CalledProcessError as e:
+            except HelperError as e:
                 error_dialog = Adw.MessageDialog.new(
                     self.get_root(),
                     "Error",
@@ -717,9 +701,9 @@ class UsersPage(Gtk.Box):
     def on_delete_group_response(self, dialog, response, groupname):
         if response == "delete":
             try:
-                subprocess.run(["pkexec", "groupdel", groupname], check=True)
+                run_operations(operation('delete_group', group=groupname))
                 self.refresh_groups()
-            except subprocess.CalledProcessError as e:
+            except HelperError as e:
                 error_dialog = Adw.MessageDialog.new(
                     self.get_root(),
                     "Error",